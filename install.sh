@@ -96,7 +96,7 @@ fetch_remote_lib() {
   return 1
 }
 
-for name in relay relay-events relay-doctor relay-kit relay-persona relay-tui; do
+for name in relay relay-events relay-doctor relay-kit relay-persona relay-tui relay-daemon; do
   if [ -n "$SCRIPT_DIR" ] && [ -f "$SCRIPT_DIR/bin/$name" ]; then
     install -m 0755 "$SCRIPT_DIR/bin/$name" "$PREFIX/bin/"
     echo "Installed bin/$name -> $PREFIX/bin/"
@@ -136,13 +136,17 @@ if [ -n "$SCRIPT_DIR" ] && [ -d "$SCRIPT_DIR/lib" ]; then
 elif [ -d "lib" ]; then
   copy_local_libs "lib"
 else
-  for name in relay_toml.py relay_kit_config.py relay_tmux_import.py relay_tui.sh; do
+  for name in relay_toml.py relay_kit_config.py relay_tmux_import.py relay_import_rules.py relay_snapshot.py relay_events.py relay_kit_plan.py relay_kit_reconcile.py relay_preview.py relay_fastpath.py relay_persona_graph.py relay_event_reader.py relay_events.awk relay_trace.py relay_trace.sh relay_index.py relay_index.sh relay_daemon.py relay_daemon.sh relay_ready.sh relay_lazy.sh relay_tui.sh; do
     if ! fetch_remote_lib "$name"; then
       echo "Failed to install lib/$name; ensure lib/$name exists locally or set RELAY_REMOTE_BASE." >&2
       exit 1
     fi
   done
 fi
+# Write the bytecode the python helpers would otherwise compile on first use.
+if command -v python3 >/dev/null 2>&1; then
+  python3 -m compileall -q "$PREFIX/lib" >/dev/null 2>&1 || true
+fi
 profile_hook() {
   dest="$1"
   hook="\n# Added by relay install\nif [ -d \"$PREFIX/bin\" ] && ! printf '%s\n' \"$PATH\" | tr ':' '\n' | grep -F -q \"$PREFIX/bin\"; then\n  export PATH=\"$PREFIX/bin:$PATH\"\nfi\n"
@@ -0,0 +1,459 @@
+"""Optional long-lived helper behind ``relay daemon``.
+
+The daemon keeps kit and persona listings, persona previews, compiled launch
+plans, a short-lived tmux status snapshot and the newest event rows in
+memory, and answers queries for them over a Unix socket
+(``$RELAY_STATE_DIR/daemon.sock`` unless ``RELAY_DAEMON_SOCKET`` is set).
+
+Watching is done by ``stat``: before answering, the daemon re-stats the
+kits/personas directories and every ``kit.toml``/``persona.toml`` (or the
+files a plan or preview was built from) and rebuilds only what changed.  That
+costs microseconds and no forks, and it can never serve an edit late.
+
+Protocol: the client sends one JSON array ``[tag, kits_dir, personas_dir,
+op, *args]`` terminated by a newline, where ``tag`` is ``"relay-daemon
+<PROTOCOL> <PLAN_FORMAT>"``.  The daemon answers with an exit status on the
+first line, then the payload and the line ``relay-daemon: end``, which tells
+the client the reply was not cut short, and closes the connection.  Status
+111 means "not for this daemon": different directories, another protocol, or
+a plan request from a client that reads another plan format (a daemon left
+running across an upgrade).  The shell client in ``relay_daemon.sh`` then
+falls back to computing the answer itself, exactly as it does when no daemon
+is running.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from relay_events import EventStore, detail_lines, row_lines, segments_dir
+from relay_fastpath import persona_preview_lines
+from relay_index import KIT, PERSONA, MetadataIndex
+from relay_kit_plan import PLAN_FORMAT, compile_plan, plan_deps
+from relay_toml import TomlMissingError, load_path
+
+UNAVAILABLE = 111
+# Bump with RELAY_DAEMON_PROTOCOL in relay_daemon.sh whenever requests or
+# replies change.
+PROTOCOL = 2
+TAG = f"relay-daemon {PROTOCOL} {PLAN_FORMAT}"
+END = "relay-daemon: end\n"
+_MAX_REQUEST = 1 << 16
+_STATUS_TTL = 0.5
+_START_TIMEOUT = 5.0
+# Same fields, in the same order, as kit_status_report in bin/relay-kit.
+_STATUS_FORMAT = (
+    "#{window_panes} #{session_attached} #{session_windows} "
+    "#{session_created} #{session_activity} #{session_name}"
+)
+
+Response = Tuple[int, str]
+Signature = Tuple
+
+
+def _stat_key(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _valid_name(name: str) -> bool:
+    # Mirrors validate_identifier in the shell entrypoints.
+    return bool(name) and not name.startswith(".") and "/" not in name and ".." not in name
+
+
+def status_lines(
+    kits: Sequence[str], windows: Dict[str, List[int]], fmt: str, sessions: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """Format a kit status report the way kit_status_report does.
+
+    ``sessions`` maps a kit to the session its kit.toml names; a kit missing
+    from it runs in a session named after the kit, the kit.toml default.
+    """
+    lines: List[str] = []
+    rows: List[str] = []
+    for kit in kits:
+        session = (sessions or {}).get(kit) or kit
+        info = windows.get(session)
+        state = "running" if info is not None else "stopped"
+        if fmt == "text":
+            lines.append(f"{kit}: {state}")
+        elif fmt == "tsv":
+            if info is not None:
+                panes, attached, count, created, activity = info
+                lines.append(f"{kit}\t{state}\t{session}\t{attached}\t{count}\t{panes}\t{created}\t{activity}")
+            else:
+                lines.append(f"{kit}\t{state}\t{session}\t0\t0\t0\t\t")
+        else:
+            entry: Dict[str, object] = {"kit": kit, "state": state, "session": session}
+            if info is not None:
+                panes, attached, count, created, activity = info
+                entry.update(attached=attached, windows=count, panes=panes, created=created, activity=activity)
+            else:
+                entry.update(attached=0, windows=0, panes=0, created=None, activity=None)
+            rows.append(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+    if fmt == "json":
+        lines.append("[" + ",".join(rows) + "]")
+    return lines
+
+
+class RelayState:
+    """Everything the daemon answers from, keyed on the files it came from."""
+
+    def __init__(self, kits_dir: str, personas_dir: str) -> None:
+        self.kits_dir = kits_dir
+        self.personas_dir = personas_dir
+        self.index = MetadataIndex(kits_dir, personas_dir)
+        self._plans: Dict[Tuple[str, str], Tuple[Signature, str]] = {}
+        self._previews: Dict[Tuple[str, bool], Tuple[Signature, str]] = {}
+        self._events: Dict[Tuple[str, str, int], Tuple[Signature, List[str]]] = {}
+        self._status: Tuple[float, Dict[str, List[int]]] = (0.0, {})
+        self.counters = {"requests": 0, "plan_hits": 0, "plan_misses": 0}
+        self.lock = threading.Lock()
+
+    # -- kits and personas -------------------------------------------------
+    def tmux_windows(self) -> Dict[str, List[int]]:
+        stamp, cached = self._status
+        now = time.monotonic()
+        if now - stamp < _STATUS_TTL:
+            return cached
+        try:
+            result = subprocess.run(
+                ["tmux", "list-windows", "-a", "-F", _STATUS_FORMAT],
+                check=False,
+                capture_output=True,
+                text=True,
+            )
+            blob = result.stdout if result.returncode == 0 else ""
+        except OSError:
+            blob = ""
+        sessions: Dict[str, List[int]] = {}
+        for line in blob.splitlines():
+            fields = line.split(" ", 5)
+            if len(fields) != 6:
+                continue
+            try:
+                panes, attached, count, created, activity = (int(value) for value in fields[:5])
+            except ValueError:
+                continue
+            info = sessions.setdefault(fields[5], [0, attached, count, created, activity])
+            info[0] += panes
+        self._status = (now, sessions)
+        return sessions
+
+    def kit_rows(self) -> List[str]:
+        windows = self.tmux_windows()
+        entries = self.index.refresh().entries[KIT]
+        rows = []
+        for name in sorted(entries):
+            symbol = "*" if (entries[name].session or name) in windows else "-"
+            rows.append(f"{symbol}\t{name:<24}\t{entries[name].description}")
+        return rows
+
+    def persona_preview(self, name: str, show_secrets: bool) -> Response:
+        path = os.path.join(self.personas_dir, name, "persona.toml")
+        signature = (_stat_key(path),)
+        cached = self._previews.get((path, show_secrets))
+        if cached is not None and cached[0] == signature:
+            return 0, cached[1]
+        try:
+            data = load_path(path) or {}
+        except TomlMissingError as exc:
+            return 2, f"{exc}\n"
+        except (OSError, ValueError) as exc:
+            return 1, f"{path}: {exc}\n"
+        text = "\n".join(persona_preview_lines(data, show_secrets)) + "\n"
+        self._previews[(path, show_secrets)] = (signature, text)
+        return 0, text
+
+    # -- plans -------------------------------------------------------------
+    def plan(self, kit_file: str, kit_dir: str) -> Response:
+        key = (kit_file, kit_dir)
+        cached = self._plans.get(key)
+        if cached is not None and cached[0] == tuple(_stat_key(dep) for dep in plan_deps(cached[1].splitlines())):
+            self.counters["plan_hits"] += 1
+            return 0, cached[1]
+        try:
+            lines = compile_plan(kit_file, kit_dir, self.personas_dir)
+        except TomlMissingError as exc:
+            return 3, f"{exc}\n"
+        except Exception as exc:  # noqa: BLE001 - the shell prints the reason
+            return 1, f"Failed to parse kit {os.path.basename(kit_dir)}: {exc}\n"
+        text = "\n".join(lines) + "\n"
+        self._plans[key] = (tuple(_stat_key(dep) for dep in plan_deps(lines)), text)
+        self.counters["plan_misses"] += 1
+        return 0, text
+
+    # -- events ------------------------------------------------------------
+    def event_lines(self, log_path: str, kind: str, number: int) -> List[str]:
+        key = (log_path, kind, number)
+        signature = (_stat_key(log_path), _stat_key(segments_dir(log_path)))
+        cached = self._events.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        store = EventStore(log_path)
+        lines = row_lines(store, number) if kind == "rows" else detail_lines(store, number)
+        self._events[key] = (signature, lines)
+        return lines
+
+    # -- dispatch ----------------------------------------------------------
+    def handle(self, op: str, args: List[str]) -> Response:
+        self.counters["requests"] += 1
+        if op == "ping":
+            return 0, f"relay-daemon {os.getpid()}\n"
+        if op == "kits":
+            return 0, "".join(line + "\n" for line in self.index.refresh().listing(KIT))
+        if op == "kits.rows":
+            return 0, "".join(row + "\n" for row in self.kit_rows())
+        if op == "personas":
+            return 0, "".join(line + "\n" for line in self.index.refresh().listing(PERSONA))
+        if op == "status":
+            fmt = args[0] if args else "text"
+            names = args[1:]
+            for name in names:
+                if not _valid_name(name):
+                    return 2, f"Invalid kit name: {name}\n"
+            entries = self.index.refresh().entries[KIT]
+            kits = names or self.index.names(KIT)
+            sessions = {name: entry.session for name, entry in entries.items()}
+            return 0, "".join(line + "\n" for line in status_lines(kits, self.tmux_windows(), fmt, sessions))
+        if op == "persona.preview" and args:
+            if not _valid_name(args[0]):
+                return 2, f"Invalid persona name: {args[0]}\n"
+            return self.persona_preview(args[0], len(args) > 1 and args[1] == "1")
+        if op == "plan" and len(args) == 2:
+            return self.plan(args[0], args[1])
+        if op in ("events.rows", "events.detail") and len(args) == 2:
+            try:
+                number = int(args[1])
+            except ValueError:
+                return 2, f"Invalid number: {args[1]}\n"
+            lines = self.event_lines(args[0], op[7:], number)
+            if op == "events.rows" and not lines:
+                return 1, ""
+            return 0, "".join(line + "\n" for line in lines)
+        if op == "stats":
+            stats = dict(self.counters, **self.index.counters)
+            return 0, "".join(f"{key}\t{stats[key]}\n" for key in sorted(stats))
+        return 2, f"relay daemon: unknown request: {op}\n"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        server: "DaemonServer" = self.server  # type: ignore[assignment]
+        try:
+            request = json.loads(self.rfile.readline(_MAX_REQUEST))
+            tag, kits_dir, personas_dir, op = (str(value) for value in request[:4])
+            args = [str(value) for value in request[4:]]
+        except (ValueError, TypeError):
+            # Clients from before the tag send three leading fields.
+            self.wfile.write(f"{UNAVAILABLE}\nrelay daemon: malformed request\n{END}".encode("utf-8"))
+            return
+        refused = self._refuse(tag, op)
+        if refused is not None:
+            status, body = refused
+        elif (os.path.abspath(kits_dir), os.path.abspath(personas_dir)) != (
+            server.state.kits_dir,
+            server.state.personas_dir,
+        ):
+            status, body = UNAVAILABLE, ""
+        elif op == "stop":
+            status, body = 0, "stopping\n"
+            threading.Thread(target=server.shutdown, daemon=True).start()
+        else:
+            with server.state.lock:
+                status, body = server.state.handle(op, args)
+        self.wfile.write(f"{status}\n{body}{END}".encode("utf-8"))
+
+    @staticmethod
+    def _refuse(tag: str, op: str) -> Optional[Response]:
+        """The 111 answer for clients of another protocol or plan format."""
+        words = tag.split()
+        if words[:2] != TAG.split()[:2]:
+            if words[:1] == ["relay-daemon"] and op == "stop":
+                return None
+            return UNAVAILABLE, f"relay daemon: speaks {TAG}, not {tag}; restart it\n"
+        # ping too, so that `relay daemon start` notices a daemon left over
+        # from before an upgrade.
+        if op in ("plan", "ping") and words[2:] != [str(PLAN_FORMAT)]:
+            return UNAVAILABLE, f"relay daemon: compiles plan format {PLAN_FORMAT}, not {' '.join(words[2:])}; restart it\n"
+        return None
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, state: RelayState) -> None:
+        self.state = state
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+
+def query(socket_path: str, request: Sequence[str], timeout: float = 2.0) -> Optional[Response]:
+    """Send one request; ``None`` when nothing is listening on ``socket_path``.
+
+    A reply without the end line comes from a daemon of an older protocol (or
+    was cut short) and reads as UNAVAILABLE.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(socket_path)
+        conn.sendall((json.dumps([TAG, *request]) + "\n").encode("utf-8"))
+        chunks = []
+        while True:
+            chunk = conn.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return None
+    finally:
+        conn.close()
+    head, _, body = b"".join(chunks).partition(b"\n")
+    if not body.endswith(END.encode("utf-8")):
+        return UNAVAILABLE, "relay daemon: answered in an older protocol; restart it\n"
+    try:
+        return int(head), body[: -len(END)].decode("utf-8", "replace")
+    except ValueError:
+        return UNAVAILABLE, ""
+
+
+def serve(socket_path: str, kits_dir: str, personas_dir: str) -> int:
+    if os.path.exists(socket_path):
+        if query(socket_path, [kits_dir, personas_dir, "ping"]) is not None:
+            print(f"relay daemon already running on {socket_path}", file=sys.stderr)
+            return 1
+        os.unlink(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    server = DaemonServer(socket_path, RelayState(kits_dir, personas_dir))
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+    return 0
+
+
+def start(socket_path: str, kits_dir: str, personas_dir: str, log_path: str) -> int:
+    ping = [kits_dir, personas_dir, "ping"]
+    answer = query(socket_path, ping)
+    if answer is not None:
+        if answer[0] == UNAVAILABLE and answer[1]:
+            print(answer[1].rstrip("\n"), file=sys.stderr)
+            return 1
+        print(f"relay daemon already running on {socket_path}")
+        return 0
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "relay_daemon",
+                "--socket",
+                socket_path,
+                "--kits-dir",
+                kits_dir,
+                "--personas-dir",
+                personas_dir,
+                "serve",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+            close_fds=True,
+        )
+    deadline = time.monotonic() + _START_TIMEOUT
+    while time.monotonic() < deadline:
+        answer = query(socket_path, ping)
+        if answer is not None and answer[0] == 0:
+            print(f"relay daemon started on {socket_path}")
+            return 0
+        time.sleep(0.05)
+    print(f"relay daemon did not start; see {log_path}", file=sys.stderr)
+    return 1
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="relay daemon", description="Relay query daemon")
+    parser.add_argument("--socket", default="")
+    parser.add_argument("--kits-dir", default="")
+    parser.add_argument("--personas-dir", default="")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("serve", help="Run in the foreground")
+    st = sub.add_parser("start", help="Start in the background")
+    st.add_argument("--log", required=True)
+    sub.add_parser("stop", help="Stop a running daemon")
+    sub.add_parser("status", help="Report whether a daemon is running")
+    q = sub.add_parser("query", help="Send one request and print the answer")
+    q.add_argument("request", nargs="+")
+    prev = sub.add_parser("persona-preview", help="Render a persona preview without a daemon")
+    prev.add_argument("path")
+    prev.add_argument("--show-secrets", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "persona-preview":
+        try:
+            data = load_path(args.path) or {}
+        except TomlMissingError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        print("\n".join(persona_preview_lines(data, args.show_secrets)))
+        return 0
+    if not (args.socket and args.kits_dir and args.personas_dir):
+        parser.error("--socket, --kits-dir and --personas-dir are required")
+    kits_dir = os.path.abspath(args.kits_dir).rstrip("/") or "/"
+    personas_dir = os.path.abspath(args.personas_dir).rstrip("/") or "/"
+    if args.command == "serve":
+        return serve(args.socket, kits_dir, personas_dir)
+    if args.command == "start":
+        return start(args.socket, kits_dir, personas_dir, args.log)
+
+    op = {"stop": ["stop"], "status": ["stats"]}.get(args.command) or args.request
+    answer = query(args.socket, [kits_dir, personas_dir, *op])
+    if answer is None:
+        if args.command == "stop":
+            print("relay daemon is not running")
+            return 0
+        print("relay daemon is not running", file=sys.stderr)
+        return 1
+    status, body = answer
+    if args.command == "stop" and status == 0:
+        deadline = time.monotonic() + _START_TIMEOUT
+        while os.path.exists(args.socket) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    if status == UNAVAILABLE:
+        print(body.rstrip("\n") or f"relay daemon on {args.socket} serves other directories", file=sys.stderr)
+        return 1
+    if args.command == "status" and status == 0:
+        print(f"relay daemon running on {args.socket}")
+    try:
+        (sys.stdout if status == 0 else sys.stderr).write(body)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        sys.stderr.close()
+    return status
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+# shellcheck shell=sh
+# Client side of `relay daemon` (lib/relay_daemon.py), sourced by the Relay
+# entrypoints. relay_daemon_query prints the daemon's answer and returns its
+# status, or returns 111 without printing anything when no daemon serves these
+# directories; callers then compute the answer themselves. With no socket
+# present the check is a single `test -S`, so the fallback costs nothing.
+#
+# With socat installed a query costs one socat process; otherwise a
+# `python3 -S` client sends it. Every request starts with
+# "relay-daemon <protocol> <plan format>": a daemon started by other code
+# answers 111 instead of serving answers in a shape this code does not read.
+
+# Bump with PROTOCOL in relay_daemon.py whenever requests or replies change.
+RELAY_DAEMON_PROTOCOL=2
+# Every reply ends with this line; a reply without it was cut short.
+RELAY_DAEMON_END='relay-daemon: end'
+
+RELAY_DAEMON_CLIENT='
+import json, os, socket, sys
+args = sys.argv[1:]
+conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+conn.settimeout(float(os.environ.get("RELAY_DAEMON_TIMEOUT") or 2))
+request = [args[1], os.path.abspath(args[2]), os.path.abspath(args[3])] + args[4:]
+chunks = []
+try:
+    conn.connect(args[0])
+    conn.sendall((json.dumps(request) + "\n").encode("utf-8", "surrogateescape"))
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+except OSError:
+    sys.exit(111)
+head, _, body = b"".join(chunks).partition(b"\n")
+end = b"relay-daemon: end\n"
+if not body.endswith(end):
+    sys.exit(111)
+try:
+    status = int(head)
+except ValueError:
+    sys.exit(111)
+if status == 111:
+    sys.exit(111)
+(sys.stdout if status == 0 else sys.stderr).buffer.write(body[: -len(end)])
+sys.exit(status)
+'
+
+relay_daemon_socket_path() {
+  printf '%s\n' "${RELAY_DAEMON_SOCKET:-${RELAY_STATE_DIR:-${XDG_STATE_HOME:-$HOME/.local/state}/relay}/daemon.sock}"
+}
+
+# Append $1 to RDQ_REQUEST as a JSON string. Control characters are left to
+# the python client (return 1).
+relay_daemon_json_append() {
+  rdj_rest=$1
+  case "$rdj_rest" in
+    *[[:cntrl:]]*) return 1 ;;
+  esac
+  rdj_out=""
+  while :; do
+    case "$rdj_rest" in
+      *[\\\"]*)
+        rdj_head=${rdj_rest%%[\\\"]*}
+        rdj_rest=${rdj_rest#"$rdj_head"}
+        rdj_out="$rdj_out$rdj_head\\${rdj_rest%"${rdj_rest#?}"}"
+        rdj_rest=${rdj_rest#?}
+        ;;
+      *)
+        rdj_out=$rdj_out$rdj_rest
+        break
+        ;;
+    esac
+  done
+  RDQ_REQUEST="$RDQ_REQUEST${RDQ_REQUEST:+,}\"$rdj_out\""
+}
+
+# Encode the request (tag, kits dir, personas dir, op, args...) into
+# RDQ_REQUEST, a JSON array; returns 1 when only python can encode it. The
+# daemon makes the directories absolute; relative ones are taken from $PWD.
+relay_daemon_request_var() {
+  RDQ_REQUEST=""
+  relay_daemon_json_append "$1" || return 1
+  shift
+  for rdq_dir in "$1" "$2"; do
+    case "$rdq_dir" in
+      /*) ;;
+      *) rdq_dir="$PWD/$rdq_dir" ;;
+    esac
+    relay_daemon_json_append "$rdq_dir" || return 1
+  done
+  shift 2
+  for rdq_arg in "$@"; do
+    relay_daemon_json_append "$rdq_arg" || return 1
+  done
+  RDQ_REQUEST="[$RDQ_REQUEST]"
+}
+
+# Send RDQ_REQUEST to socket $1 through socat and print the answer as the
+# python client does.
+relay_daemon_socat() {
+  # The trailing x keeps the reply's final newlines through $(...).
+  rdq_reply=$(socat -t "${RELAY_DAEMON_TIMEOUT:-2}" - "UNIX-CONNECT:$1" 2>/dev/null <<EOF
+$RDQ_REQUEST
+EOF
+  echo x)
+  rdq_reply=${rdq_reply%x}
+  rdq_body=${rdq_reply#*"
+"}
+  rdq_status=${rdq_reply%%"
+"*}
+  case "$rdq_body" in
+    *"$RELAY_DAEMON_END
+") rdq_body=${rdq_body%"$RELAY_DAEMON_END
+"}
+      ;;
+    *) return 111 ;;
+  esac
+  case "$rdq_status" in
+    ''|*[!0-9]*|111) return 111 ;;
+  esac
+  if [ "$rdq_status" -eq 0 ]; then
+    printf '%s' "$rdq_body"
+  else
+    printf '%s' "$rdq_body" >&2
+  fi
+  return "$rdq_status"
+}
+
+# Whether a query costs one socat process rather than a python3 start. Callers
+# that answer in shell about as fast as python3 starts ask the daemon only then.
+relay_daemon_quick() {
+  command -v socat >/dev/null 2>&1
+}
+
+relay_daemon_query() {
+  [ "${RELAY_DAEMON_DISABLE:-0}" != "1" ] || return 111
+  rdq_socket=${RELAY_DAEMON_SOCKET:-${RELAY_STATE_DIR:-${XDG_STATE_HOME:-$HOME/.local/state}/relay}/daemon.sock}
+  [ -S "$rdq_socket" ] || return 111
+  # PLAN_FORMAT is set by relay-kit; other callers never ask for plans.
+  rdq_tag="relay-daemon $RELAY_DAEMON_PROTOCOL ${PLAN_FORMAT:-0}"
+  if command -v socat >/dev/null 2>&1 && relay_daemon_request_var "$rdq_tag" \
+    "${RELAY_KITS_DIR:-$HOME/.local/share/relay/kits}" \
+    "${RELAY_PERSONAS_DIR:-$HOME/.local/share/relay/personas}" "$@"; then
+    relay_daemon_socat "$rdq_socket"
+    return
+  fi
+  command -v python3 >/dev/null 2>&1 || return 111
+  python3 -S -c "$RELAY_DAEMON_CLIENT" "$rdq_socket" "$rdq_tag" \
+    "${RELAY_KITS_DIR:-$HOME/.local/share/relay/kits}" \
+    "${RELAY_PERSONAS_DIR:-$HOME/.local/share/relay/personas}" "$@"
+}
@@ -0,0 +1,101 @@
+"""Read event log records newest first, a block at a time from the end.
+
+``reverse_lines`` walks a log file backwards from its end, or from an earlier
+offset, reading ``BLOCK`` bytes at a time.  The newest ``n`` records cost
+reads in proportion to ``n`` however long the log has grown, and memory stays
+at one block plus the longest line.  Every line comes with its offset; handing
+the oldest offset seen back as ``end`` carries on further back, so callers
+page through history lazily.  An unterminated last line (a write still in
+flight) is skipped, as the index skips it.
+
+``parse_line`` is the record parser every reader shares: JSON lines and the
+``type|ts|message`` lines of older releases.  ``relay_events.awk`` applies the
+same rules for the shell fallbacks that run without python3, and
+``tests/event_reader.sh`` holds the two to the same output.
+"""
+from __future__ import annotations
+
+import json
+from typing import Dict, Iterator, Optional, Tuple
+
+BLOCK = 1 << 16
+
+
+def parse_line(line: str) -> Optional[Dict]:
+    """Parse a JSONL record or a legacy ``type|ts|message`` line."""
+    raw = line.rstrip("\r\n")
+    if not raw.strip():
+        return None
+    if raw.startswith("{"):
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            try:
+                ts = int(value.get("ts") or 0)
+            except (TypeError, ValueError):
+                ts = 0
+            value["ts"] = ts
+            value["type"] = str(value.get("type") or "")
+            value["message"] = str(value.get("message") or "")
+            return value
+    parts = raw.split("|", 2)
+    ts_text = parts[1] if len(parts) > 1 else ""
+    return {
+        "ts": int(ts_text) if ts_text.isdigit() else 0,
+        "type": parts[0],
+        "message": parts[2] if len(parts) > 2 else "",
+    }
+
+
+def reverse_lines(path: str, end: Optional[int] = None, block: int = BLOCK) -> Iterator[Tuple[int, bytes]]:
+    """Yield ``(offset, line)`` for the complete lines before ``end``, last first.
+
+    ``line`` excludes its newline.  A missing file yields nothing, and so does
+    the part of a file truncated while it is being read.
+    """
+    try:
+        log = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with log:
+        size = log.seek(0, 2)
+        position = size if end is None else min(end, size)
+        buffer = b""
+        anchored = False
+        while position > 0:
+            step = min(block, position)
+            position -= step
+            log.seek(position)
+            chunk = log.read(step)
+            if len(chunk) < step:
+                return
+            buffer = chunk + buffer
+            if not anchored:
+                last = buffer.rfind(b"\n")
+                if last < 0:
+                    buffer = b""
+                    continue
+                buffer = buffer[: last + 1]
+                anchored = True
+            # buffer[:stop] ends with the newline of the next line to yield.
+            stop = len(buffer)
+            while True:
+                start = buffer.rfind(b"\n", 0, stop - 1) + 1
+                if not start:
+                    break
+                yield position + start, buffer[start : stop - 1]
+                stop = start
+            buffer = buffer[:stop]
+        if buffer:
+            yield 0, buffer[:-1]
+
+
+def reverse_records(path: str, end: Optional[int] = None) -> Iterator[Tuple[int, str, Dict]]:
+    """Yield ``(offset, raw, record)`` newest first, skipping blank lines."""
+    for offset, line in reverse_lines(path, end):
+        raw = line.decode("utf-8", "replace").rstrip("\r\n")
+        record = parse_line(raw)
+        if record is not None:
+            yield offset, raw, record
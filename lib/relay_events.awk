@@ -0,0 +1,267 @@
+# relay_events.awk: the event record parser for shells without python3.
+#
+# It applies the rules of relay_event_reader.parse_line: JSON lines
+# ({"ts":..,"type":..,"message":..}) and the type|ts|message lines of older
+# releases, whose message keeps any further "|". A line that starts with "{"
+# but is not a JSON object is read the legacy way, as python falls back to.
+# tests/event_reader.sh holds both parsers to the same output.
+#
+# Run it with LC_ALL=C, so strings are bytes and \u escapes come out as UTF-8:
+#   LC_ALL=C awk -v mode=rows -v limit=N -v zone="$(date +%z)" -f relay_events.awk LOG
+# mode=rows (the default) prints the newest `limit` events (all when 0) as the
+# n<TAB>type<TAB>time<TAB>message<TAB>raw rows of `relay events rows`, newest
+# first, and exits 1 when there are none. mode=legacy prints every event as
+# the type|ts|message lines of `relay events show`. `zone` is the +hhmm UTC
+# offset times are shown in; python uses the offset in force at each event,
+# so the two differ only for events on the other side of a DST change.
+
+BEGIN {
+  tab = "\t"
+  if (mode == "") mode = "rows"
+  limit += 0
+  J_ESCAPES = "\"\\/bfnrt"
+  split("\"|\\|/|\b|\f|\n|\r|\t", J_DECODED, "|")
+  # Quotes, backslashes and the control characters JSON strings may not hold.
+  J_SPECIAL = sprintf("[\"\\\\%c-%c]", 1, 31)
+  tz = 0
+  if (zone ~ /^[-+][0-9][0-9][0-9][0-9]$/) {
+    tz = substr(zone, 2, 2) * 3600 + substr(zone, 4, 2) * 60
+    if (substr(zone, 1, 1) == "-") tz = -tz
+  }
+}
+
+function j_ws() {
+  while (J_POS <= J_LEN && index(" \t\n\r", substr(J_TEXT, J_POS, 1))) J_POS++
+}
+
+function j_hex(text,   i, value) {
+  value = 0
+  for (i = 1; i <= 4; i++) value = value * 16 + index("0123456789abcdef", tolower(substr(text, i, 1))) - 1
+  return value
+}
+
+function j_utf8(code) {
+  if (code < 128) return sprintf("%c", code)
+  if (code < 2048) return sprintf("%c%c", 192 + int(code / 64), 128 + code % 64)
+  if (code < 65536) return sprintf("%c%c%c", 224 + int(code / 4096), 128 + int(code / 64) % 64, 128 + code % 64)
+  return sprintf("%c%c%c%c", 240 + int(code / 262144), 128 + int(code / 4096) % 64, 128 + int(code / 64) % 64, 128 + code % 64)
+}
+
+# J_POS is at an opening quote: decode the string into J_STR.
+function j_string(   out, rest, c, code, low) {
+  out = ""
+  J_POS++
+  while (1) {
+    rest = substr(J_TEXT, J_POS)
+    if (!match(rest, J_SPECIAL)) return 0
+    out = out substr(rest, 1, RSTART - 1)
+    J_POS += RSTART - 1
+    c = substr(J_TEXT, J_POS, 1)
+    if (c == "\"") {
+      J_POS++
+      J_STR = out
+      return 1
+    }
+    if (c != "\\") return 0
+    c = substr(J_TEXT, J_POS + 1, 1)
+    if (c == "u") {
+      if (substr(J_TEXT, J_POS + 2, 4) !~ /^[0-9A-Fa-f][0-9A-Fa-f][0-9A-Fa-f][0-9A-Fa-f]$/) return 0
+      code = j_hex(substr(J_TEXT, J_POS + 2, 4))
+      J_POS += 6
+      if (code >= 55296 && code < 56320 && substr(J_TEXT, J_POS, 2) == "\\u" \
+          && substr(J_TEXT, J_POS + 2, 4) ~ /^[dD][c-fC-F][0-9A-Fa-f][0-9A-Fa-f]$/) {
+        low = j_hex(substr(J_TEXT, J_POS + 2, 4))
+        code = 65536 + (code - 55296) * 1024 + low - 56320
+        J_POS += 6
+      } else if (code >= 55296 && code < 57344) {
+        code = 65533
+      }
+      out = out j_utf8(code)
+      continue
+    }
+    if (!index(J_ESCAPES, c) || c == "") return 0
+    out = out J_DECODED[index(J_ESCAPES, c)]
+    J_POS += 2
+  }
+}
+
+# Parse one JSON value at J_POS; J_KIND and J_STR describe it. The members
+# of the outermost object (depth 1) are kept in J_FIELD and J_FIELD_KIND.
+function j_value(depth,   c, rest, ok) {
+  j_ws()
+  c = substr(J_TEXT, J_POS, 1)
+  if (c == "\"") {
+    J_KIND = "string"
+    return j_string()
+  }
+  if (c == "{" || c == "[") {
+    ok = c == "{" ? j_object(depth + 1) : j_array(depth + 1)
+    J_KIND = "container"
+    J_STR = ""
+    return ok
+  }
+  rest = substr(J_TEXT, J_POS)
+  if (match(rest, /^-?(0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?/)) {
+    J_STR = substr(rest, 1, RLENGTH)
+    J_KIND = J_STR ~ /^-?[0-9]+$/ ? "int" : "number"
+    J_POS += RLENGTH
+    return 1
+  }
+  if (substr(rest, 1, 4) == "true" || substr(rest, 1, 4) == "null") {
+    J_KIND = substr(rest, 1, 4)
+    J_STR = ""
+    J_POS += 4
+    return 1
+  }
+  if (substr(rest, 1, 5) == "false") {
+    J_KIND = "false"
+    J_STR = ""
+    J_POS += 5
+    return 1
+  }
+  return 0
+}
+
+function j_object(depth,   key, c) {
+  J_POS++
+  j_ws()
+  if (substr(J_TEXT, J_POS, 1) == "}") {
+    J_POS++
+    return 1
+  }
+  while (1) {
+    j_ws()
+    if (substr(J_TEXT, J_POS, 1) != "\"" || !j_string()) return 0
+    key = J_STR
+    j_ws()
+    if (substr(J_TEXT, J_POS, 1) != ":") return 0
+    J_POS++
+    if (!j_value(depth)) return 0
+    if (depth == 1) {
+      J_FIELD[key] = J_STR
+      J_FIELD_KIND[key] = J_KIND
+    }
+    j_ws()
+    c = substr(J_TEXT, J_POS, 1)
+    J_POS++
+    if (c == "}") return 1
+    if (c != ",") return 0
+  }
+}
+
+function j_array(depth,   c) {
+  J_POS++
+  j_ws()
+  if (substr(J_TEXT, J_POS, 1) == "]") {
+    J_POS++
+    return 1
+  }
+  while (1) {
+    if (!j_value(depth)) return 0
+    j_ws()
+    c = substr(J_TEXT, J_POS, 1)
+    J_POS++
+    if (c == "]") return 1
+    if (c != ",") return 0
+  }
+}
+
+# str(value or "") for the members parse_line reads as text.
+function j_text(key,   kind) {
+  kind = J_FIELD_KIND[key]
+  if (kind == "string") return J_FIELD[key]
+  if (kind == "int") return J_FIELD[key] ~ /^-?0$/ ? "" : J_FIELD[key]
+  if (kind == "true") return "True"
+  return ""
+}
+
+# int(value or 0) for the ts member.
+function j_ts(   kind, value) {
+  kind = J_FIELD_KIND["ts"]
+  value = J_FIELD["ts"]
+  if (kind == "int" || kind == "number") return int(value)
+  if (kind == "true") return 1
+  if (kind == "string" && value ~ /^[ \t\n\r\f\v]*[-+]?[0-9]+[ \t\n\r\f\v]*$/) return int(value)
+  return 0
+}
+
+# Parse `line` into R_RAW, R_TYPE, R_TS and R_MESSAGE; 0 for a blank line.
+function parse_record(line,   rest, cut) {
+  sub(/[\r\n]+$/, "", line)
+  if (line ~ /^[ \t\n\r\f\v]*$/) return 0
+  R_RAW = line
+  if (substr(line, 1, 1) == "{") {
+    split("", J_FIELD)
+    split("", J_FIELD_KIND)
+    J_TEXT = line
+    J_LEN = length(line)
+    J_POS = 1
+    if (j_object(1)) {
+      j_ws()
+      if (J_POS > J_LEN) {
+        R_TYPE = j_text("type")
+        R_TS = j_ts()
+        R_MESSAGE = j_text("message")
+        return 1
+      }
+    }
+  }
+  cut = index(line, "|")
+  if (!cut) {
+    R_TYPE = line
+    R_TS = 0
+    R_MESSAGE = ""
+    return 1
+  }
+  R_TYPE = substr(line, 1, cut - 1)
+  rest = substr(line, cut + 1)
+  cut = index(rest, "|")
+  R_TS = cut ? substr(rest, 1, cut - 1) : rest
+  R_TS = R_TS ~ /^[0-9]+$/ ? R_TS + 0 : 0
+  R_MESSAGE = cut ? substr(rest, cut + 1) : ""
+  return 1
+}
+
+function single_line(text) {
+  gsub(/[\t\r\n]/, " ", text)
+  return text
+}
+
+# The local time format_ts prints, from the days-to-civil algorithm.
+function format_ts(ts,   days, secs, z, era, doe, yoe, y, doy, mp, d, m) {
+  ts += tz
+  days = int(ts / 86400)
+  secs = ts - days * 86400
+  if (secs < 0) {
+    secs += 86400
+    days--
+  }
+  z = days + 719468
+  era = int((z >= 0 ? z : z - 146096) / 146097)
+  doe = z - era * 146097
+  yoe = int((doe - int(doe / 1460) + int(doe / 36524) - int(doe / 146096)) / 365)
+  y = yoe + era * 400
+  doy = doe - (365 * yoe + int(yoe / 4) - int(yoe / 100))
+  mp = int((5 * doy + 2) / 153)
+  d = doy - int((153 * mp + 2) / 5) + 1
+  m = mp < 10 ? mp + 3 : mp - 9
+  if (m <= 2) y++
+  return sprintf("%04d-%02d-%02d %02d:%02d:%02d", y, m, d, int(secs / 3600), int(secs % 3600 / 60), secs % 60)
+}
+
+{
+  if (!parse_record($0)) next
+  if (mode == "legacy") {
+    printf "%s|%d%s\n", R_TYPE, R_TS, R_MESSAGE == "" ? "" : "|" R_MESSAGE
+    next
+  }
+  rows[++n] = single_line(R_TYPE) tab format_ts(R_TS) tab single_line(R_MESSAGE) tab single_line(R_RAW)
+  if (limit > 0 && n > limit) delete rows[n - limit]
+}
+
+END {
+  if (mode == "legacy") exit 0
+  if (!n) exit 1
+  last = limit > 0 && n > limit ? n - limit + 1 : 1
+  for (i = n; i >= last; i--) print (n - i + 1) tab rows[i]
+}
@@ -0,0 +1,1022 @@
+"""Structured event store behind ``relay events``.
+
+Events are JSON lines appended to the active log (``events.log``).  When the
+log grows past a size or age limit it is rotated into numbered segments under
+``events.d/`` whose names carry the time range they cover.  Every log file has
+a sidecar ``.idx`` made of fixed-width ``(offset, ts, crc32(type))`` entries so
+readers can bisect on time, filter on type and fetch the newest records by
+seeking instead of parsing the whole history.  Indexes are caught up lazily
+from the last indexed offset, which keeps ``emit`` a plain append.  Queries
+for just the newest records skip the index and read the files backwards
+(``relay_event_reader``), stopping as soon as they have enough.
+
+``events.d/rollup.json`` holds per-day and per-hour counts broken down by
+type, persona and kit.  It is folded forward from a per-file cursor, so
+``relay events stats`` costs time in proportion to the number of buckets.
+
+Every record reaches the log in a single ``write(2)`` on an ``O_APPEND``
+descriptor, so records from concurrent writers never interleave.  The shell
+fast path in ``relay-events`` only writes records short enough for one write
+and hands longer ones (and ``emit --stdin`` batches) to :func:`append_records`.
+
+:class:`Follower` streams records as they are appended, across rotations,
+and can persist a named cursor under ``events.d/cursors/`` to resume from.
+
+Lines written by older Relay releases (``type|ts|message``) are still read.
+"""
+from __future__ import annotations
+
+import contextlib
+import datetime as _dt
+import fcntl
+import itertools
+import json
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from relay_event_reader import parse_line, reverse_records
+
+_INDEX_MAGIC = b"RLYEIDX1"
+_HEADER = struct.Struct("<8sQQ")
+_ENTRY = struct.Struct("<QqI")
+_SEGMENT_RE = re.compile(r"^seg-(\d{6})-(\d+)-(\d+)\.jsonl$")
+_ACTIVE_INDEX = "active.idx"
+_LOCK_NAME = ".lock"
+_ROLLUP_NAME = "rollup.json"
+_ROLLUP_VERSION = 1
+_HOUR_RETENTION = 30 * 86400
+_HEAD_BYTES = 256
+_CURSOR_DIR = "cursors"
+_CURSOR_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+STATS_DIMENSIONS = ("type", "day", "hour", "persona", "kit")
+# Concurrent writers stamp records before appending, so timestamps are only
+# roughly ordered; bisecting this far back keeps --since exact.
+_TS_SLACK = 5
+_READ_CHUNK = 1 << 16
+_WRITE_CHUNK = 1 << 16
+
+Entry = Tuple[int, int, int]
+
+
+def type_key(event_type: str) -> int:
+    return zlib.crc32(event_type.encode("utf-8")) & 0xFFFFFFFF
+
+
+def segments_dir(log_path: str) -> str:
+    base = log_path[:-4] if log_path.endswith(".log") else log_path
+    return base + ".d"
+
+
+def encode_record(
+    event_type: str,
+    message: str = "",
+    *,
+    ts: Optional[int] = None,
+    persona: str = "",
+    kit: str = "",
+    data: Optional[Dict] = None,
+) -> str:
+    """Return one JSONL record; ``relay-events`` builds the same shape in sh."""
+    record: Dict[str, object] = {
+        "ts": int(time.time()) if ts is None else int(ts),
+        "type": event_type,
+        "message": message,
+    }
+    if persona:
+        record["persona"] = persona
+    if kit:
+        record["kit"] = kit
+    if data:
+        record["data"] = data
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def append_records(log_path: str, records: Iterable[str]) -> int:
+    """Append encoded records, batching whole records into each write."""
+    fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    count = 0
+    buffer = bytearray()
+    try:
+        for record in records:
+            line = record.encode("utf-8") + b"\n"
+            if buffer and len(buffer) + len(line) > _WRITE_CHUNK:
+                _write_all(fd, buffer)
+                buffer.clear()
+            buffer += line
+            count += 1
+        if buffer:
+            _write_all(fd, buffer)
+    finally:
+        os.close(fd)
+    return count
+
+
+def _write_all(fd: int, buffer: bytearray) -> None:
+    view = memoryview(buffer)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _decode_data(value) -> Optional[Dict]:
+    if value in (None, "", {}):
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError as exc:
+            raise ValueError(f"data is not valid JSON: {exc}") from None
+    if not isinstance(value, dict):
+        raise ValueError("data must be a JSON object")
+    return value
+
+
+def batch_record(line: str, *, event_type: str = "", persona: str = "", kit: str = "", ts: int = 0) -> Optional[str]:
+    """Encode one ``emit --stdin`` line: a JSON event or ``type message`` text.
+
+    ``event_type`` turns every plain line into a message of that type;
+    ``persona``/``kit``/``ts`` fill fields a JSON event leaves out.
+    """
+    text = line.strip()
+    if not text:
+        return None
+    if text.startswith("{"):
+        try:
+            value = json.loads(text)
+        except ValueError as exc:
+            raise ValueError(f"invalid JSON: {exc}") from None
+        if not isinstance(value, dict):
+            raise ValueError("expected a JSON object")
+        kind = str(value.get("type") or event_type)
+        if not kind:
+            raise ValueError("event type required")
+        try:
+            stamp = int(value.get("ts") or ts or time.time())
+        except (TypeError, ValueError):
+            raise ValueError("ts must be epoch seconds") from None
+        return encode_record(
+            kind,
+            str(value.get("message") or ""),
+            ts=stamp,
+            persona=str(value.get("persona") or persona),
+            kit=str(value.get("kit") or kit),
+            data=_decode_data(value.get("data")),
+        )
+    if event_type:
+        kind, message = event_type, text
+    else:
+        parts = text.split(None, 1)
+        kind, message = parts[0], parts[1] if len(parts) > 1 else ""
+    return encode_record(kind, message, ts=ts or int(time.time()), persona=persona, kit=kit)
+
+
+def legacy_line(record: Dict) -> str:
+    head = f"{record['type']}|{record['ts']}"
+    message = record.get("message") or ""
+    return f"{head}|{message}" if message else head
+
+
+def format_ts(ts: int) -> str:
+    try:
+        return _dt.datetime.fromtimestamp(int(ts)).strftime("%Y-%m-%d %H:%M:%S")
+    except (OverflowError, OSError, ValueError):
+        return str(ts)
+
+
+def parse_time(value: str, now: Optional[float] = None) -> int:
+    """Accept epoch seconds, ``30m``/``6h``/``7d``/``2w`` ago, or ISO dates."""
+    text = value.strip()
+    if text.isdigit():
+        return int(text)
+    match = re.fullmatch(r"(\d+)\s*([smhdw])", text)
+    if match:
+        unit = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+        current = time.time() if now is None else now
+        return int(current) - int(match.group(1)) * unit
+    try:
+        stamp = _dt.datetime.fromisoformat(text.replace(" ", "T", 1))
+    except ValueError:
+        raise ValueError(f"unrecognised time: {value!r}") from None
+    return int(stamp.timestamp())
+
+
+class _LogFile:
+    """A log file (active or segment) paired with its sidecar index."""
+
+    def __init__(self, path: str, index_path: str, first_ts: int = 0, last_ts: int = 0):
+        self.path = path
+        self.index_path = index_path
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+        self._entries: Optional[bytes] = None
+
+    def sync(self) -> None:
+        """Index records appended since the last sync; rebuild if the log was replaced."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._entries = b""
+            return
+        try:
+            fd = os.open(self.index_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            self._entries = self._scan(st.st_size)
+            return
+        with os.fdopen(fd, "r+b") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            header = handle.read(_HEADER.size)
+            indexed_end = 0
+            if len(header) == _HEADER.size:
+                magic, inode, indexed_end = _HEADER.unpack(header)
+                if magic != _INDEX_MAGIC or inode != st.st_ino or indexed_end > st.st_size:
+                    indexed_end = -1
+            else:
+                indexed_end = -1
+            if indexed_end < 0:
+                handle.seek(0)
+                handle.truncate()
+                handle.write(_HEADER.pack(_INDEX_MAGIC, st.st_ino, 0))
+                indexed_end = 0
+            if indexed_end < st.st_size:
+                entries, indexed_end = self._index_from(indexed_end, st.st_size)
+                handle.seek(0, os.SEEK_END)
+                handle.write(entries)
+                handle.seek(0)
+                handle.write(_HEADER.pack(_INDEX_MAGIC, st.st_ino, indexed_end))
+            handle.seek(_HEADER.size)
+            self._entries = handle.read()
+
+    def _scan(self, size: int) -> bytes:
+        entries, _ = self._index_from(0, size)
+        return entries
+
+    def lines(self, start: int, size: int) -> Iterator[Tuple[int, int, Dict]]:
+        """Yield ``(offset, end, record)`` for complete lines in ``[start, size)``."""
+        offset = start
+        with open(self.path, "rb") as log:
+            log.seek(start)
+            pending = b""
+            while offset + len(pending) < size:
+                chunk = log.read(min(_READ_CHUNK, size - offset - len(pending)))
+                if not chunk:
+                    break
+                pending += chunk
+                lines = pending.split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    end = offset + len(line) + 1
+                    record = parse_line(line.decode("utf-8", "replace"))
+                    if record is not None:
+                        yield offset, end, record
+                    offset = end
+
+    def _index_from(self, start: int, size: int) -> Tuple[bytes, int]:
+        out = bytearray()
+        end = start
+        for offset, end, record in self.lines(start, size):
+            out += _ENTRY.pack(offset, record["ts"], type_key(record["type"]))
+        return bytes(out), end
+
+    def entries(self) -> Sequence[Entry]:
+        if self._entries is None:
+            self.sync()
+        return _EntryView(self._entries or b"")
+
+    def read(self, offsets: Sequence[int]) -> Iterator[Tuple[str, Dict]]:
+        with open(self.path, "rb") as log:
+            for offset in offsets:
+                log.seek(offset)
+                raw = log.readline().decode("utf-8", "replace").rstrip("\r\n")
+                record = parse_line(raw)
+                if record is not None:
+                    yield raw, record
+
+
+class _EntryView(Sequence):
+    """Random access over packed index entries without unpacking them all."""
+
+    def __init__(self, blob: bytes):
+        self._blob = blob
+        self._count = len(blob) // _ENTRY.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return _ENTRY.unpack_from(self._blob, index * _ENTRY.size)
+
+    def bisect_ts(self, ts: int) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid][1] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class EventStore:
+    """The active log plus its rotated segments, oldest first."""
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.seg_dir = segments_dir(log_path)
+
+    def files(self) -> List[_LogFile]:
+        result: List[_LogFile] = []
+        try:
+            names = sorted(os.listdir(self.seg_dir))
+        except OSError:
+            names = []
+        for name in names:
+            match = _SEGMENT_RE.match(name)
+            if not match:
+                continue
+            path = os.path.join(self.seg_dir, name)
+            result.append(
+                _LogFile(path, path[: -len(".jsonl")] + ".idx", int(match.group(2)), int(match.group(3)))
+            )
+        result.append(_LogFile(self.log_path, os.path.join(self.seg_dir, _ACTIVE_INDEX)))
+        return result
+
+    def _ensure_dir(self) -> bool:
+        try:
+            os.makedirs(self.seg_dir, exist_ok=True)
+        except OSError:
+            return False
+        return True
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialise rotation and rollup updates across processes."""
+        with open(os.path.join(self.seg_dir, _LOCK_NAME), "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def query(
+        self,
+        *,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        types: Sequence[str] = (),
+        limit: int = 0,
+    ) -> List[Tuple[str, Dict]]:
+        """Return matching ``(raw, record)`` pairs, oldest first.
+
+        With ``limit`` only the newest ``limit`` matches are read from disk.
+        """
+        if limit and since is None and until is None and not types:
+            newest = list(itertools.islice(self.newest(), limit))
+            newest.reverse()
+            return newest
+        self._ensure_dir()
+        keys = {type_key(t) for t in types}
+        wanted = set(types)
+        picked: List[Tuple[_LogFile, List[int]]] = []
+        remaining = limit
+        for log in reversed(self.files()):
+            if log.last_ts and since is not None and log.last_ts + _TS_SLACK < since:
+                break
+            if log.first_ts and until is not None and log.first_ts - _TS_SLACK > until:
+                continue
+            entries = log.entries()
+            start = entries.bisect_ts(since - _TS_SLACK) if since is not None else 0
+            offsets: List[int] = []
+            for index in range(len(entries) - 1, start - 1, -1):
+                offset, ts, key = entries[index]
+                if keys and key not in keys:
+                    continue
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts > until:
+                    continue
+                offsets.append(offset)
+                if limit and len(offsets) >= remaining:
+                    break
+            if offsets:
+                offsets.reverse()
+                picked.append((log, offsets))
+                remaining -= len(offsets)
+            if limit and remaining <= 0:
+                break
+        result: List[Tuple[str, Dict]] = []
+        for log, offsets in reversed(picked):
+            for raw, record in log.read(offsets):
+                if wanted and record["type"] not in wanted:
+                    continue
+                result.append((raw, record))
+        return result
+
+    def newest(self) -> Iterator[Tuple[str, Dict]]:
+        """Yield ``(raw, record)`` newest first, reading only as far back as consumed."""
+        for log in reversed(self.files()):
+            for _offset, raw, record in reverse_records(log.path):
+                yield raw, record
+
+    def rollup(self) -> Dict:
+        """Fold events appended since the last call into the stored rollup."""
+        persist = self._ensure_dir()
+        with self._locked() if persist else contextlib.nullcontext():
+            return self._fold_rollup(persist)
+
+    def _fold_rollup(self, persist: bool = True) -> Dict:
+        path = os.path.join(self.seg_dir, _ROLLUP_NAME)
+        data = _load_rollup(path) if persist else _empty_rollup()
+        present: List[Tuple[_LogFile, str, int]] = []
+        for log in self.files():
+            try:
+                size = os.path.getsize(log.path)
+            except OSError:
+                continue
+            present.append((log, _file_key(log.path), size))
+        cursors = data["cursors"]
+        # Counts cannot be unwound, so a file that shrank under its cursor
+        # (truncated or rewritten in place) means recounting what is left.
+        if any(cursors.get(key, 0) > size for _log, key, size in present):
+            data = _empty_rollup()
+            cursors = data["cursors"]
+        changed = False
+        for log, key, size in present:
+            start = cursors.get(key, 0)
+            if start >= size:
+                continue
+            end = start
+            for _offset, end, record in log.lines(start, size):
+                _fold_record(data, record)
+            if end != start:
+                cursors[key] = end
+                changed = True
+        live = {key for _log, key, _size in present}
+        for key in [key for key in cursors if key not in live]:
+            del cursors[key]
+            changed = True
+        horizon = _bucket(time.time() - _HOUR_RETENTION, "hour")
+        for key in [key for key in data["hours"] if key < horizon]:
+            del data["hours"][key]
+            changed = True
+        if persist and changed:
+            tmp_path = f"{path}.{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        return data
+
+    def rotate(self, *, max_bytes: int = 0, max_age: int = 0, keep: int = 0, force: bool = False) -> Optional[str]:
+        """Move the active log into a new segment when it is over a limit."""
+        if not self._ensure_dir():
+            return None
+        with self._locked():
+            try:
+                size = os.path.getsize(self.log_path)
+            except OSError:
+                return None
+            if size == 0:
+                return None
+            active = self.files()[-1]
+            entries = active.entries()
+            first_ts = entries[0][1] if len(entries) else 0
+            last_ts = max((entry[1] for entry in entries), default=first_ts)
+            due = force
+            due = due or (max_bytes > 0 and size > max_bytes)
+            due = due or (max_age > 0 and first_ts > 0 and time.time() - first_ts > max_age)
+            if not due:
+                return None
+            segments = self.files()[:-1]
+            seq = 1
+            if segments:
+                seq = int(_SEGMENT_RE.match(os.path.basename(segments[-1].path)).group(1)) + 1
+            base = os.path.join(self.seg_dir, f"seg-{seq:06d}-{first_ts}-{last_ts}")
+            os.rename(self.log_path, base + ".jsonl")
+            try:
+                os.rename(active.index_path, base + ".idx")
+            except OSError:
+                pass
+            open(self.log_path, "a").close()
+            expired = self.files()[:-1][:-keep] if keep > 0 else []
+            if expired:
+                # Count events into the rollup before their segment goes away.
+                self._fold_rollup()
+                for old in expired:
+                    for path in (old.path, old.index_path):
+                        try:
+                            os.unlink(path)
+                        except OSError:
+                            pass
+            return base + ".jsonl"
+
+
+def _empty_rollup() -> Dict:
+    return {"version": _ROLLUP_VERSION, "cursors": {}, "days": {}, "hours": {}}
+
+
+def _load_rollup(path: str) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return _empty_rollup()
+    if not isinstance(data, dict) or data.get("version") != _ROLLUP_VERSION:
+        return _empty_rollup()
+    return data
+
+
+def _file_key(path: str) -> str:
+    """Identify a log across renames: its inode plus a hash of its first bytes."""
+    with open(path, "rb") as handle:
+        return _handle_key(handle.fileno())
+
+
+def _handle_key(fd: int) -> str:
+    head = os.pread(fd, _HEAD_BYTES, 0).split(b"\n", 1)[0]
+    return f"{os.fstat(fd).st_ino}:{zlib.crc32(head) & 0xFFFFFFFF:08x}"
+
+
+class Follower:
+    """Stream records appended to the store, following rotations.
+
+    Filtering happens here rather than in the consumer, and the position
+    (file identity plus byte offset) can be saved as a named cursor.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        *,
+        types: Sequence[str] = (),
+        kits: Sequence[str] = (),
+        personas: Sequence[str] = (),
+        since: Optional[int] = None,
+        cursor: str = "",
+    ):
+        self.store = store
+        self.types = set(types)
+        self.kits = set(kits)
+        self.personas = set(personas)
+        self.since = since
+        self.cursor_path = ""
+        if cursor:
+            if not _CURSOR_NAME_RE.match(cursor):
+                raise ValueError(f"invalid cursor name: {cursor!r}")
+            self.cursor_path = os.path.join(store.seg_dir, _CURSOR_DIR, cursor + ".json")
+        self._handle = None
+        self._offset = 0
+
+    def matches(self, record: Dict) -> bool:
+        if self.types and record["type"] not in self.types:
+            return False
+        if self.kits and record.get("kit") not in self.kits:
+            return False
+        if self.personas and record.get("persona") not in self.personas:
+            return False
+        return self.since is None or record["ts"] >= self.since
+
+    def _existing(self) -> List[Tuple[_LogFile, int]]:
+        result = []
+        for log in self.store.files():
+            try:
+                result.append((log, os.stat(log.path).st_ino))
+            except OSError:
+                continue
+        return result
+
+    def _open(self, path: str, offset: int) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = open(path, "rb")
+        self._offset = offset
+
+    def _start(self) -> None:
+        files = self._existing()
+        saved = self._load_cursor()
+        if saved is not None:
+            for log, _inode in files:
+                try:
+                    if _file_key(log.path) == saved.get("file"):
+                        self._open(log.path, int(saved.get("offset") or 0))
+                        return
+                except OSError:
+                    continue
+            # The saved file was pruned or cleared: replay what is left.
+            if files:
+                self._open(files[0][0].path, 0)
+                return
+        if self.since is not None:
+            for log, _inode in files:
+                if log.last_ts and log.last_ts + _TS_SLACK < self.since:
+                    continue
+                entries = log.entries()
+                start = entries.bisect_ts(self.since - _TS_SLACK)
+                if start < len(entries):
+                    self._open(log.path, entries[start][0])
+                    return
+        self._open(self.store.log_path, os.path.getsize(self.store.log_path))
+
+    def _advance(self) -> bool:
+        """Move to the next file once the current one is drained."""
+        current = os.fstat(self._handle.fileno())
+        files = self._existing()
+        inodes = [inode for _log, inode in files]
+        if current.st_ino in inodes:
+            position = inodes.index(current.st_ino)
+            if position == len(files) - 1:
+                if current.st_size < self._offset:
+                    self._offset = 0  # truncated by `relay events clear`
+                    return True
+                return False
+            self._open(files[position + 1][0].path, 0)
+            return True
+        # Our file was pruned or cleared away; carry on with the active log.
+        if files and files[-1][1] != current.st_ino:
+            self._open(files[-1][0].path, 0)
+            return True
+        return False
+
+    def poll(self) -> List[Dict]:
+        """Return matching records appended since the last poll."""
+        if self._handle is None:
+            self._start()
+        found: List[Dict] = []
+        while True:
+            self._handle.seek(self._offset)
+            chunk = self._handle.read()
+            complete = chunk.rfind(b"\n") + 1
+            for line in chunk[:complete].split(b"\n")[:-1]:
+                record = parse_line(line.decode("utf-8", "replace"))
+                if record is not None and self.matches(record):
+                    found.append(record)
+            self._offset += complete
+            if complete < len(chunk) or not self._advance():
+                break
+        self._save_cursor()
+        return found
+
+    def _load_cursor(self) -> Optional[Dict]:
+        if not self.cursor_path:
+            return None
+        try:
+            with open(self.cursor_path, "r", encoding="utf-8") as handle:
+                value = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return value if isinstance(value, dict) else None
+
+    def _save_cursor(self) -> None:
+        if not self.cursor_path or self._handle is None or self._offset == 0:
+            return
+        state = {"file": _handle_key(self._handle.fileno()), "offset": self._offset}
+        try:
+            os.makedirs(os.path.dirname(self.cursor_path), exist_ok=True)
+            tmp_path = f"{self.cursor_path}.{os.getpid()}"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(state, handle)
+            os.replace(tmp_path, self.cursor_path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def _bucket(ts: float, unit: str) -> str:
+    stamp = _dt.datetime.fromtimestamp(int(ts))
+    return stamp.strftime("%Y-%m-%d %H:00" if unit == "hour" else "%Y-%m-%d")
+
+
+def _fold_record(data: Dict, record: Dict) -> None:
+    for unit, buckets in (("day", data["days"]), ("hour", data["hours"])):
+        counts = buckets.setdefault(_bucket(record["ts"], unit), {}).setdefault(record["type"], {"n": 0})
+        counts["n"] += 1
+        for dim in ("persona", "kit"):
+            value = record.get(dim)
+            if isinstance(value, str) and value:
+                named = counts.setdefault(dim, {})
+                named[value] = named.get(value, 0) + 1
+
+
+def summarize(
+    data: Dict,
+    *,
+    dims: Sequence[str] = STATS_DIMENSIONS,
+    since: Optional[int] = None,
+    types: Sequence[str] = (),
+) -> Dict:
+    """Aggregate rollup buckets; cost depends on bucket count, not log size.
+
+    ``since`` uses hour buckets while they are retained and day buckets
+    before that, so it is exact to the hour or day respectively.
+    """
+    use_hours = since is not None and since >= time.time() - _HOUR_RETENTION
+    source = data["hours"] if use_hours else data["days"]
+    floor = _bucket(since, "hour" if use_hours else "day") if since is not None else ""
+    wanted = set(types)
+    totals: Dict[str, Dict[str, int]] = {dim: {} for dim in dims}
+    total = 0
+    for unit, buckets in (("day", data["days"]), ("hour", data["hours"])):
+        if unit in totals:
+            unit_floor = _bucket(since, unit) if since is not None else ""
+            for key, by_type in buckets.items():
+                if key < unit_floor:
+                    continue
+                count = sum(c["n"] for t, c in by_type.items() if not wanted or t in wanted)
+                if count:
+                    totals[unit][key] = count
+    for key, by_type in source.items():
+        if key < floor:
+            continue
+        for event_type, counts in by_type.items():
+            if wanted and event_type not in wanted:
+                continue
+            total += counts["n"]
+            if "type" in totals:
+                totals["type"][event_type] = totals["type"].get(event_type, 0) + counts["n"]
+            for dim in ("persona", "kit"):
+                if dim in totals:
+                    for name, count in (counts.get(dim) or {}).items():
+                        totals[dim][name] = totals[dim].get(name, 0) + count
+    result: Dict[str, object] = {"total": total, "since": since}
+    for dim in dims:
+        values = totals[dim]
+        if dim in ("day", "hour"):
+            result[dim] = dict(sorted(values.items()))
+        else:
+            result[dim] = dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+    return result
+
+
+def _stats_lines(summary: Dict, dims: Sequence[str]) -> List[str]:
+    head = f"Events: {summary['total']}"
+    if summary["since"] is not None:
+        head += f" since {format_ts(summary['since'])}"
+    lines = [head]
+    for dim in dims:
+        lines.extend(["", f"By {dim}:"])
+        values = summary[dim]
+        if not values:
+            lines.append("  (none)")
+            continue
+        width = max(len(name) for name in values)
+        lines.extend(f"  {name:<{width}}  {count:>7}" for name, count in values.items())
+    return lines
+
+
+def _detail_lines(raw: str, record: Dict) -> List[str]:
+    lines = [f"Raw: {raw}", f"Type: {record['type']}", f"Time: {format_ts(record['ts'])}", f"Seconds: {record['ts']}"]
+    for key in ("persona", "kit"):
+        if record.get(key):
+            lines.append(f"{key.capitalize()}: {record[key]}")
+    if record.get("message"):
+        lines.extend(["", "Message:", f"  {record['message']}"])
+    if record.get("data"):
+        lines.extend(["", "Data:"])
+        lines.extend("  " + line for line in json.dumps(record["data"], indent=2, ensure_ascii=False).splitlines())
+    return lines
+
+
+def row_lines(store: EventStore, limit: int, skip: int = 0) -> List[str]:
+    """Newest events first as ``n<TAB>type<TAB>time<TAB>message<TAB>raw`` rows.
+
+    ``skip`` pages further back: the rows start at event ``skip + 1``.
+    """
+    newest = itertools.islice(store.newest(), skip, skip + max(limit, 1))
+    return [
+        "\t".join(
+            [
+                str(idx),
+                _single_line(record["type"]),
+                format_ts(record["ts"]),
+                _single_line(record["message"]),
+                _single_line(raw),
+            ]
+        )
+        for idx, (raw, record) in enumerate(newest, skip + 1)
+    ]
+
+
+def detail_lines(store: EventStore, index: int) -> List[str]:
+    """Describe the ``index``-th newest event (1 is the newest)."""
+    found = next(itertools.islice(store.newest(), index - 1, None), None) if index > 0 else None
+    if found is None:
+        return ["Event no longer available (refresh)."]
+    return _detail_lines(*found)
+
+
+def detail_pages(store: EventStore, limit: int) -> List[List[str]]:
+    """``detail_lines`` for the ``limit`` newest events at once, newest first."""
+    return [_detail_lines(raw, record) for raw, record in itertools.islice(store.newest(), max(limit, 1))]
+
+
+def _history_line(record: Dict) -> str:
+    text = f"{format_ts(record['ts'])}  {record['type']:<16} {record['message']}".rstrip()
+    extras = [f"{key}={record[key]}" for key in ("persona", "kit") if record.get(key)]
+    if record.get("data"):
+        extras.append("data=" + json.dumps(record["data"], ensure_ascii=False, separators=(",", ":")))
+    if extras:
+        text += "  " + " ".join(extras)
+    return text
+
+
+def _single_line(text: str) -> str:
+    return text.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+
+def _split_types(values: Sequence[str]) -> List[str]:
+    result: List[str] = []
+    for value in values:
+        result.extend(part.strip() for part in value.split(",") if part.strip())
+    return result
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="relay events", description="Relay event store")
+    parser.add_argument("--log", required=True, help="Path to the active events.log")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    app = sub.add_parser("append", help="Append one event")
+    app.add_argument("--ts", type=int)
+    app.add_argument("--type", required=True)
+    app.add_argument("--message", default="")
+    app.add_argument("--data", default="")
+
+    ingest = sub.add_parser("ingest", help="Append events read from stdin")
+    ingest.add_argument("--type", default="")
+
+    for writer in (app, ingest):
+        writer.add_argument("--persona", default="")
+        writer.add_argument("--kit", default="")
+        writer.add_argument("--max-bytes", type=int, default=0)
+        writer.add_argument("--max-age", type=int, default=0)
+        writer.add_argument("--keep", type=int, default=0)
+
+    show = sub.add_parser("show", help="Print every event")
+    show.add_argument("--json", action="store_true")
+
+    hist = sub.add_parser("history", help="Query events by time and type")
+    hist.add_argument("--since")
+    hist.add_argument("--until")
+    hist.add_argument("--type", action="append", default=[])
+    hist.add_argument("--limit", type=int, default=0)
+    hist.add_argument("--json", action="store_true")
+
+    rows = sub.add_parser("rows", help="Newest events as TSV rows for the TUI")
+    rows.add_argument("--limit", type=int, default=100)
+    rows.add_argument("--skip", type=int, default=0, help="Start after the N newest events")
+
+    det = sub.add_parser("detail", help="Describe the Nth newest event")
+    det.add_argument("--index", type=int, required=True)
+
+    fol = sub.add_parser("follow", help="Stream new events as JSON lines")
+    fol.add_argument("--type", action="append", default=[])
+    fol.add_argument("--kit", action="append", default=[])
+    fol.add_argument("--persona", action="append", default=[])
+    fol.add_argument("--since")
+    fol.add_argument("--cursor", default="")
+    fol.add_argument("--once", action="store_true")
+    fol.add_argument("--text", action="store_true")
+    fol.add_argument("--interval", type=float, default=0.25)
+
+    stats = sub.add_parser("stats", help="Counts per type, day, hour, persona and kit")
+    stats.add_argument("--by", action="append", default=[], choices=STATS_DIMENSIONS)
+    stats.add_argument("--since")
+    stats.add_argument("--type", action="append", default=[])
+    stats.add_argument("--json", action="store_true")
+
+    rot = sub.add_parser("rotate", help="Rotate the active log into a segment")
+    rot.add_argument("--max-bytes", type=int, default=0)
+    rot.add_argument("--max-age", type=int, default=0)
+    rot.add_argument("--keep", type=int, default=0)
+    rot.add_argument("--force", action="store_true")
+
+    args = parser.parse_args(argv)
+    store = EventStore(args.log)
+
+    if args.command in ("append", "ingest"):
+        status = 0
+        if args.command == "append":
+            try:
+                data = _decode_data(args.data)
+            except ValueError as exc:
+                print(f"relay events: --{exc}", file=sys.stderr)
+                return 2
+            records = [
+                encode_record(args.type, args.message, ts=args.ts, persona=args.persona, kit=args.kit, data=data)
+            ]
+        else:
+            records = []
+            now = int(time.time())
+            for number, line in enumerate(sys.stdin, 1):
+                try:
+                    record = batch_record(line, event_type=args.type, persona=args.persona, kit=args.kit, ts=now)
+                except ValueError as exc:
+                    print(f"relay events: stdin line {number}: {exc}", file=sys.stderr)
+                    status = 1
+                    continue
+                if record is not None:
+                    records.append(record)
+        append_records(args.log, records)
+        if args.max_bytes or args.max_age:
+            store.rotate(max_bytes=args.max_bytes, max_age=args.max_age, keep=args.keep)
+        return status
+
+    if args.command == "show":
+        for raw, record in store.query():
+            print(raw if args.json else legacy_line(record))
+        return 0
+
+    if args.command == "history":
+        try:
+            since = parse_time(args.since) if args.since else None
+            until = parse_time(args.until) if args.until else None
+        except ValueError as exc:
+            print(f"relay events: {exc}", file=sys.stderr)
+            return 2
+        matches = store.query(since=since, until=until, types=_split_types(args.type), limit=args.limit)
+        for _raw, record in matches:
+            if args.json:
+                print(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            else:
+                print(_history_line(record))
+        return 0
+
+    if args.command == "rows":
+        lines = row_lines(store, args.limit, max(args.skip, 0))
+        if not lines:
+            return 1
+        print("\n".join(lines))
+        return 0
+
+    if args.command == "detail":
+        print("\n".join(detail_lines(store, args.index)))
+        return 0
+
+    if args.command == "follow":
+        try:
+            follower = Follower(
+                store,
+                types=_split_types(args.type),
+                kits=_split_types(args.kit),
+                personas=_split_types(args.persona),
+                since=parse_time(args.since) if args.since else None,
+                cursor=args.cursor,
+            )
+        except ValueError as exc:
+            print(f"relay events: {exc}", file=sys.stderr)
+            return 2
+        try:
+            while True:
+                for record in follower.poll():
+                    if args.text:
+                        print(_history_line(record))
+                    else:
+                        print(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                sys.stdout.flush()
+                if args.once:
+                    return 0
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return 130
+        except BrokenPipeError:
+            sys.stderr.close()
+            return 0
+        finally:
+            follower.close()
+
+    if args.command == "stats":
+        try:
+            since = parse_time(args.since) if args.since else None
+        except ValueError as exc:
+            print(f"relay events: {exc}", file=sys.stderr)
+            return 2
+        dims = args.by or [dim for dim in STATS_DIMENSIONS if dim != "hour"]
+        summary = summarize(store.rollup(), dims=dims, since=since, types=_split_types(args.type))
+        if args.json:
+            print(json.dumps(summary, ensure_ascii=False, indent=2))
+        else:
+            print("\n".join(_stats_lines(summary, dims)))
+        return 0
+
+    if args.command == "rotate":
+        rotated = store.rotate(max_bytes=args.max_bytes, max_age=args.max_age, keep=args.keep, force=args.force)
+        if rotated:
+            print(rotated)
+        return 0
+
+    return 2
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
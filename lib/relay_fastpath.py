@@ -0,0 +1,295 @@
+"""One importable entry point for the short Python hops of the shell tools.
+
+The entrypoints run it as ``python3 -S -m relay_fastpath <command> ...``:
+
+* ``plan <personas_dir> (<kit_file> <kit_name> <kit_dir> <output>)...``:
+  compile launch plans, as ``relay_kit_plan`` does
+* ``exports <persona.toml>``: print the ``export`` lines of one persona and
+  the personas it extends
+* ``preview <persona.toml> [--show-secrets]``: the TUI persona preview
+* ``stack <personas_dir> <target> <header> <names>``: write the effective
+  environment of a newline-separated persona stack as the export script
+  ``relay persona exec`` caches (see ``relay_persona_graph``)
+* ``overlay <kit_dir> <kit_file> <window:pane> <append|replace|clear>``:
+  update ``pane-personas.json``; the personas come newline-separated in
+  ``RELAY_PANE_PERSONAS``
+* ``events --log <log> ...``: the ``relay_events`` command line, with the
+  TUI's ``rows`` and ``detail`` queries answered without ``argparse``
+
+Unlike the ``python3 -`` heredocs these replace, a module is compiled once
+and its bytecode cached in ``__pycache__``.  ``-S`` skips ``site``
+(``relay_toml`` adds it back only to fall back to ``tomli``), this module
+imports nothing but ``sys`` up front and each command imports only what it
+uses.  ``tests/fastpath_imports.sh`` holds every command to an import budget.
+"""
+import sys
+
+# shlex.quote without importing shlex (and re): the same safe characters.
+_SAFE = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_@%+=:,./-")
+
+
+def sh_quote(value: str) -> str:
+    if not value:
+        return "''"
+    if all(char in _SAFE for char in value):
+        return value
+    return "'" + value.replace("'", "'\"'\"'") + "'"
+
+
+def _load_persona(path: str):
+    from relay_toml import TomlMissingError, load_path
+
+    try:
+        return load_path(path) or {}
+    except TomlMissingError as exc:
+        print(exc, file=sys.stderr)
+        raise SystemExit(2)
+
+
+def _resolve(personas_dir: str, names):
+    from relay_persona_graph import PersonaError, resolve_stack
+    from relay_toml import TomlMissingError
+
+    try:
+        return resolve_stack(personas_dir, names)
+    except TomlMissingError as exc:
+        print(exc, file=sys.stderr)
+        raise SystemExit(2)
+    except PersonaError as exc:
+        print(exc, file=sys.stderr)
+        raise SystemExit(1)
+
+
+def cmd_exports(args) -> int:
+    # One persona and everything it extends, spliced onto the current PATH.
+    import os
+
+    persona_dir = os.path.dirname(os.path.abspath(args[0]))
+    stack = _resolve(os.path.dirname(persona_dir), [os.path.basename(persona_dir)])
+    for key, value in stack.env.items():
+        print(f"export {key}={sh_quote(value)}")
+    if stack.prepend or stack.append:
+        print(f"export PATH={sh_quote(stack.path(os.environ.get('PATH', '')))}")
+    return 0
+
+
+def persona_preview_lines(data, show_secrets: bool):
+    """Render the environment/PATH/metadata part of the TUI persona preview."""
+    import re
+
+    sensitive = re.compile(r"(secret|token|pass|key)", re.I)
+    env = dict(data.get("env") or {})
+    path_cfg = data.get("path") or {}
+    prepend = [str(x) for x in (path_cfg.get("prepend") or [])]
+    append = [str(x) for x in (path_cfg.get("append") or [])]
+    has_sensitive = any(sensitive.search(str(key)) or sensitive.search(str(value)) for key, value in env.items())
+
+    def render_value(key, value) -> str:
+        if show_secrets or not has_sensitive:
+            return str(value)
+        if sensitive.search(str(key)) or sensitive.search(str(value)):
+            return "*** hidden ***"
+        return str(value)
+
+    lines = []
+    extends = data.get("extends")
+    if extends:
+        lines.extend(["", "Extends: " + (extends if isinstance(extends, str) else ", ".join(str(x) for x in extends))])
+    lines.extend(["", "Environment:"])
+    if env:
+        lines.append("  {0:<20} {1}".format("Key", "Value"))
+        lines.append("  {0:<20} {1}".format("-" * 20, "-" * 32))
+        for key in sorted(env):
+            lines.append("  {0:<20} {1}".format(key, render_value(key, env[key])))
+    else:
+        lines.append("  (none)")
+
+    lines.extend(["", "PATH adjustments:"])
+    if prepend:
+        lines.append("  prepend:")
+        lines.extend(f"    - {item}" for item in prepend)
+    if append:
+        lines.append("  append:")
+        lines.extend(f"    - {item}" for item in append)
+    if not prepend and not append:
+        lines.append("  (none)")
+
+    metadata = {k: v for k, v in data.items() if k not in {"env", "path", "extends"}}
+    if metadata:
+        lines.extend(["", "Additional sections:"])
+        for key in sorted(metadata):
+            value = metadata[key]
+            if isinstance(value, dict):
+                lines.append(f"  [{key}]")
+                if value:
+                    for sub_key in sorted(value):
+                        lines.append("    {0:<18} {1}".format(sub_key, value[sub_key]))
+                else:
+                    lines.append("    (empty)")
+            else:
+                lines.append("  {0:<20} {1}".format(key, value))
+    else:
+        lines.extend(["", "Additional sections: (none)"])
+
+    if has_sensitive and not show_secrets:
+        lines.extend(["", "(Secrets hidden. Set RELAY_TUI_SHOW_SECRETS=1 to reveal.)"])
+    return lines
+
+
+def cmd_preview(args) -> int:
+    data = _load_persona(args[0])
+    print("\n".join(persona_preview_lines(data, "--show-secrets" in args[1:])))
+    return 0
+
+
+def cmd_stack(args) -> int:
+    import os
+    import time
+
+    from relay_persona_graph import stack_script
+
+    personas_dir, target, header, names = args[:4]
+    stack = _resolve(personas_dir, [name for name in names.split("\n") if name])
+    newest = max((mtime for _, _, _, mtime in stack.files), default=0)
+
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.write(stack_script(stack, header, sh_quote))
+        # test -nt only sees whole seconds in some shells; back-date the script
+        # so an edit landing in the same second is caught by the checksums.
+        stamp = int(time.time()) - 1
+        if newest < stamp:
+            os.utime(tmp_path, (stamp, stamp))
+        else:
+            os.utime(tmp_path, (0, 0))
+        os.replace(tmp_path, target)
+    except OSError as exc:
+        print(f"Unable to write persona stack {target}: {exc}", file=sys.stderr)
+        return 4
+    return 0
+
+
+def _pick(items, token: str):
+    for item in items:
+        name = item.get("name") or ""
+        if name and token == name:
+            return item
+    if token.isdigit():
+        idx = int(token)
+        if 1 <= idx <= len(items):
+            return items[idx - 1]
+        if 0 <= idx < len(items):
+            return items[idx]
+    return None
+
+
+def cmd_overlay(args) -> int:
+    import os
+
+    from relay_kit_config import dedupe_personas, load_kit_config, load_pane_overlays, overlay_key, save_pane_overlays
+
+    kit_dir, kit_file, target, mode = args[:4]
+    personas = [item.strip() for item in os.environ.get("RELAY_PANE_PERSONAS", "").split("\n") if item.strip()]
+    windows = load_kit_config(kit_file, kit_dir).get("windows", [])
+    if not windows:
+        print("No panes defined in kit configuration", file=sys.stderr)
+        return 4
+
+    window_token, pane_token = target.split(":", 1) if ":" in target else ("", target)
+    window_token, pane_token = window_token.strip(), pane_token.strip()
+    if not pane_token:
+        print("Pane identifier required (window:pane)", file=sys.stderr)
+        return 2
+    window = _pick(windows, window_token) if window_token else windows[0]
+    if window is None:
+        print(f"Window not found: {window_token}", file=sys.stderr)
+        return 2
+    panes = window.get("panes", [])
+    label = window.get("name") or window["index"]
+    if not panes:
+        print(f"Window '{label}' has no panes", file=sys.stderr)
+        return 2
+    pane = _pick(panes, pane_token)
+    if pane is None:
+        print(f"Pane not found in window '{label}': {pane_token}", file=sys.stderr)
+        return 2
+
+    overlays = load_pane_overlays(kit_dir)
+    key = overlay_key(window["index"], pane["index"])
+    if mode in ("append", "replace") and not personas:
+        print(f"At least one persona is required for {mode}", file=sys.stderr)
+        return 2
+    if mode == "append":
+        updated = dedupe_personas(overlays.get(key, []), personas)
+        if updated:
+            overlays[key] = updated
+        else:
+            overlays.pop(key, None)
+    elif mode == "replace":
+        overlays[key] = dedupe_personas(personas)
+    elif mode == "clear":
+        overlays.pop(key, None)
+    else:
+        print(f"Unknown mode: {mode}", file=sys.stderr)
+        return 2
+
+    save_pane_overlays(kit_dir, overlays)
+    window_label = window.get("name") or f"window{window['index'] + 1}"
+    print(f"UPDATED\t{window_label}:{pane['index'] + 1}\t{','.join(overlays.get(key, []))}")
+    return 0
+
+
+def cmd_events(args) -> int:
+    # The TUI asks for `--log L rows --limit N` and `--log L detail --index N`
+    # on every screen and cursor move; everything else goes to argparse.
+    if len(args) == 5 and args[0] == "--log" and (args[2], args[3]) in (("rows", "--limit"), ("detail", "--index")):
+        try:
+            number = int(args[4])
+        except ValueError:
+            number = None
+        if number is not None:
+            from relay_events import EventStore, detail_lines, row_lines
+
+            store = EventStore(args[1])
+            if args[2] == "rows":
+                lines = row_lines(store, number)
+                if not lines:
+                    return 1
+            else:
+                lines = detail_lines(store, number)
+            sys.stdout.write("".join(line + "\n" for line in lines))
+            return 0
+    from relay_events import main as events_main
+
+    return events_main(args)
+
+
+def cmd_plan(args) -> int:
+    from relay_kit_plan import main as plan_main
+
+    return plan_main(args)
+
+
+COMMANDS = {
+    "plan": (cmd_plan, 1),
+    "exports": (cmd_exports, 1),
+    "stack": (cmd_stack, 4),
+    "overlay": (cmd_overlay, 4),
+    "preview": (cmd_preview, 1),
+    "events": (cmd_events, 0),
+}
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    entry = COMMANDS.get(args[0]) if args else None
+    if entry is None or len(args) - 1 < entry[1]:
+        print("usage: relay_fastpath {" + "|".join(COMMANDS) + "} ...", file=sys.stderr)
+        return 2
+    return entry[0](args[1:])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+"""Warning and classification rules applied to imported pane commands.
+
+Every rule is a regular expression.  :class:`RuleEngine` folds all warning
+rules into one pattern of zero-width lookaheads, so a command is scanned once
+no matter how many rules are loaded, and it folds the classification rules
+into a second pattern that is tried once at the start of the command.
+Results are cached per command string, which makes auditing thousands of
+captured panes (most of which run the same handful of commands) cheap.
+
+Users extend the built-in rules with a TOML file (``RELAY_IMPORT_RULES``,
+default ``~/.local/share/relay/import-rules.toml``)::
+
+    [[warning]]
+    name = "aws-access-key"
+    pattern = 'AKIA[0-9A-Z]{16}'
+    message = "AWS access key {0} inline; move it to a persona"
+
+    [[warning]]
+    name = "ephemeral-job"
+    pattern = 'job/([\\w-]+)-\\d+'
+    message = "Job '{1}' is ephemeral"
+    replace = "job/{1}"          # offered as a fix in --interactive mode
+
+    [[classify]]
+    name = "k9s"
+    pattern = '^k9s'
+    label = "Kubernetes dashboard"
+
+Warning fields: ``pattern`` and ``message`` (``{0}`` is the match, ``{1}``…
+its groups), optional ``ignore`` (skip matches this pattern finds),
+``ignore_case`` and ``replace``.  Classification rules match the lowercased
+command; the first rule in order wins, and user rules are tried first.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from relay_toml import load_path
+
+# A warning is (message, suggested replacement command or None).
+Finding = Tuple[str, Optional[str]]
+Suggester = Callable[[str, "re.Match[str]"], Optional[str]]
+
+_CACHE_SIZE = 4096
+# Patterns that refer to their own groups cannot be merged into the combined
+# matcher without renumbering; such rules are scanned on their own.
+_SELF_REFERENCE_RE = re.compile(r"\\[1-9]|\(\?P=|\(\?P<|\(\?\(")
+
+
+class ImportRuleError(ValueError):
+    """Raised when a rules file cannot be loaded."""
+
+
+@dataclass(frozen=True)
+class WarningRule:
+    name: str
+    pattern: str
+    message: str
+    ignore: str = ""
+    ignore_case: bool = False
+    replace: Optional[str] = None
+    suggest: Optional[Suggester] = None
+
+    def compiled(self) -> "re.Pattern[str]":
+        return re.compile(self.pattern, re.IGNORECASE if self.ignore_case else 0)
+
+
+@dataclass(frozen=True)
+class ClassifyRule:
+    name: str
+    pattern: str
+    label: str
+
+
+def _suggest_deployment(command: str, match: "re.Match[str]") -> Optional[str]:
+    pod_name = match.group(1)
+    base = pod_name.split("-", 1)[0]
+    if base and base != pod_name:
+        return command.replace(f"pod/{pod_name}", f"deployment/{base}")
+    return None
+
+
+_CREDENTIALS_MESSAGE = "Command contains inline credentials; move secrets to a persona or env var"
+
+BUILTIN_WARNINGS: Tuple[WarningRule, ...] = (
+    WarningRule(
+        name="kubectl-pod",
+        pattern=r"kubectl\s+logs[^\n]*\bpod/([\w.-]+)",
+        message="Pod name '{1}' is likely ephemeral; consider using a selector",
+        suggest=_suggest_deployment,
+    ),
+    WarningRule(name="url-credentials", pattern=r"://[^\s/:]+:[^\s@]+@", message=_CREDENTIALS_MESSAGE),
+    WarningRule(
+        name="inline-secret",
+        pattern=r"\b(?:DATABASE_URL|PGURI|MYSQL_URL|AMQP_URL)=[^\s]+",
+        message=_CREDENTIALS_MESSAGE,
+        ignore_case=True,
+    ),
+    WarningRule(
+        name="ip-address",
+        pattern=r"\b(?:\d{1,3}\.){3}\d{1,3}\b",
+        message="Hard-coded address '{0}' detected; confirm it is stable",
+        ignore=r"^(?:127\.|0\.0\.0\.0$)",
+    ),
+)
+
+BUILTIN_CLASSIFIERS: Tuple[ClassifyRule, ...] = (
+    ClassifyRule("shell", r"^(?:sh|bash|zsh|fish)$", "Shell: review history for common tasks"),
+    ClassifyRule("dev-server", r"^(?:npm run|yarn|pnpm)", "Dev server"),
+    ClassifyRule("log-monitor", r"^tail|journalctl", "Log monitor"),
+    ClassifyRule("kubectl-logs", r"^kubectl logs", "Kubernetes logs"),
+    ClassifyRule("editor", r"^(?:nvim|vim|emacs)", "Editor"),
+    ClassifyRule("process-monitor", r"^htop", "Process monitor"),
+)
+
+
+def _format(template: str, match: "re.Match[str]") -> str:
+    groups = [match.group(0), *(value or "" for value in match.groups())]
+    try:
+        return template.format(*groups)
+    except (IndexError, KeyError, ValueError):
+        return template
+
+
+class RuleEngine:
+    """Scan commands against warning rules and classify them, with caching."""
+
+    def __init__(
+        self,
+        warnings: Sequence[WarningRule] = BUILTIN_WARNINGS,
+        classifiers: Sequence[ClassifyRule] = BUILTIN_CLASSIFIERS,
+    ) -> None:
+        self.warning_rules = tuple(warnings)
+        self.classify_rules = tuple(classifiers)
+        self._compiled = [rule.compiled() for rule in self.warning_rules]
+        self._ignores = [re.compile(rule.ignore) if rule.ignore else None for rule in self.warning_rules]
+        merged: List[str] = []
+        self._merged_index: List[int] = []
+        self._separate: List[int] = []
+        for index, rule in enumerate(self.warning_rules):
+            if _SELF_REFERENCE_RE.search(rule.pattern):
+                self._separate.append(index)
+                continue
+            flags = "(?i:" if rule.ignore_case else "(?:"
+            merged.append(f"(?=(?P<w{index}>{flags}{rule.pattern})))")
+            self._merged_index.append(index)
+        self._scanner = re.compile("|".join(merged)) if merged else None
+        classify = "|".join(
+            f"(?P<c{index}>(?=[\\s\\S]*?(?:{rule.pattern})))" for index, rule in enumerate(self.classify_rules)
+        )
+        self._classifier = re.compile(f"^(?:{classify})") if classify else None
+        self.scan = functools.lru_cache(maxsize=_CACHE_SIZE)(self._scan)
+        self.classify = functools.lru_cache(maxsize=_CACHE_SIZE)(self._classify)
+
+    def _hits(self, command: str) -> List[Tuple[int, "re.Match[str]"]]:
+        hits: List[Tuple[int, "re.Match[str]"]] = []
+        if self._scanner is not None:
+            # Each rule keeps finditer semantics: its own matches never overlap.
+            resume: Dict[int, int] = {}
+            for candidate in self._scanner.finditer(command):
+                start = candidate.start()
+                # The alternation reports the first rule matching here; rules
+                # after it may match at the same position too.
+                first = int(candidate.lastgroup[1:])
+                for index in self._merged_index:
+                    if index < first or start < resume.get(index, 0):
+                        continue
+                    match = self._compiled[index].match(command, start)
+                    if match is None:
+                        continue
+                    resume[index] = max(match.end(), start + 1)
+                    hits.append((index, match))
+        for index in self._separate:
+            hits.extend((index, match) for match in self._compiled[index].finditer(command))
+        hits.sort(key=lambda hit: (hit[0], hit[1].start()))
+        return hits
+
+    def _scan(self, command: str) -> Tuple[Finding, ...]:
+        findings: List[Finding] = []
+        seen = set()
+        for index, match in self._hits(command):
+            rule = self.warning_rules[index]
+            ignore = self._ignores[index]
+            if ignore is not None and ignore.search(match.group(0)):
+                continue
+            message = _format(rule.message, match)
+            if message in seen:
+                continue
+            seen.add(message)
+            suggestion: Optional[str] = None
+            if rule.suggest is not None:
+                suggestion = rule.suggest(command, match)
+            elif rule.replace is not None:
+                suggestion = command[: match.start()] + _format(rule.replace, match) + command[match.end() :]
+            findings.append((message, suggestion))
+        return tuple(findings)
+
+    def _classify(self, command: str) -> Optional[str]:
+        lowered = command.strip().lower()
+        if not lowered or self._classifier is None:
+            return None
+        match = self._classifier.match(lowered)
+        if match is None or match.lastgroup is None:
+            return None
+        return self.classify_rules[int(match.lastgroup[1:])].label
+
+
+def _check_mergeable(pattern: str, ignore_case: bool) -> None:
+    # Compile the pattern the way RuleEngine embeds it: a global flag such as
+    # a leading (?i) is valid alone but not inside the combined matcher.
+    re.compile(f"(?=(?{'i' if ignore_case else ''}:{pattern}))")
+
+
+def default_rules_path() -> str:
+    configured = os.environ.get("RELAY_IMPORT_RULES")
+    if configured:
+        return configured
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "relay", "import-rules.toml")
+
+
+def _text(entry: Dict[str, object], key: str, source: str, *, required: bool = True) -> str:
+    value = entry.get(key)
+    if value is None and not required:
+        return ""
+    if not isinstance(value, str) or (required and not value):
+        raise ImportRuleError(f"{source}: '{key}' must be a non-empty string")
+    return value
+
+
+def load_rules(path: str) -> Tuple[List[WarningRule], List[ClassifyRule]]:
+    """Read user rules from ``path``; a missing file yields no rules."""
+    if not os.path.exists(path):
+        return [], []
+    try:
+        data = load_path(path)
+    except (OSError, ValueError) as exc:
+        raise ImportRuleError(f"{path}: {exc}") from exc
+    warnings: List[WarningRule] = []
+    classifiers: List[ClassifyRule] = []
+    for position, entry in enumerate(data.get("warning", []) or []):
+        source = f"{path}: warning #{position + 1}"
+        if not isinstance(entry, dict):
+            raise ImportRuleError(f"{source}: expected a table")
+        source = f"{path}: warning '{entry.get('name') or position + 1}'"
+        rule = WarningRule(
+            name=str(entry.get("name") or f"user-{position + 1}"),
+            pattern=_text(entry, "pattern", source),
+            message=_text(entry, "message", source),
+            ignore=_text(entry, "ignore", source, required=False),
+            ignore_case=bool(entry.get("ignore_case", False)),
+            replace=entry.get("replace") if isinstance(entry.get("replace"), str) else None,
+        )
+        try:
+            _check_mergeable(rule.pattern, rule.ignore_case)
+            if rule.ignore:
+                re.compile(rule.ignore)
+        except re.error as exc:
+            raise ImportRuleError(f"{source}: invalid pattern: {exc}") from exc
+        warnings.append(rule)
+    for position, entry in enumerate(data.get("classify", []) or []):
+        source = f"{path}: classify #{position + 1}"
+        if not isinstance(entry, dict):
+            raise ImportRuleError(f"{source}: expected a table")
+        source = f"{path}: classify '{entry.get('name') or position + 1}'"
+        rule_c = ClassifyRule(
+            name=str(entry.get("name") or f"user-{position + 1}"),
+            pattern=_text(entry, "pattern", source),
+            label=_text(entry, "label", source),
+        )
+        if _SELF_REFERENCE_RE.search(rule_c.pattern):
+            raise ImportRuleError(f"{source}: classify patterns cannot use backreferences or named groups")
+        try:
+            _check_mergeable(rule_c.pattern, False)
+        except re.error as exc:
+            raise ImportRuleError(f"{source}: invalid pattern: {exc}") from exc
+        classifiers.append(rule_c)
+    return warnings, classifiers
+
+
+_DEFAULT_ENGINE: Optional[RuleEngine] = None
+
+
+def default_engine() -> RuleEngine:
+    """Built-in rules plus the user's rules file, built once per process."""
+    global _DEFAULT_ENGINE
+    if _DEFAULT_ENGINE is None:
+        user_warnings, user_classifiers = load_rules(default_rules_path())
+        _DEFAULT_ENGINE = RuleEngine(
+            [*BUILTIN_WARNINGS, *user_warnings],
+            [*user_classifiers, *BUILTIN_CLASSIFIERS],
+        )
+    return _DEFAULT_ENGINE
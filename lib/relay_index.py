@@ -0,0 +1,319 @@
+"""Metadata index of kits and personas shared by the CLI, the TUI and the daemon.
+
+The index is one TSV file (``$RELAY_STATE_DIR/cache/index.tsv``)::
+
+    #relay-index  1  <kits_dir>  <personas_dir>
+    K  <name>  <mtime_ns>  <size>  <session>  <windows>  <panes>  <personas>  <description>
+    P  <name>  <mtime_ns>  <size>  <description>
+    F  <fragments_dir>  <mtime_ns>  <count>
+
+``personas`` is comma-separated; the description is always the last field and
+never contains a tab.  A refresh re-stats every ``kit.toml``/``persona.toml``
+and re-reads only the files whose size or mtime changed, so editing one kit
+out of fifty parses one file.  The ``F`` row records the newest mtime and the
+number of kit fragments; when either changes every kit is re-read, since any
+kit may include the fragment that changed.
+
+The index file's mtime is set a little before the scan started.  A shell
+reader can therefore treat the index as current while ``find -newer`` reports
+nothing under the kits, personas and fragments directories (see
+``relay_index.sh``).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from relay_kit_config import (
+    dedupe_personas,
+    default_state_dir,
+    fragments_dir,
+    fragments_signature,
+    load_kit_config,
+)
+
+INDEX_VERSION = "1"
+KIT, PERSONA, FRAGMENTS = "K", "P", "F"
+# Filesystem timestamps come from a coarse kernel clock and can trail
+# time.time_ns(); back-dating the index by this much keeps a write that lands
+# during the scan from looking older than the index.
+_CLOCK_SLACK_NS = 1_000_000_000
+_KIT_DESCRIPTION_RE = re.compile(r'^[ \t]*description[ \t]*=[ \t]*"(.*)"[ \t]*$', re.M)
+_PERSONA_DESCRIPTION_RE = re.compile(r"^[ \t]*#[ \t]*(.*)$", re.M)
+_CONFIG_NAMES = {KIT: "kit.toml", PERSONA: "persona.toml"}
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            return handle.read()
+    except OSError:
+        return ""
+
+
+def _field(value: str) -> str:
+    return value.replace("\t", " ").replace("\n", " ")
+
+
+def kit_description(kit_path: str, text: Optional[str] = None) -> str:
+    # Same match as the TUI's sed: the first `description = "..."` line.
+    if text is None:
+        text = _read_text(os.path.join(kit_path, "kit.toml"))
+    match = _KIT_DESCRIPTION_RE.search(text)
+    if match and match.group(1):
+        return match.group(1)
+    return f"Kit directory: {kit_path}"
+
+
+def persona_description(persona_path: str, text: Optional[str] = None) -> str:
+    # Same match as the TUI's sed: the first comment line.
+    if text is None:
+        text = _read_text(os.path.join(persona_path, "persona.toml"))
+    match = _PERSONA_DESCRIPTION_RE.search(text)
+    if match and match.group(1):
+        return match.group(1)
+    return f"Persona directory: {persona_path}"
+
+
+@dataclass(frozen=True)
+class Entry:
+    kind: str
+    name: str
+    mtime_ns: int
+    size: int
+    description: str
+    session: str = ""
+    windows: int = 0
+    panes: int = 0
+    personas: Tuple[str, ...] = ()
+
+    def row(self) -> str:
+        stamp = ("", "") if self.size < 0 else (str(self.mtime_ns), str(self.size))
+        if self.kind == PERSONA:
+            fields = [PERSONA, self.name, *stamp, self.description]
+        else:
+            fields = [
+                KIT,
+                self.name,
+                *stamp,
+                self.session,
+                str(self.windows),
+                str(self.panes),
+                ",".join(self.personas),
+                self.description,
+            ]
+        return "\t".join(_field(value) for value in fields)
+
+    def as_dict(self) -> Dict:
+        data: Dict = {"name": self.name, "description": self.description, "mtime_ns": self.mtime_ns or None}
+        if self.kind == KIT:
+            data.update(session=self.session, windows=self.windows, panes=self.panes, personas=list(self.personas))
+        return data
+
+
+def _parse_row(line: str) -> Optional[Entry]:
+    parts = line.rstrip("\n").split("\t")
+    try:
+        mtime_ns = int(parts[2]) if parts[2] else 0
+        size = int(parts[3]) if parts[3] else -1
+        if parts[0] == PERSONA and len(parts) == 5:
+            return Entry(PERSONA, parts[1], mtime_ns, size, parts[4])
+        if parts[0] == KIT and len(parts) == 9:
+            personas = tuple(name for name in parts[7].split(",") if name)
+            return Entry(KIT, parts[1], mtime_ns, size, parts[8], parts[4], int(parts[5]), int(parts[6]), personas)
+    except (IndexError, ValueError):
+        return None
+    return None
+
+
+def _build(kind: str, name: str, path: str, stamp: Tuple[int, int]) -> Entry:
+    config = os.path.join(path, _CONFIG_NAMES[kind])
+    text = _read_text(config) if stamp[1] >= 0 else ""
+    if kind == PERSONA:
+        return Entry(PERSONA, name, stamp[0], stamp[1], _field(persona_description(path, text)))
+    description = _field(kit_description(path, text))
+    try:
+        parsed = load_kit_config(config, path)
+    except Exception:  # noqa: BLE001 - a broken kit still gets listed
+        return Entry(KIT, name, stamp[0], stamp[1], description)
+    windows = parsed.get("windows", [])
+    personas = dedupe_personas(
+        parsed.get("kit_personas", []),
+        *[pane.get("personas", []) for window in windows for pane in window.get("panes", [])],
+    )
+    return Entry(
+        KIT,
+        name,
+        stamp[0],
+        stamp[1],
+        description,
+        session=_field(parsed.get("session", "")),
+        windows=len(windows),
+        panes=sum(len(window.get("panes", [])) for window in windows),
+        personas=tuple(_field(persona) for persona in personas),
+    )
+
+
+class MetadataIndex:
+    """Kit and persona entries, refreshed incrementally from their config files."""
+
+    def __init__(self, kits_dir: str, personas_dir: str, path: Optional[str] = None) -> None:
+        # Absolute, so one index serves every working directory; the shell
+        # reader resolves relative directories the same way.
+        self.kits_dir = os.path.abspath(kits_dir)
+        self.personas_dir = os.path.abspath(personas_dir)
+        self.path = path
+        self.entries: Dict[str, Dict[str, Entry]] = {KIT: {}, PERSONA: {}}
+        self.fragments_dir = fragments_dir(self.kits_dir)
+        self.fragments: Tuple[int, int] = (0, 0)
+        self.counters = {"kit_reloads": 0, "persona_reloads": 0}
+        self._loaded = False
+        self._dirty = False
+
+    def _header(self) -> str:
+        return "\t".join(["#relay-index", INDEX_VERSION, self.kits_dir, self.personas_dir])
+
+    def _load(self) -> None:
+        self._loaded = True
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                if handle.readline().rstrip("\n") != self._header():
+                    return
+                for line in handle:
+                    if line.startswith(FRAGMENTS + "\t"):
+                        parts = line.rstrip("\n").split("\t")
+                        if len(parts) == 4 and parts[1] == self.fragments_dir and parts[2].isdigit() and parts[3].isdigit():
+                            self.fragments = (int(parts[2]), int(parts[3]))
+                        continue
+                    entry = _parse_row(line)
+                    if entry is not None:
+                        self.entries[entry.kind][entry.name] = entry
+        except OSError:
+            return
+
+    def _refresh_kind(self, kind: str, root: str) -> None:
+        previous = self.entries[kind]
+        current: Dict[str, Entry] = {}
+        try:
+            with os.scandir(root) as listing:
+                dirs = [(entry.name, entry.path) for entry in listing if not entry.name.startswith(".") and entry.is_dir()]
+        except OSError:
+            dirs = []
+        for name, path in dirs:
+            try:
+                st = os.stat(os.path.join(path, _CONFIG_NAMES[kind]))
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = (0, -1)
+            old = previous.get(name)
+            if old is not None and (old.mtime_ns, old.size) == stamp:
+                current[name] = old
+                continue
+            current[name] = _build(kind, name, path, stamp)
+            self.counters["kit_reloads" if kind == KIT else "persona_reloads"] += 1
+            self._dirty = True
+        if len(current) != len(previous):
+            self._dirty = True
+        self.entries[kind] = current
+
+    def refresh(self) -> "MetadataIndex":
+        if not self._loaded:
+            self._load()
+        started = time.time_ns()
+        fragments = fragments_signature(self.fragments_dir)
+        if fragments != self.fragments:
+            # Any kit may include the fragment that changed.
+            self.entries[KIT] = {}
+            self.fragments = fragments
+            self._dirty = True
+        self._refresh_kind(KIT, self.kits_dir)
+        self._refresh_kind(PERSONA, self.personas_dir)
+        if self.path:
+            self._save(started - _CLOCK_SLACK_NS)
+        return self
+
+    def _save(self, stamp_ns: int) -> None:
+        directory = os.path.dirname(self.path) or "."
+        try:
+            if self._dirty or not os.path.exists(self.path):
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(prefix=".index.", dir=directory)
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    handle.write(self._header() + "\n")
+                    for kind in (KIT, PERSONA):
+                        for name in sorted(self.entries[kind]):
+                            handle.write(self.entries[kind][name].row() + "\n")
+                    handle.write("\t".join([FRAGMENTS, _field(self.fragments_dir), str(self.fragments[0]), str(self.fragments[1])]) + "\n")
+                os.replace(tmp, self.path)
+                self._dirty = False
+            os.utime(self.path, ns=(stamp_ns, stamp_ns))
+        except OSError:
+            # The index is only a cache; callers already have fresh entries.
+            pass
+
+    def names(self, kind: str) -> List[str]:
+        return sorted(self.entries[kind])
+
+    def listing(self, kind: str) -> List[str]:
+        """``name<TAB>description`` lines, as the TUI lists kits and personas."""
+        entries = self.entries[kind]
+        return [f"{name}\t{entries[name].description}" for name in sorted(entries)]
+
+    def long_rows(self) -> List[str]:
+        """``name, session, windows, panes, personas, description`` per kit."""
+        rows = []
+        for name in self.names(KIT):
+            entry = self.entries[KIT][name]
+            fields = [name, entry.session, str(entry.windows), str(entry.panes), ",".join(entry.personas), entry.description]
+            rows.append("\t".join(fields))
+        return rows
+
+
+def default_index_path() -> str:
+    return os.path.join(default_state_dir(), "cache", "index.tsv")
+
+
+def _emit(lines: Iterable[str]) -> None:
+    for line in lines:
+        sys.stdout.write(line + "\n")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="relay_index", description="Relay kit/persona metadata index")
+    parser.add_argument("--index", default="", help="Index file (default: $RELAY_STATE_DIR/cache/index.tsv)")
+    parser.add_argument("--kits-dir", required=True)
+    parser.add_argument("--personas-dir", required=True)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rows = sub.add_parser("rows", help="Print name<TAB>description lines")
+    rows.add_argument("kind", choices=("kits", "personas"))
+    rows.add_argument("--long", action="store_true", help="Kits: name, session, windows, panes, personas, description")
+    sub.add_parser("json", help="Print every entry as JSON")
+    sub.add_parser("refresh", help="Update the index and report what changed")
+    args = parser.parse_args(argv)
+
+    index = MetadataIndex(args.kits_dir, args.personas_dir, args.index or default_index_path()).refresh()
+    if args.command == "rows":
+        kind = KIT if args.kind == "kits" else PERSONA
+        _emit(index.long_rows() if args.long and kind == KIT else index.listing(kind))
+    elif args.command == "json":
+        payload = {
+            "kits": [index.entries[KIT][name].as_dict() for name in index.names(KIT)],
+            "personas": [index.entries[PERSONA][name].as_dict() for name in index.names(PERSONA)],
+        }
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+    else:
+        print("\t".join(f"{key}={value}" for key, value in sorted(index.counters.items())))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+# shellcheck shell=sh
+# Shell side of the kit/persona metadata index (lib/relay_index.py), sourced
+# by relay-kit and the TUI. relay_index_rows reads the index file directly
+# (one find, one awk) when nothing under the kits, personas or kit fragments
+# directories is newer than it, and otherwise lets python refresh only the
+# changed entries.
+# Callers must set LIB_DIR.
+
+relay_index_path() {
+  printf '%s\n' "${RELAY_STATE_DIR:-${XDG_STATE_HOME:-$HOME/.local/state}/relay}/cache/index.tsv"
+}
+
+# relay_index_abspath PATH: set RIA_PATH to os.path.abspath(PATH), the form
+# the index records its directories in.
+relay_index_abspath() {
+  RIA_PATH=$1
+  case "$RIA_PATH" in
+    /*) ;;
+    *) RIA_PATH="$(pwd -P)/$RIA_PATH" ;;
+  esac
+  case "$RIA_PATH" in
+    *//*|*/./*|*/../*|*/.|*/..|*?/) ;;
+    *) return 0 ;;
+  esac
+  ria_rest=${RIA_PATH#/}
+  RIA_PATH=""
+  while [ -n "$ria_rest" ]; do
+    ria_part=${ria_rest%%/*}
+    case "$ria_rest" in
+      */*) ria_rest=${ria_rest#*/} ;;
+      *) ria_rest="" ;;
+    esac
+    case "$ria_part" in
+      ''|.) ;;
+      ..) RIA_PATH=${RIA_PATH%/*} ;;
+      *) RIA_PATH="$RIA_PATH/$ria_part" ;;
+    esac
+  done
+  RIA_PATH=${RIA_PATH:-/}
+}
+
+# relay_index_rows kits|personas [long]
+#   kits, personas: name<TAB>description
+#   kits long:      name<TAB>session<TAB>windows<TAB>panes<TAB>personas<TAB>description
+relay_index_rows() {
+  rir_kind=$1
+  rir_long=${2:-}
+  relay_index_abspath "${RELAY_KITS_DIR:-$HOME/.local/share/relay/kits}"
+  rir_kits=$RIA_PATH
+  relay_index_abspath "${RELAY_PERSONAS_DIR:-$HOME/.local/share/relay/personas}"
+  rir_personas=$RIA_PATH
+  relay_index_abspath "${RELAY_FRAGMENTS_DIR:-${rir_kits%/*}/fragments}"
+  rir_fragments=$RIA_PATH
+  rir_index=$(relay_index_path)
+  if [ -s "$rir_index" ]; then
+    # A directory that does not exist is "fresh" only if the index holds no
+    # entries for it (awk checks that); one that exists must have nothing
+    # newer than the index below it. The F row comes last, so awk holds the
+    # rows back until it has seen it: a stale index prints nothing before
+    # python answers instead.
+    set --
+    rir_missing=""
+    if [ -d "$rir_kits" ]; then set -- "$rir_kits"; else rir_missing="K"; fi
+    if [ -d "$rir_personas" ]; then set -- "$@" "$rir_personas"; else rir_missing="${rir_missing}P"; fi
+    if [ -d "$rir_fragments" ]; then set -- "$@" "$rir_fragments"; else rir_missing="${rir_missing}F"; fi
+    if [ $# -eq 0 ] || ! find "$@" -maxdepth 2 -newer "$rir_index" \
+      \( -type d -o -name '*.toml' \) 2>/dev/null | head -n 1 | read -r _; then
+      awk -F '\t' -v kits="$rir_kits" -v personas="$rir_personas" -v fragments="$rir_fragments" \
+        -v kind="$rir_kind" -v long="$rir_long" -v missing="$rir_missing" '
+        NR == 1 {
+          if ($1 != "#relay-index" || $2 != "1" || $3 != kits || $4 != personas) { stale = 1; exit }
+          want = (kind == "kits") ? "K" : "P"
+          next
+        }
+        $1 == "F" {
+          if ($2 != fragments || (index(missing, "F") && $4 != 0)) { stale = 1; exit }
+          checked = 1
+          next
+        }
+        $1 == want && index(missing, want) { stale = 1; exit }
+        kind == "kits" && $1 == "K" {
+          if (long != "") rows[++n] = $2 "\t" $5 "\t" $6 "\t" $7 "\t" $8 "\t" $9
+          else rows[++n] = $2 "\t" $9
+        }
+        kind == "personas" && $1 == "P" { rows[++n] = $2 "\t" $5 }
+        END {
+          if (stale || !checked) exit 3
+          for (i = 1; i <= n; i++) print rows[i]
+        }
+      ' "$rir_index" && return 0
+    fi
+  fi
+  command -v python3 >/dev/null 2>&1 || return 127
+  set -- rows "$rir_kind"
+  [ -z "$rir_long" ] || set -- "$@" --long
+  PYTHONPATH="$LIB_DIR${PYTHONPATH:+:$PYTHONPATH}" python3 -m relay_index --index "$rir_index" \
+    --kits-dir "$rir_kits" --personas-dir "$rir_personas" "$@"
+}
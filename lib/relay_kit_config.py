@@ -1,11 +1,32 @@
-"""Shared helpers for Relay kit configuration and persona overlays."""
+"""Shared helpers for Relay kit configuration and persona overlays.
+
+Kits can be composed from shared fragments, TOML files under
+``$RELAY_FRAGMENTS_DIR`` (default: ``fragments/`` next to the kits
+directory) named without their ``.toml`` suffix:
+
+* ``extends = "base"`` (or a list) takes the fragment's top-level keys as
+  defaults.  The kit's own keys win, except that ``personas`` and ``windows``
+  are appended to the fragment's.
+* A ``[[windows]]`` entry of ``include = "logs"`` is replaced by the
+  fragment's windows; ``with = { service = "api" }`` fills its parameters.
+
+A fragment declares its parameters with defaults in a ``[params]`` table and
+uses them as ``{{name}}`` in any string.  Only declared names are replaced, so
+other ``{{...}}`` text (Go templates, say) passes through.  A kit's own
+``[params]`` feed every fragment it uses; ``with`` overrides them per include.
+
+Fragments go through :func:`load_fragment`, which parses each file once per
+process and keeps the parsed form under ``$RELAY_STATE_DIR/cache/fragments``
+keyed by content hash, so a bulk start of many kits sharing a few fragments
+parses each fragment once.
+"""
 from __future__ import annotations
 
-import json
 import os
-from typing import Dict, List, Tuple
+import re
+from typing import Dict, List, Optional, Tuple
 
-from relay_toml import TomlMissingError, load_path as _load_toml_path
+from relay_toml import TomlMissingError, load_path as _load_toml_path, loads as _load_toml_text
 
 
 def _read_toml(path: str) -> Dict:
@@ -37,12 +58,29 @@ def _collect_persona_list(values) -> List[str]:
     return result
 
 
+_SPLIT_DIRECTIONS = {
+    "h": "h",
+    "horizontal": "h",
+    "v": "v",
+    "vertical": "v",
+}
+
+
+def _normalize_split(value) -> str:
+    if not isinstance(value, str):
+        return ""
+    return _SPLIT_DIRECTIONS.get(value.strip().lower(), "")
+
+
 def _normalize_pane(entry, default_dir: str) -> Dict:
     pane: Dict = {
         "run": "",
         "dir": "",
         "name": "",
+        "split": "",
         "personas": [],
+        "after": [],
+        "ready": {},
     }
     if isinstance(entry, str):
         pane["run"] = entry.strip()
@@ -54,11 +92,43 @@ def _normalize_pane(entry, default_dir: str) -> Dict:
     pane["run"] = _clean_string(run_value)
     pane["dir"] = _clean_string(entry.get("dir"), default=default_dir)
     pane["name"] = _clean_string(entry.get("name"))
+    pane["split"] = _normalize_split(entry.get("split"))
     pane["personas"] = _collect_persona_list(entry.get("personas"))
+    after = entry.get("after")
+    pane["after"] = _collect_persona_list([after] if isinstance(after, str) else after)
+    pane["ready"] = _normalize_ready(entry.get("ready"))
     return pane
 
 
-def _normalize_window(entry, default_dir: str, index: int) -> Dict:
+_DEFAULT_READY_TIMEOUT = 60
+
+
+def _normalize_ready(value) -> Dict:
+    """``ready = { file = ..., port = ..., output = ..., timeout = ... }`` as checks and a timeout."""
+    if not isinstance(value, dict):
+        return {}
+    checks: List[str] = []
+    path = _clean_string(value.get("file"))
+    if path:
+        checks.append(f"file:{path}")
+    port = value.get("port")
+    if isinstance(port, int) and not isinstance(port, bool):
+        port = str(port)
+    port = _clean_string(port)
+    if port:
+        checks.append(f"port:{port if ':' in port else '127.0.0.1:' + port}")
+    pattern = value.get("output")
+    if isinstance(pattern, str) and pattern:
+        checks.append(f"output:{pattern}")
+    if not checks:
+        return {}
+    timeout = value.get("timeout", _DEFAULT_READY_TIMEOUT)
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+        timeout = _DEFAULT_READY_TIMEOUT
+    return {"checks": checks, "timeout": int(timeout)}
+
+
+def _normalize_window(entry, default_dir: str, index: int, lazy: bool = False) -> Dict:
     window_dir = _clean_string(entry.get("dir"), default=default_dir)
     panes_raw = entry.get("panes") or []
     panes: List[Dict] = []
@@ -71,6 +141,7 @@ def _normalize_window(entry, default_dir: str, index: int) -> Dict:
         "name": _clean_string(entry.get("name"), default=f"window{index + 1}"),
         "layout": _clean_string(entry.get("layout")),
         "dir": window_dir,
+        "lazy": bool(entry.get("lazy", lazy)),
         "panes": panes,
     }
 
@@ -86,12 +157,234 @@ def _commands_to_window(commands, default_dir: str) -> Dict:
         "name": "main",
         "layout": "",
         "dir": default_dir,
+        "lazy": False,
         "panes": panes,
     }
 
 
+class KitConfigError(ValueError):
+    """Raised for unknown fragments, include cycles and bad template parameters."""
+
+
+def default_state_dir() -> str:
+    return os.environ.get("RELAY_STATE_DIR") or os.path.join(
+        os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state"), "relay"
+    )
+
+
+def fragments_dir(kits_dir: str) -> str:
+    configured = os.environ.get("RELAY_FRAGMENTS_DIR")
+    if configured:
+        return os.path.abspath(configured)
+    return os.path.join(os.path.dirname(os.path.abspath(kits_dir).rstrip("/")), "fragments")
+
+
+def fragments_signature(directory: str) -> Tuple[int, int]:
+    """``(newest mtime_ns, file count)`` over a fragments directory, its subdirectories and ``*.toml`` files."""
+    newest, count = 0, 0
+    try:
+        newest = os.stat(directory).st_mtime_ns
+        with os.scandir(directory) as listing:
+            entries = list(listing)
+    except OSError:
+        return 0, 0
+    for entry in entries:
+        if entry.name.startswith("."):
+            continue
+        try:
+            if entry.is_dir():
+                newest = max(newest, entry.stat().st_mtime_ns)
+                with os.scandir(entry.path) as nested:
+                    files = [item for item in nested if item.name.endswith(".toml")]
+            elif entry.name.endswith(".toml"):
+                files = [entry]
+            else:
+                continue
+            for item in files:
+                newest = max(newest, item.stat().st_mtime_ns)
+                count += 1
+        except OSError:
+            continue
+    return newest, count
+
+
+# At most one directory level ("monitoring/api"), which the shell index check also covers.
+_FRAGMENT_NAME_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*(/[A-Za-z0-9_][A-Za-z0-9_.-]*)?$")
+_PARAM_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_-]*)\s*\}\}")
+_MAX_FRAGMENT_DEPTH = 16
+# path -> ((mtime_ns, size, inode), parsed document); parsed documents are shared, never mutated.
+_fragment_memo: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
+fragment_stats = {"parsed": 0, "cached": 0, "memo": 0}
+
+
+def _fragment_cache_dir() -> Optional[str]:
+    if os.environ.get("RELAY_FRAGMENT_CACHE_DISABLE", "0") == "1":
+        return None
+    return os.path.join(default_state_dir(), "cache", "fragments")
+
+
+def _cached_fragment(cache_dir: Optional[str], digest: str) -> Optional[Dict]:
+    if not cache_dir:
+        return None
+    import json
+
+    try:
+        with open(os.path.join(cache_dir, digest + ".json"), encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _store_fragment(cache_dir: Optional[str], digest: str, data: Dict) -> None:
+    if not cache_dir:
+        return
+    import json
+    import tempfile
+
+    try:
+        text = json.dumps(data)
+    except (TypeError, ValueError):
+        # TOML dates have no JSON form; such fragments are just re-parsed.
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=".fragment.")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(tmp, os.path.join(cache_dir, digest + ".json"))
+    except OSError:
+        pass
+
+
+def load_fragment(path: str) -> Dict:
+    """Parse a fragment file, reusing this process's copy or the content-hash cache."""
+    try:
+        st = os.stat(path)
+    except OSError as exc:
+        raise KitConfigError(f"fragment not found: {path}") from exc
+    key = (st.st_mtime_ns, st.st_size, st.st_ino)
+    memo = _fragment_memo.get(path)
+    if memo is not None and memo[0] == key:
+        fragment_stats["memo"] += 1
+        return memo[1]
+    import hashlib
+
+    with open(path, "rb") as handle:
+        raw = handle.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_dir = _fragment_cache_dir()
+    data = _cached_fragment(cache_dir, digest)
+    if data is None:
+        data = _load_toml_text(raw) or {}
+        fragment_stats["parsed"] += 1
+        _store_fragment(cache_dir, digest, data)
+    else:
+        fragment_stats["cached"] += 1
+    _fragment_memo[path] = (key, data)
+    return data
+
+
+def _fragment_path(directory: str, name) -> str:
+    if not isinstance(name, str) or not _FRAGMENT_NAME_RE.match(name.strip()) or ".." in name:
+        raise KitConfigError(f"invalid fragment name: {name!r}")
+    return os.path.join(directory, name.strip() + ".toml")
+
+
+def _substitute(value, params: Dict[str, str]):
+    if isinstance(value, str):
+        if "{{" not in value:
+            return value
+        return _PARAM_RE.sub(lambda match: params.get(match.group(1), match.group(0)), value)
+    if isinstance(value, list):
+        return [_substitute(item, params) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, params) for key, item in value.items()}
+    return value
+
+
+def _param_table(value) -> Dict[str, str]:
+    if not isinstance(value, dict):
+        return {}
+    return {str(key): str(item) for key, item in value.items() if not isinstance(item, (dict, list))}
+
+
+class _Composer:
+    """Resolve ``extends`` and window ``include`` for one kit, recording the fragment files used."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.sources: List[str] = []
+
+    def _fragment(self, name, context: Dict[str, str], given: Dict[str, str], chain: Tuple[str, ...]) -> Dict:
+        path = _fragment_path(self.directory, name)
+        if path in chain:
+            raise KitConfigError("fragment cycle: " + " -> ".join(os.path.basename(item) for item in chain + (path,)))
+        if len(chain) >= _MAX_FRAGMENT_DEPTH:
+            raise KitConfigError(f"fragments nested deeper than {_MAX_FRAGMENT_DEPTH}: {name}")
+        data = load_fragment(path)
+        if path not in self.sources:
+            self.sources.append(path)
+        declared = _param_table(data.get("params"))
+        unknown = sorted(set(given) - set(declared))
+        if unknown:
+            raise KitConfigError(f"fragment {name} has no parameter(s): {', '.join(unknown)}")
+        params = dict(declared)
+        params.update({key: value for key, value in context.items() if key in declared})
+        params.update(given)
+        return self.resolve(data, params, chain + (path,))
+
+    def resolve(self, data: Dict, params: Dict[str, str], chain: Tuple[str, ...] = ()) -> Dict:
+        document = {key: value for key, value in data.items() if key not in ("params", "extends")}
+        if params:
+            document = _substitute(document, params)
+        extends = data.get("extends") or []
+        if isinstance(extends, str):
+            extends = [extends]
+        merged: Dict = {}
+        for name in extends:
+            merged = _merge(merged, self._fragment(name, params, {}, chain))
+        merged = _merge(merged, document)
+        windows = merged.get("windows")
+        if isinstance(windows, list) and any(isinstance(entry, dict) and "include" in entry for entry in windows):
+            expanded: List = []
+            for entry in windows:
+                if isinstance(entry, dict) and "include" in entry:
+                    given = _param_table(entry.get("with"))
+                    included = self._fragment(entry["include"], params, given, chain)
+                    expanded.extend(item for item in included.get("windows") or [] if isinstance(item, dict))
+                else:
+                    expanded.append(entry)
+            merged["windows"] = expanded
+        return merged
+
+
+def _merge(base: Dict, over: Dict) -> Dict:
+    merged = dict(base)
+    for key, value in over.items():
+        if key == "windows" and isinstance(value, list) and isinstance(merged.get(key), list):
+            merged[key] = merged[key] + value
+        elif key == "personas" and isinstance(value, list) and isinstance(merged.get(key), list):
+            merged[key] = merged[key] + [name for name in value if name not in merged[key]]
+        else:
+            merged[key] = value
+    return merged
+
+
+def _uses_fragments(data: Dict) -> bool:
+    if data.get("extends") or data.get("params"):
+        return True
+    windows = data.get("windows")
+    return isinstance(windows, list) and any(isinstance(entry, dict) and "include" in entry for entry in windows)
+
+
 def load_kit_config(kit_file: str, kit_dir: str) -> Dict:
     data = _read_toml(kit_file)
+    fragments: List[str] = []
+    if _uses_fragments(data):
+        composer = _Composer(fragments_dir(os.path.dirname(os.path.abspath(kit_dir).rstrip("/"))))
+        data = composer.resolve(data, _param_table(data.get("params")))
+        fragments = composer.sources
     session = _clean_string(data.get("session"), default=os.path.basename(kit_dir))
     workdir = _clean_string(data.get("dir"), default=kit_dir)
     attach = bool(data.get("attach", True))
@@ -109,11 +402,12 @@ def load_kit_config(kit_file: str, kit_dir: str) -> Dict:
     if isinstance(windows_raw, list) and windows_raw:
         for idx, entry in enumerate(windows_raw):
             if isinstance(entry, dict):
-                windows.append(_normalize_window(entry, workdir, idx))
+                windows.append(_normalize_window(entry, workdir, idx, bool(data.get("lazy", False))))
     else:
         commands = data.get("commands") or []
         if commands:
             windows.append(_commands_to_window(commands, workdir))
+    _resolve_after(windows)
 
     return {
         "session": session or os.path.basename(kit_dir),
@@ -121,9 +415,66 @@ def load_kit_config(kit_file: str, kit_dir: str) -> Dict:
         "attach": attach,
         "windows": windows,
         "kit_personas": personas,
+        "fragments": fragments,
     }
 
 
+def _resolve_after(windows: List[Dict]) -> None:
+    """Turn each pane's ``after`` references into the checks it must wait for.
+
+    A reference is a pane ``name`` or its ``<window>.<pane>`` number (from 1).
+    Every pane gets ``wait`` (checks), ``wait_for`` (the references),
+    ``wait_timeout`` and ``key``; ``key`` is set on panes whose output another
+    pane watches, so the launcher can tag them for ``capture-pane``.
+    """
+    refs: Dict[str, Dict] = {}
+    for window in windows:
+        for pane in window["panes"]:
+            pane["key"] = f"{window['index'] + 1}.{pane['index'] + 1}"
+            refs.setdefault(pane["key"], pane)
+    for window in windows:
+        for pane in window["panes"]:
+            if pane["name"]:
+                refs.setdefault(pane["name"], pane)
+    watched = set()
+    for window in windows:
+        for pane in window["panes"]:
+            checks: List[str] = []
+            timeout = 0
+            for ref in pane["after"]:
+                target = refs.get(ref)
+                if target is None:
+                    raise KitConfigError(f"pane {pane['name'] or pane['key']}: after refers to unknown pane {ref!r}")
+                _check_after_cycle(refs, target, pane)
+                ready = target["ready"]
+                for check in ready.get("checks", []):
+                    if check.startswith("output:"):
+                        check = f"output:{target['key']}:{check[len('output:'):]}"
+                        watched.add(id(target))
+                    if check not in checks:
+                        checks.append(check)
+                timeout = max(timeout, ready.get("timeout", 0))
+            pane["wait"] = checks
+            pane["wait_for"] = list(pane["after"])
+            pane["wait_timeout"] = timeout
+    for window in windows:
+        for pane in window["panes"]:
+            if id(pane) not in watched:
+                pane["key"] = ""
+
+
+def _check_after_cycle(refs: Dict[str, Dict], start: Dict, pane: Dict) -> None:
+    pending, seen = [start], set()
+    while pending:
+        current = pending.pop()
+        if current is pane:
+            raise KitConfigError(f"pane {pane['name'] or pane['key']}: after forms a cycle")
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        pending.extend(refs[ref] for ref in current["after"] if ref in refs)
+
+
 def pane_overlay_path(kit_dir: str) -> str:
     return os.path.join(kit_dir, "pane-personas.json")
 
@@ -132,6 +483,8 @@ def load_pane_overlays(kit_dir: str) -> Dict[str, List[str]]:
     path = pane_overlay_path(kit_dir)
     if not os.path.isfile(path):
         return {}
+    import json
+
     try:
         with open(path, "r", encoding="utf-8") as handle:
             data = json.load(handle) or {}
@@ -151,6 +504,8 @@ def load_pane_overlays(kit_dir: str) -> Dict[str, List[str]]:
 
 
 def save_pane_overlays(kit_dir: str, overlays: Dict[str, List[str]]) -> str:
+    import json
+
     path = pane_overlay_path(kit_dir)
     payload = {
         "version": 1,
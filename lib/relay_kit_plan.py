@@ -0,0 +1,205 @@
+"""Compile kit.toml files into the launch plans ``relay-kit`` executes.
+
+A plan is a line protocol the shell launcher reads without python:
+
+* ``DEP:<path>`` lines first, one per file the plan was built from; the
+  shell keys its plan cache on their checksums.
+* ``SESSION:``, ``DIR:``, ``ATTACH:``, ``PANES:`` (the number of ``CMD::``
+  records) and ``PERSONA:`` records for the kit.
+* One ``STACK::`` record per distinct persona stack of a pane (the kit's
+  personas, then the pane's): the newline-separated names and the lines
+  ``relay persona resolve`` prints for them, which dry runs show.  The
+  personas they extend are ``DEP:`` lines too.
+* One ``WINDOW::`` record per window (index, name, dir, layout, retile,
+  lazy), each followed by the ``CMD::`` records of its panes (window and pane
+  index, run, personas, name, dir, split, then the readiness checks the pane
+  waits for, the panes they belong to, the wait timeout and the key of a pane
+  whose output others watch).  Their fields are single-quoted shell words (newlines spelled
+  ``"$NL"``), so every record stays on one line and the launcher walks the
+  plan once, taking each record in with a single ``eval "set -- ..."``.
+
+Usage: ``python3 -m relay_kit_plan <personas_dir> (<kit_file> <kit_name>
+<kit_dir> <output>)...`` where an output of ``-`` prints to stdout.  Kits that
+fail to parse are reported on stderr and skipped; the exit status is then
+non-zero.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from relay_kit_config import (
+    KitConfigError,
+    dedupe_personas,
+    load_kit_config,
+    load_pane_overlays,
+    overlay_key,
+    pane_overlay_path,
+)
+from relay_persona_graph import PersonaError, resolve_stack, stack_report
+from relay_toml import TomlMissingError
+from relay_trace import span
+
+# The plan layout described above; PLAN_FORMAT in bin/relay-kit must match.
+PLAN_FORMAT = 6
+
+
+def sh_word(value: str) -> str:
+    # Single-quoted shell word the launcher can eval; newlines become "$NL" so
+    # every plan record stays on one line.
+    if not value:
+        return "''"
+    quoted = value.replace("'", "'\\''").replace("\n", "'\"$NL\"'")
+    return f"'{quoted}'"
+
+
+def compile_plan(kit_file: str, kit_dir: str, personas_dir: str) -> List[str]:
+    kit = os.path.basename(kit_dir.rstrip("/"))
+    with span("kit.parse", kit=kit):
+        config = load_kit_config(kit_file, kit_dir)
+    with span("kit.overlays", kit=kit):
+        overlays = load_pane_overlays(kit_dir)
+        # Files the plan depends on; the shell keys the plan cache on their checksums.
+        referenced = dedupe_personas(
+            config.get("kit_personas", []),
+            *[pane.get("personas", []) for window in config.get("windows", []) for pane in window.get("panes", [])],
+            *overlays.values(),
+        )
+    stacks: Dict[str, List[str]] = {}
+    if personas_dir:
+        with span("kit.personas", kit=kit):
+            for window in config.get("windows", []):
+                for pane in window.get("panes", []):
+                    names = config.get("kit_personas", []) + _pane_personas(overlays, window, pane)
+                    key = "\n".join(names)
+                    if not names or key in stacks:
+                        continue
+                    try:
+                        stacks[key] = stack_report(resolve_stack(personas_dir, names, referenced))
+                    except PersonaError as exc:
+                        stacks[key] = [f"Stack: unresolved ({exc})"]
+    with span("kit.merge", kit=kit):
+        return _plan_lines(config, overlays, referenced, stacks, kit_file, kit_dir, personas_dir)
+
+
+def _pane_personas(overlays: dict, window: dict, pane: dict) -> List[str]:
+    return dedupe_personas(
+        pane.get("personas", []),
+        overlays.get(overlay_key(window["index"], pane["index"]), []),
+    )
+
+
+def _plan_lines(
+    config: dict,
+    overlays: dict,
+    referenced: List[str],
+    stacks: Dict[str, List[str]],
+    kit_file: str,
+    kit_dir: str,
+    personas_dir: str,
+) -> List[str]:
+    lines = []
+    lines.append(f"DEP:{kit_file}")
+    lines.append(f"DEP:{pane_overlay_path(kit_dir)}")
+    for fragment in config.get("fragments", []):
+        lines.append(f"DEP:{fragment}")
+    if personas_dir:
+        for persona in referenced:
+            lines.append(f"DEP:{os.path.join(personas_dir, persona, 'persona.toml')}")
+
+    lines.append(f"SESSION:{config['session']}")
+    lines.append(f"DIR:{config['workdir']}")
+    lines.append(f"ATTACH:{1 if config.get('attach', True) else 0}")
+    lines.append(f"PANES:{sum(len(window.get('panes', [])) for window in config.get('windows', []))}")
+
+    for persona in config.get("kit_personas", []):
+        lines.append(f"PERSONA:{persona}")
+    for names, report in stacks.items():
+        lines.append("STACK:: {} {}".format(sh_word(names), sh_word("\n".join(report))))
+
+    for window in config.get("windows", []):
+        panes = window.get("panes", [])
+        # Re-tile after every split unless the panes spell out their own split
+        # directions without a layout; otherwise large windows run out of room.
+        retile = bool(window.get("layout")) or not any(pane.get("split") for pane in panes)
+        lines.append(
+            "WINDOW:: {} {} {} {} {} {}".format(
+                window["index"],
+                sh_word(window.get("name", "")),
+                sh_word(window.get("dir", "")),
+                sh_word(window.get("layout", "")),
+                1 if retile else 0,
+                1 if window.get("lazy") else 0,
+            )
+        )
+        for pane in panes:
+            run = (pane.get("run") or "").strip()
+            persona_blob = "\n".join(_pane_personas(overlays, window, pane))
+            lines.append(
+                "CMD:: {} {} {} {} {} {} {} {} {} {} {}".format(
+                    window["index"],
+                    pane["index"],
+                    sh_word(run),
+                    sh_word(persona_blob),
+                    sh_word(pane.get("name", "")),
+                    sh_word(pane.get("dir", "")),
+                    sh_word(pane.get("split", "")),
+                    sh_word("\n".join(pane.get("wait", []))),
+                    sh_word(", ".join(pane.get("wait_for", []))),
+                    pane.get("wait_timeout", 0),
+                    sh_word(pane.get("key", "")),
+                )
+            )
+    return lines
+
+
+def plan_deps(lines: Sequence[str]) -> List[str]:
+    """Return the ``DEP:`` paths at the top of a compiled plan."""
+    deps = []
+    for line in lines:
+        if not line.startswith("DEP:"):
+            break
+        deps.append(line[4:])
+    return deps
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if not args:
+        print("usage: relay_kit_plan <personas_dir> (<kit_file> <kit_name> <kit_dir> <output>)...", file=sys.stderr)
+        return 2
+    personas_dir = args[0]
+    jobs = args[1:]
+    single = len(jobs) == 4
+    failed = False
+    for offset in range(0, len(jobs) - 3, 4):
+        kit_file, kit_name, kit_dir, output = jobs[offset : offset + 4]
+        try:
+            lines = compile_plan(kit_file, kit_dir, personas_dir)
+        except TomlMissingError as exc:
+            print(exc, file=sys.stderr)
+            return 3
+        except KitConfigError as exc:
+            print(f"Failed to parse kit {kit_name}: {exc}", file=sys.stderr)
+            if single:
+                return 1
+            failed = True
+            continue
+        except Exception as exc:  # noqa: BLE001 - report and keep compiling the rest
+            if single:
+                raise
+            print(f"Failed to parse kit {kit_name}: {exc}", file=sys.stderr)
+            failed = True
+            continue
+        text = "\n".join(lines) + "\n"
+        if output == "-":
+            sys.stdout.write(text)
+        else:
+            with open(output, "w", encoding="utf-8") as handle:
+                handle.write(text)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
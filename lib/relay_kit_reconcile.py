@@ -0,0 +1,240 @@
+"""Work out how to bring a running kit session in line with its kit.toml.
+
+``relay kit reconcile`` passes three things here: the freshly compiled plan,
+the plan the running session was last built from (``<kit>.applied`` next to
+the plan cache, or ``-`` when there is none) and, on stdin, one
+``tmux list-panes -s`` listing of the session::
+
+    <window_id> <window_index> <pane_id> <pane_index> <window_name>
+
+Windows are matched by name, then (for renames) by their position in the
+last plan; panes by their order within the window.  A pane whose command,
+personas, directory or readiness checks are unchanged, in a window whose
+``lazy`` flag is unchanged, is left running.  The
+output is one action record per line, in the plan's quoting, for the shell
+to apply:
+
+* ``RENAME:: <window_id> <name>`` and ``TITLE:: <pane_id> <name>``
+* ``TAG:: <pane_id> <key>``: the ``@relay_pane`` key other panes watch
+* ``RESPAWN:: <pane_id> <lazy> <CMD fields>``: restart the pane with a new
+  command, parked until the window is selected when ``lazy`` is 1
+* ``SPLIT:: <target> <window_id> <lazy> <CMD fields>``: add a pane to a window
+* ``NEWWINDOW:: <after_window_id> <WINDOW fields>``, then ``PANE::`` records
+  with the ``CMD`` fields of each of its panes
+* ``LAYOUT:: <window_id> <layout> <retile>``: re-lay out a changed window (an
+  empty id is the window created last)
+* ``KILLPANE:: <pane_id>`` and ``KILLWINDOW:: <window_id>``
+* ``KEEP:: <count>``: the number of panes left running
+
+Windows and panes the last plan did not create are never removed, and
+without a last plan every existing pane is kept.  ``--describe`` prints the
+same actions for people instead.
+"""
+from __future__ import annotations
+
+import shlex
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from relay_kit_plan import sh_word
+
+
+class PlanWindow:
+    __slots__ = ("fields", "raw", "panes")
+
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+        self.fields = shlex.split(raw)
+        self.panes: List[Tuple[List[str], str]] = []
+
+    @property
+    def name(self) -> str:
+        return self.fields[1] if len(self.fields) > 1 else ""
+
+    @property
+    def layout(self) -> str:
+        return self.fields[3] if len(self.fields) > 3 else ""
+
+    @property
+    def retile(self) -> str:
+        return self.fields[4] if len(self.fields) > 4 else "1"
+
+    @property
+    def lazy(self) -> str:
+        return self.fields[5] if len(self.fields) > 5 else "0"
+
+
+class Plan:
+    def __init__(self, lines: Sequence[str]) -> None:
+        self.kit: List[str] = []
+        self.windows: List[PlanWindow] = []
+        for line in lines:
+            if line.startswith("WINDOW:: "):
+                self.windows.append(PlanWindow(line[len("WINDOW:: ") :]))
+            elif line.startswith("CMD:: ") and self.windows:
+                raw = line[len("CMD:: ") :]
+                self.windows[-1].panes.append((shlex.split(raw), raw))
+            elif line.startswith(("DIR:", "PERSONA:")):
+                self.kit.append(line)
+
+
+def _read_plan(path: str) -> Optional[Plan]:
+    if not path or path == "-":
+        return None
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return Plan(handle.read().splitlines())
+    except OSError:
+        return None
+
+
+def _field(fields: List[str], index: int) -> str:
+    return fields[index] if len(fields) > index else ""
+
+
+def _spec(kit: List[str], fields: List[str]) -> Tuple:
+    # What the pane runs: command, personas, dir and readiness checks, plus the
+    # kit-wide dir and personas every pane command is built with.
+    return (tuple(kit),) + tuple(_field(fields, index) for index in (2, 3, 5, 7, 8, 9))
+
+
+def _live_windows(listing: Sequence[str]) -> List[Dict]:
+    windows: Dict[str, Dict] = {}
+    for line in listing:
+        # The window name comes last: it is the one field that may hold spaces.
+        parts = line.rstrip("\n").split(" ", 4)
+        if len(parts) < 5 or not parts[1].isdigit() or not parts[3].isdigit():
+            continue
+        window = windows.setdefault(parts[0], {"id": parts[0], "index": int(parts[1]), "name": parts[4], "panes": []})
+        window["panes"].append((int(parts[3]), parts[2]))
+    ordered = sorted(windows.values(), key=lambda window: window["index"])
+    for window in ordered:
+        window["panes"] = [pane_id for _, pane_id in sorted(window["panes"])]
+    return ordered
+
+
+def reconcile(new: Plan, old: Optional[Plan], listing: Sequence[str]) -> List[Tuple]:
+    live = _live_windows(listing)
+    unused = list(live)
+    new_names = {window.name for window in new.windows}
+    actions: List[Tuple] = []
+    kept = 0
+    previous_id = ""
+    for position, window in enumerate(new.windows):
+        if not window.panes:
+            # The launcher creates no window without panes either.
+            continue
+        match = next((item for item in unused if item["name"] == window.name), None)
+        before: Optional[PlanWindow] = None
+        if old is not None:
+            before = next((item for item in old.windows if item.name == window.name), None)
+        if match is None and old is not None and position < len(old.windows):
+            # A window renamed in place: same slot in the last plan, old name gone.
+            renamed = old.windows[position]
+            if renamed.name not in new_names:
+                match = next((item for item in unused if item["name"] == renamed.name), None)
+                if match is not None:
+                    before = renamed
+                    actions.append(("RENAME", match["id"], window.name))
+        if match is None:
+            actions.append(("NEWWINDOW", previous_id, window.raw))
+            actions.extend(("PANE", raw) for _, raw in window.panes)
+            if window.layout or len(window.panes) > 1:
+                actions.append(("LAYOUT", "", window.layout, window.retile))
+            previous_id = ""
+            continue
+        unused.remove(match)
+        previous_id = match["id"]
+        old_panes = before.panes if before is not None else []
+        changed = before is not None and before.layout != window.layout
+        # Panes of a window that turned lazy (or eager) start differently.
+        relaunch = before is not None and before.lazy != window.lazy
+        for index, (fields, raw) in enumerate(window.panes):
+            if index >= len(match["panes"]):
+                target = match["panes"][-1] if index == len(match["panes"]) else match["id"]
+                actions.append(("SPLIT", target, match["id"], window.lazy, raw))
+                changed = True
+                continue
+            pane_id = match["panes"][index]
+            if index < len(old_panes):
+                old_fields = old_panes[index][0]
+                if relaunch or _spec(old.kit, old_fields) != _spec(new.kit, fields):
+                    actions.append(("RESPAWN", pane_id, window.lazy, raw))
+                    continue
+                if _field(old_fields, 4) != _field(fields, 4) and _field(fields, 4):
+                    actions.append(("TITLE", pane_id, _field(fields, 4)))
+                if _field(old_fields, 10) != _field(fields, 10) and _field(fields, 10):
+                    actions.append(("TAG", pane_id, _field(fields, 10)))
+            kept += 1
+        for index in range(len(window.panes), min(len(match["panes"]), len(old_panes))):
+            actions.append(("KILLPANE", match["panes"][index]))
+            changed = True
+        if changed:
+            actions.append(("LAYOUT", match["id"], window.layout, window.retile))
+    if old is not None:
+        old_names = {window.name for window in old.windows}
+        for window in unused:
+            if window["name"] in old_names:
+                actions.append(("KILLWINDOW", window["id"]))
+    actions.append(("KEEP", str(kept)))
+    return actions
+
+
+def _record(action: Tuple) -> str:
+    kind, *args = action
+    if kind in ("RESPAWN", "SPLIT", "NEWWINDOW", "PANE"):
+        # The last field is a raw plan record tail, already quoted.
+        words = [sh_word(arg) for arg in args[:-1]] + [args[-1]]
+    else:
+        words = [sh_word(arg) for arg in args]
+    return f"{kind}:: " + " ".join(words)
+
+
+def describe(action: Tuple) -> Optional[str]:
+    kind, *args = action
+    if kind in ("RESPAWN", "SPLIT", "PANE"):
+        fields = shlex.split(args[-1])
+        label = f"pane {int(fields[0]) + 1}.{int(fields[1]) + 1}" + (f" ({fields[4]})" if _field(fields, 4) else "")
+        verb = {"RESPAWN": "restart", "SPLIT": "add", "PANE": "add"}[kind]
+        return f"{verb} {label}: {_field(fields, 2) or '(no command)'}"
+    if kind == "NEWWINDOW":
+        fields = shlex.split(args[-1])
+        return f"add window {int(fields[0]) + 1} ({_field(fields, 1)})"
+    if kind == "RENAME":
+        return f"rename window {args[0]} to {args[1]}"
+    if kind == "TITLE":
+        return f"retitle pane {args[0]} to {args[1]}"
+    if kind == "TAG":
+        return f"tag pane {args[0]} as {args[1]}"
+    if kind == "LAYOUT":
+        return f"re-layout window {args[0]}" if args[0] else None
+    if kind == "KILLPANE":
+        return f"remove pane {args[0]}"
+    if kind == "KILLWINDOW":
+        return f"remove window {args[0]}"
+    if kind == "KEEP":
+        return f"keep {args[0]} running pane(s)"
+    return None
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    describe_only = "--describe" in args
+    args = [arg for arg in args if arg != "--describe"]
+    if len(args) != 2:
+        print("usage: relay_kit_reconcile [--describe] <plan> <applied_plan|->", file=sys.stderr)
+        return 2
+    new = _read_plan(args[0])
+    if new is None:
+        print(f"Unable to read plan {args[0]}", file=sys.stderr)
+        return 2
+    actions = reconcile(new, _read_plan(args[1]), sys.stdin.read().splitlines())
+    for action in actions:
+        line = describe(action) if describe_only else _record(action)
+        if line:
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
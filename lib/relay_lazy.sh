@@ -0,0 +1,15 @@
+# shellcheck shell=sh
+# Start the deferred pane commands of a lazy kit window (see relay-kit
+# start_kit). The launcher parks each command in a tmux buffer named by the
+# pane's @relay_lazy option and hooks session-window-changed to run:
+#   sh relay_lazy.sh <target-window>
+# which pastes every parked command into its pane once and drops the buffer.
+# tmux delivers the window changes of the launch itself after the launch, so
+# windows that are no longer the session's current one are left alone.
+
+tmux list-panes -t "$1" -F '#{pane_id} #{window_active} #{@relay_lazy}' 2>/dev/null |
+  while read -r pane active buffer; do
+    [ "$active" = "1" ] && [ -n "$buffer" ] || continue
+    tmux set-option -pu -t "$pane" @relay_lazy \; paste-buffer -d -b "$buffer" -t "$pane" \; send-keys -t "$pane" C-m
+  done
+exit 0
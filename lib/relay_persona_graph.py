@@ -0,0 +1,233 @@
+"""Resolve a persona stack, ``extends`` included, into one effective environment.
+
+A persona may build on others::
+
+    extends = ["base", "ssh"]        # or: extends = "base"
+
+``relay persona exec a b`` applies ``a`` then ``b``, each preceded by the
+personas it extends (depth first, in the order listed).  Every persona is
+applied once, where it first appears, so two personas extending ``base``
+share one ``base`` underneath them; a cycle is an error.
+
+``resolve_stack`` reads each persona file once and computes the stack's
+effective environment: the last value given to each variable, the variables
+that personas in the stack set to different values (``conflicts``), and the
+PATH segments placed around the caller's ``PATH``.  A later persona's
+``prepend`` entries come first, as if the personas were applied one after
+another, but each segment appears once: in the final ``PATH`` only the first
+occurrence of a segment is kept, including segments the caller's ``PATH``
+already had.
+
+``stack_script`` renders the result as the export script ``relay-persona``
+caches per stack.  Its comment lines name every persona applied with the
+POSIX ``cksum`` of the bytes that were parsed, so the shell can tell a stale
+script from a fresh one without python::
+
+    # relay-persona-stack 2 /home/me/.local/share/relay/personas
+    # persona 2330645466 48 base
+    # persona 1416180330 61 work
+    # conflict GIT_AUTHOR_EMAIL: base, work (work wins)
+    export GIT_AUTHOR_EMAIL=me@work.example
+"""
+from __future__ import annotations
+
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from relay_trace import span
+
+
+class PersonaError(ValueError):
+    """A persona in the stack is missing, invalid or extends itself."""
+
+
+def persona_path(personas_dir: str, name: str) -> str:
+    return os.path.join(personas_dir, name, "persona.toml")
+
+
+def _valid_name(name: str) -> bool:
+    # The same rule as validate_identifier in relay-persona.
+    return bool(name) and not name.startswith(".") and "/" not in name and ".." not in name
+
+
+def persona_extends(data: Dict, name: str) -> List[str]:
+    value = data.get("extends")
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise PersonaError(f"Persona {name}: extends must be a persona name or a list of names")
+    return [item.strip() for item in value if item.strip()]
+
+
+_CRC_TABLE: List[int] = []
+
+
+def cksum(data: bytes) -> int:
+    """The CRC printed by POSIX ``cksum``."""
+    if not _CRC_TABLE:
+        for index in range(256):
+            crc = index << 24
+            for _ in range(8):
+                crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+            _CRC_TABLE.append(crc & 0xFFFFFFFF)
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _CRC_TABLE[(crc >> 24) ^ byte]
+    length = len(data)
+    while length:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _CRC_TABLE[(crc >> 24) ^ (length & 0xFF)]
+        length >>= 8
+    return ~crc & 0xFFFFFFFF
+
+
+def dedupe_path(segments: Sequence[str]) -> List[str]:
+    """Drop empty and repeated PATH segments, keeping the first of each."""
+    seen = set()
+    result = []
+    for segment in segments:
+        if segment and segment not in seen:
+            seen.add(segment)
+            result.append(segment)
+    return result
+
+
+class PersonaStack:
+    """The effective environment of a resolved persona stack."""
+
+    __slots__ = ("order", "files", "env", "conflicts", "prepend", "append")
+
+    def __init__(self) -> None:
+        # (name, crc, size, mtime) of every persona applied, in order.
+        self.files: List[Tuple[str, int, int, int]] = []
+        self.order: List[str] = []
+        self.env: Dict[str, str] = {}
+        self.conflicts: List[Tuple[str, List[str]]] = []
+        self.prepend: List[str] = []
+        self.append: List[str] = []
+
+    def path(self, current: str) -> str:
+        return ":".join(dedupe_path(self.prepend + current.split(":") + self.append))
+
+
+def _read(personas_dir: str, name: str, extended_by: Optional[str]) -> Tuple[Dict, int, int, int]:
+    from relay_toml import loads
+
+    path = persona_path(personas_dir, name)
+    try:
+        with open(path, "rb") as handle:
+            raw = handle.read()
+            mtime = int(os.fstat(handle.fileno()).st_mtime)
+    except OSError:
+        suffix = f" (extended by {extended_by})" if extended_by else ""
+        raise PersonaError(f"Persona not found: {name}{suffix}") from None
+    with span("persona.parse", persona=name):
+        try:
+            data = loads(raw) or {}
+        except ValueError as exc:
+            raise PersonaError(f"Invalid persona.toml for {name}: {exc}") from None
+    return data, cksum(raw), len(raw), mtime
+
+
+def resolve_stack(personas_dir: str, names: Sequence[str], seen: Optional[List[str]] = None) -> PersonaStack:
+    """Resolve ``names`` (applied in order) and everything they extend.
+
+    Every persona looked at, found or not, is added to ``seen`` when given.
+    """
+    loaded: Dict[str, Dict] = {}
+    stack = PersonaStack()
+
+    def visit(name: str, chain: Tuple[str, ...]) -> None:
+        if name in chain:
+            raise PersonaError("Persona extends cycle: " + " -> ".join(chain + (name,)))
+        if name in loaded:
+            return
+        if not _valid_name(name):
+            raise PersonaError(f"Invalid persona name: {name}")
+        if seen is not None and name not in seen:
+            seen.append(name)
+        data, crc, size, mtime = _read(personas_dir, name, chain[-1] if chain else None)
+        loaded[name] = data
+        for parent in persona_extends(data, name):
+            visit(parent, chain + (name,))
+        stack.order.append(name)
+        stack.files.append((name, crc, size, mtime))
+
+    for name in names:
+        visit(name, ())
+
+    setters: Dict[str, List[Tuple[str, str]]] = {}
+    prepend_groups = []
+    append: List[str] = []
+    for name in stack.order:
+        data = loaded[name]
+        for key, value in (data.get("env") or {}).items():
+            stack.env[key] = str(value)
+            setters.setdefault(key, []).append((name, str(value)))
+        path_cfg = data.get("path") or {}
+        prepend_groups.append([str(item) for item in (path_cfg.get("prepend") or [])])
+        append.extend(str(item) for item in (path_cfg.get("append") or []))
+    stack.conflicts = [
+        (key, [name for name, _ in history])
+        for key, history in setters.items()
+        if len({value for _, value in history}) > 1
+    ]
+    stack.prepend = dedupe_path([segment for group in reversed(prepend_groups) for segment in group])
+    stack.append = [segment for segment in dedupe_path(append) if segment not in stack.prepend]
+    return stack
+
+
+def _conflict(key: str, names: Sequence[str]) -> str:
+    return f"{key}: {', '.join(names)} ({names[-1]} wins)"
+
+
+def stack_report(stack: PersonaStack) -> List[str]:
+    """The lines ``relay persona resolve`` prints for ``stack``."""
+    lines = ["Stack: " + " -> ".join(stack.order)]
+    if stack.conflicts:
+        lines.append("Conflicts:")
+        lines.extend("  " + _conflict(key, names) for key, names in stack.conflicts)
+    return lines
+
+
+# Splices the stack's segments around the caller's PATH when the script is
+# sourced, keeping the first occurrence of every segment. Builtins only: a
+# warm `relay persona exec` never forks.
+_PATH_BLOCK = """_relay_path=
+while :; do
+  _relay_seg=${_relay_rest%%:*}
+  case $_relay_seg in
+    '') ;;
+    *)
+      case ":$_relay_path:" in
+        *":$_relay_seg:"*) ;;
+        *) _relay_path=${_relay_path:+$_relay_path:}$_relay_seg ;;
+      esac
+      ;;
+  esac
+  case $_relay_rest in
+    *:*) _relay_rest=${_relay_rest#*:} ;;
+    *) break ;;
+  esac
+done
+export PATH="$_relay_path"
+unset _relay_rest _relay_seg _relay_path"""
+
+
+def stack_script(stack: PersonaStack, header: str, quote: Callable[[str], str]) -> str:
+    lines = [header]
+    lines.extend(f"# persona {crc} {size} {name}" for name, crc, size, _ in stack.files)
+    for key, names in stack.conflicts:
+        lines.append("# conflict " + _conflict(key, names))
+    lines.extend(f"export {key}={quote(value)}" for key, value in stack.env.items())
+    if stack.prepend or stack.append:
+        parts = []
+        if stack.prepend:
+            parts.append(quote(":".join(stack.prepend)) + ":")
+        parts.append('"${PATH-}"')
+        if stack.append:
+            parts.append(":" + quote(":".join(stack.append)))
+        lines.append("_relay_rest=" + "".join(parts))
+        lines.append(_PATH_BLOCK)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,260 @@
+"""Pre-rendered preview panes for the fzf lists in ``relay tui``.
+
+fzf runs its ``--preview`` command on every cursor move, and rendering a kit
+or persona preview from scratch costs a ``tmux list-windows``, a status query
+and a python start to parse the TOML.  When a list opens, the TUI runs this
+module once in the background to render every entry into
+``$RELAY_STATE_DIR/cache/previews/<kind>/<name>``; the preview command then
+only has to ``cat`` that file, and falls back to rendering when it is absent.
+
+Each entry is stored with a key built from what its preview shows: the
+config file's ``stat`` and, for kits, the session's window list; for
+personas, whether the persona is active and whether secrets are shown; for
+events, the event log's ``stat`` (rows are numbered newest first, so every
+page moves when an event is added).  A run first removes the entries whose
+key changed, so a stale render is never served once the change has been
+seen, then renders just those.  Output is one summary line::
+
+    kits: 2 rendered, 14 unchanged, 1 removed
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from relay_kit_config import default_state_dir
+
+_KEYS_FILE = ".keys"
+_TMUX_SEPARATOR = "__RELAY_SEP__"
+_WINDOW_FORMAT = _TMUX_SEPARATOR.join(("#{session_name}", "#{window_index}", "#{window_panes}", "#{window_name}"))
+
+Entry = Tuple[str, Callable[[], Optional[str]]]
+
+
+def preview_dir(kind: str, state_dir: Optional[str] = None) -> str:
+    return os.path.join(state_dir or default_state_dir(), "cache", "previews", kind)
+
+
+def _stat_key(path: str) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "-"
+    return f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _write(path: str, text: str) -> None:
+    # fzf may read the entry at any moment: never let it see a partial file.
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    os.replace(temp, path)
+
+
+class PreviewCache:
+    """The rendered previews of one list, and the keys they were rendered for."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, _KEYS_FILE), encoding="utf-8") as handle:
+                keys = json.load(handle)
+        except (OSError, ValueError):
+            keys = {}
+        self.keys: Dict[str, str] = keys if isinstance(keys, dict) else {}
+
+    def refresh(self, entries: Dict[str, Entry]) -> Dict[str, int]:
+        os.makedirs(self.directory, exist_ok=True)
+        stats = {"rendered": 0, "unchanged": 0, "removed": 0}
+        stale = [name for name in self.keys if name not in entries]
+        todo = []
+        for name, (key, _) in entries.items():
+            if self.keys.get(name) == key and os.path.exists(os.path.join(self.directory, name)):
+                stats["unchanged"] += 1
+            else:
+                stale.append(name)
+                todo.append(name)
+        for name in stale:
+            self.keys.pop(name, None)
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        stats["removed"] = len(stale) - len(todo)
+        for name in todo:
+            key, render = entries[name]
+            text = render()
+            if text is None:
+                # Left to the preview command, which reports the error itself.
+                continue
+            _write(os.path.join(self.directory, name), text)
+            self.keys[name] = key
+            stats["rendered"] += 1
+        _write(os.path.join(self.directory, _KEYS_FILE), json.dumps(self.keys, sort_keys=True))
+        return stats
+
+
+def _subdirs(root: str) -> List[str]:
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    return sorted(name for name in names if not name.startswith(".") and os.path.isdir(os.path.join(root, name)))
+
+
+def _indented(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        return "".join(f"  {line}\n" for line in handle.read().splitlines())
+
+
+def _session_windows() -> Dict[str, List[str]]:
+    try:
+        result = subprocess.run(
+            ["tmux", "list-windows", "-a", "-F", _WINDOW_FORMAT], check=False, capture_output=True, text=True
+        )
+    except OSError:
+        return {}
+    sessions: Dict[str, List[str]] = {}
+    for line in result.stdout.splitlines() if result.returncode == 0 else ():
+        fields = line.split(_TMUX_SEPARATOR, 3)
+        if len(fields) != 4:
+            continue
+        session, index, panes, label = fields
+        sessions.setdefault(session, []).append(f"  {label or 'window' + index} ({panes or 0} panes)")
+    return sessions
+
+
+def kit_entries(kits_dir: str, bat: str = "", kit_sessions: Optional[Dict[str, str]] = None) -> Dict[str, Entry]:
+    """Entries rendered the way ``relay_tui_kits_preview`` prints them.
+
+    ``kit_sessions`` maps a kit to the session its kit.toml names (the
+    metadata index's ``K`` rows); other kits run in a session named after them.
+    """
+    sessions = _session_windows()
+    entries: Dict[str, Entry] = {}
+    for kit in _subdirs(kits_dir):
+        directory = os.path.join(kits_dir, kit)
+        kit_file = os.path.join(directory, "kit.toml")
+        windows = sessions.get((kit_sessions or {}).get(kit) or kit)
+        key = "\n".join([directory, _stat_key(kit_file), bat, "running" if windows is not None else "stopped"] + (windows or []))
+
+        def render(kit=kit, directory=directory, kit_file=kit_file, windows=windows) -> Optional[str]:
+            lines = [f"Kit: {kit}", f"Status: {'running' if windows is not None else 'stopped'}", f"Directory: {directory}"]
+            if windows:
+                lines.extend(["", "Windows:"] + windows)
+            if not os.path.isfile(kit_file):
+                return "\n".join(lines + ["", "kit.toml not found."]) + "\n"
+            body = None
+            if bat:
+                color = "--color=always" if bat == "ansi" else "--color=never"
+                try:
+                    result = subprocess.run(
+                        ["bat", "--style=plain", "--paging=never", color, "--language=toml", kit_file],
+                        check=False,
+                        capture_output=True,
+                        text=True,
+                    )
+                    body = result.stdout if result.returncode == 0 else None
+                except OSError:
+                    body = None
+            if body is None:
+                try:
+                    body = _indented(kit_file)
+                except OSError:
+                    return None
+            return "\n".join(lines + ["", "kit.toml:", ""]) + body
+
+        entries[kit] = (key, render)
+    return entries
+
+
+def persona_entries(personas_dir: str, active: Sequence[str] = (), show_secrets: bool = False) -> Dict[str, Entry]:
+    """Entries rendered the way ``relay_tui_personas_preview`` prints them."""
+    entries: Dict[str, Entry] = {}
+    for persona in _subdirs(personas_dir):
+        directory = os.path.join(personas_dir, persona)
+        path = os.path.join(directory, "persona.toml")
+        is_active = persona in active
+        key = "\n".join([directory, _stat_key(path), str(int(is_active)), str(int(show_secrets))])
+
+        def render(persona=persona, directory=directory, path=path, is_active=is_active) -> Optional[str]:
+            from relay_fastpath import persona_preview_lines
+            from relay_toml import TomlMissingError, load_path
+
+            lines = [f"Persona: {persona}", f"Active: {'yes' if is_active else 'no'}", f"Directory: {directory}"]
+            if not os.path.isfile(path):
+                lines.extend(["", f"persona.toml not found. Use relay persona edit {persona} to create it."])
+                return "\n".join(lines) + "\n"
+            try:
+                data = load_path(path) or {}
+            except (TomlMissingError, OSError, ValueError):
+                return None
+            return "\n".join(lines + persona_preview_lines(data, show_secrets)) + "\n"
+
+        entries[persona] = (key, render)
+    return entries
+
+
+def event_entries(log_path: str, limit: int) -> Dict[str, Entry]:
+    """Entries rendered the way ``relay_tui_events_detail`` prints them."""
+    from relay_events import EventStore, detail_pages, segments_dir
+
+    if not os.path.isfile(log_path):
+        return {}
+    key = "\n".join([log_path, _stat_key(log_path), _stat_key(segments_dir(log_path)), str(limit)])
+    pages: List[List[str]] = []
+
+    def page(index: int) -> Optional[str]:
+        if not pages:
+            pages.append(detail_pages(EventStore(log_path), limit))
+        return "\n".join(pages[0][index]) + "\n" if index < len(pages[0]) else None
+
+    return {str(index + 1): (key, lambda index=index: page(index)) for index in range(limit)}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="relay_preview", description="Pre-render relay tui preview panes")
+    parser.add_argument("--state-dir", default="")
+    sub = parser.add_subparsers(dest="kind", required=True)
+    kits = sub.add_parser("kits", help="Render kit previews")
+    kits.add_argument("--kits-dir", required=True)
+    kits.add_argument("--bat", choices=("", "plain", "ansi"), default="", help="Highlight kit.toml with bat")
+    kits.add_argument("--personas-dir", default="", help="Read kit sessions from the metadata index for these dirs")
+    personas = sub.add_parser("personas", help="Render persona previews")
+    personas.add_argument("--personas-dir", required=True)
+    personas.add_argument("--active", default="", help="Space-separated active persona names")
+    personas.add_argument("--show-secrets", action="store_true")
+    events = sub.add_parser("events", help="Render event details")
+    events.add_argument("--log", required=True)
+    events.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.kind == "kits":
+        kits_dir = args.kits_dir.rstrip("/") or "/"
+        kit_sessions = None
+        if args.personas_dir:
+            from relay_index import KIT, MetadataIndex
+
+            index_path = os.path.join(args.state_dir or default_state_dir(), "cache", "index.tsv")
+            index = MetadataIndex(kits_dir, args.personas_dir, index_path).refresh()
+            kit_sessions = {name: entry.session for name, entry in index.entries[KIT].items()}
+        entries = kit_entries(kits_dir, args.bat, kit_sessions)
+    elif args.kind == "personas":
+        entries = persona_entries(args.personas_dir.rstrip("/") or "/", args.active.split(), args.show_secrets)
+    else:
+        entries = event_entries(args.log, max(args.limit, 0))
+    try:
+        stats = PreviewCache(preview_dir(args.kind, args.state_dir or None)).refresh(entries)
+    except OSError as exc:
+        print(f"Unable to write {args.kind} previews: {exc}", file=sys.stderr)
+        return 1
+    print(f"{args.kind}: {stats['rendered']} rendered, {stats['unchanged']} unchanged, {stats['removed']} removed")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,63 @@
+# shellcheck shell=sh
+# Readiness gate typed in front of a pane command whose kit.toml entry has
+# `after = [...]` (see relay-kit start_kit). Run as:
+#   sh relay_ready.sh <timeout> <label> <check>...
+# and exits 0 once every check holds, or 1 after <timeout> seconds. Checks:
+#   file:<path>             the path exists (relative to the pane's dir)
+#   port:<host>:<port>      a TCP connection to host:port succeeds
+#   output:<key>:<regex>    the pane tagged @relay_pane=<key> has printed a
+#                           line matching the extended regex
+
+timeout=${1:-60}
+label=${2:-}
+shift 2
+
+ready_port() {
+  rp_host=${1%:*}
+  rp_port=${1##*:}
+  rp_host=${rp_host#\[}
+  rp_host=${rp_host%\]}
+  if command -v nc >/dev/null 2>&1; then
+    nc -z "$rp_host" "$rp_port" >/dev/null 2>&1
+    return
+  fi
+  python3 -c 'import socket, sys
+socket.create_connection((sys.argv[1], int(sys.argv[2])), 1).close()' "$rp_host" "$rp_port" >/dev/null 2>&1
+}
+
+ready_output() {
+  ro_key=${1%%:*}
+  ro_regex=${1#*:}
+  ro_pane=$(tmux list-panes -s -t "${TMUX_PANE:-}" -F '#{@relay_pane} #{pane_id}' 2>/dev/null |
+    awk -v key="$ro_key" '$1 == key { print $2; exit }')
+  [ -n "$ro_pane" ] || return 1
+  tmux capture-pane -p -J -S -2000 -t "$ro_pane" 2>/dev/null | grep -Eq -- "$ro_regex"
+}
+
+ready_check() {
+  case "$1" in
+    file:*) [ -e "${1#file:}" ] ;;
+    port:*) ready_port "${1#port:}" ;;
+    output:*) ready_output "${1#output:}" ;;
+    *) return 0 ;;
+  esac
+}
+
+started=$(date +%s)
+announced=0
+while :; do
+  pending=""
+  for check in "$@"; do
+    ready_check "$check" || { pending=$check; break; }
+  done
+  [ -n "$pending" ] || exit 0
+  if [ $(($(date +%s) - started)) -ge "$timeout" ]; then
+    printf 'relay: %s not ready after %ss (waiting on %s)\n' "$label" "$timeout" "$pending" >&2
+    exit 1
+  fi
+  if [ "$announced" = "0" ]; then
+    printf 'relay: waiting for %s ...\n' "$label"
+    announced=1
+  fi
+  sleep 0.2 2>/dev/null || sleep 1
+done
@@ -0,0 +1,342 @@
+"""Content-addressed snapshots of live tmux sessions behind ``relay kit snapshot``.
+
+Each capture reads every session with one ``tmux list-panes -a`` call and
+renders it with :func:`relay_tmux_import.build_kit` (without the timestamped
+header, so identical layouts render identically).  The rendered kit is stored
+once under ``objects/<sha256[:2]>/<sha256[2:]>``.  ``refs/<kit>.log`` lists
+``ts<TAB>hash<TAB>session`` lines, oldest first.
+
+``heads.json`` maps every kit to its newest hash, so a capture only has to
+hash each session and compare it against one small file.  Sessions that have
+not changed since the last capture write nothing at all, which keeps a
+once-a-minute ``--interval`` loop from touching the disk on a quiet machine.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as _dt
+import difflib
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from relay_import_rules import ImportRuleError
+from relay_tmux_import import TmuxError, build_kit, gather_sessions, sanitize_kit_name
+from relay_toml import TomlMissingError
+
+_HEADS_NAME = "heads.json"
+_OBJECTS_DIR = "objects"
+_REFS_DIR = "refs"
+_HASH_RE = re.compile(r"^[0-9a-f]{4,64}$")
+_SHORT = 12
+
+Entry = Tuple[int, str, str]
+
+
+class SnapshotError(RuntimeError):
+    """Raised for unknown kits or revisions."""
+
+
+def _atomic_write(path: str, text: str) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        _unlink_quietly(tmp)
+        raise
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class SnapshotStore:
+    """Snapshot objects, per-kit history logs and the heads table under ``root``."""
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    # -- storage -----------------------------------------------------------
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, _OBJECTS_DIR, digest[:2], digest[2:])
+
+    def _ref_path(self, kit: str) -> str:
+        return os.path.join(self.root, _REFS_DIR, kit + ".log")
+
+    def heads(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.root, _HEADS_NAME), encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_heads(self, heads: Dict[str, str]) -> None:
+        _atomic_write(os.path.join(self.root, _HEADS_NAME), json.dumps(heads, sort_keys=True) + "\n")
+
+    def read_object(self, digest: str) -> str:
+        with open(self._object_path(digest), encoding="utf-8") as handle:
+            return handle.read()
+
+    def _write_object(self, digest: str, text: str) -> None:
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            _atomic_write(path, text)
+
+    def history(self, kit: str) -> List[Entry]:
+        entries: List[Entry] = []
+        try:
+            with open(self._ref_path(kit), encoding="utf-8") as handle:
+                for line in handle:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        continue
+                    try:
+                        entries.append((int(parts[0]), parts[1], parts[2]))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return entries
+
+    def kits(self) -> List[str]:
+        return sorted(self.heads())
+
+    # -- capture -----------------------------------------------------------
+    def capture(
+        self,
+        *,
+        include_relay: bool = False,
+        keep: int = 0,
+        now: Optional[int] = None,
+    ) -> List[Tuple[str, str, str]]:
+        """Snapshot every session; return ``(kit, session, hash)`` for the changed ones."""
+        try:
+            snapshots = gather_sessions(exclude_prefix="" if include_relay else "relay-")
+        except TmuxError as exc:
+            if "no server running" in str(exc) or "error connecting" in str(exc):
+                return []
+            raise
+        stamp = int(time.time() if now is None else now)
+        heads = self.heads()
+        changed: List[Tuple[str, str, str]] = []
+        for snapshot in snapshots:
+            kit = sanitize_kit_name(snapshot.session)
+            text = build_kit(snapshot, kit_name=kit, header=False)["kit_text"]
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if heads.get(kit) == digest:
+                continue
+            self._write_object(digest, text)
+            os.makedirs(os.path.join(self.root, _REFS_DIR), exist_ok=True)
+            with open(self._ref_path(kit), "a", encoding="utf-8") as handle:
+                handle.write(f"{stamp}\t{digest}\t{snapshot.session}\n")
+            heads[kit] = digest
+            changed.append((kit, snapshot.session, digest))
+        if changed:
+            self._save_heads(heads)
+            if keep > 0:
+                self.prune(keep, kits=[kit for kit, _, _ in changed])
+        return changed
+
+    def prune(self, keep: int, *, kits: Optional[Sequence[str]] = None) -> int:
+        """Trim history to the newest ``keep`` entries per kit; drop orphaned objects."""
+        trimmed = False
+        for kit in kits if kits is not None else self.kits():
+            entries = self.history(kit)
+            if len(entries) <= keep:
+                continue
+            lines = "".join(f"{ts}\t{digest}\t{session}\n" for ts, digest, session in entries[-keep:])
+            _atomic_write(self._ref_path(kit), lines)
+            trimmed = True
+        if not trimmed:
+            return 0
+        live = {digest for kit in self.kits() for _, digest, _ in self.history(kit)}
+        removed = 0
+        objects_root = os.path.join(self.root, _OBJECTS_DIR)
+        for prefix in os.listdir(objects_root):
+            bucket = os.path.join(objects_root, prefix)
+            for name in os.listdir(bucket):
+                if prefix + name not in live:
+                    _unlink_quietly(os.path.join(bucket, name))
+                    removed += 1
+        return removed
+
+    # -- lookup ------------------------------------------------------------
+    def resolve(self, kit: str, rev: str = "") -> Entry:
+        """Resolve ``rev`` (empty for the latest, ``~N`` for N before it, or a hash prefix)."""
+        entries = self.history(kit)
+        if not entries:
+            raise SnapshotError(f"No snapshots for kit: {kit}")
+        if not rev or rev == "@":
+            return entries[-1]
+        if rev.startswith("~") and rev[1:].isdigit():
+            back = int(rev[1:])
+            if back >= len(entries):
+                raise SnapshotError(f"{kit} has only {len(entries)} snapshot(s)")
+            return entries[-1 - back]
+        if _HASH_RE.match(rev):
+            matches = {entry[1]: entry for entry in entries if entry[1].startswith(rev)}
+            if len(matches) == 1:
+                return next(iter(matches.values()))
+            if len(matches) > 1:
+                raise SnapshotError(f"Ambiguous snapshot revision: {rev}")
+        raise SnapshotError(f"Unknown snapshot revision for {kit}: {rev}")
+
+    def restore(self, kit: str, rev: str, *, kits_dir: str, name: str = "", force: bool = False) -> str:
+        ts, digest, session = self.resolve(kit, rev)
+        target_name = sanitize_kit_name(name) if name else kit
+        kit_file = os.path.join(kits_dir, target_name, "kit.toml")
+        if os.path.exists(kit_file) and not force:
+            raise SnapshotError(f"Kit already exists: {target_name} (use --force to replace it)")
+        text = self.read_object(digest)
+        if target_name != kit:
+            text = text.replace(f'session = "{kit}"', f'session = "{target_name}"', 1)
+        header = (
+            f"# Restored from snapshot {digest[:_SHORT]} of tmux session '{session}' "
+            f"taken {_format_ts(ts)}\n"
+            "# REVIEW BEFORE USE: Commands are snapshots; confirm they are repeatable\n\n"
+        )
+        _atomic_write(kit_file, header + text)
+        return kit_file
+
+
+def _format_ts(ts: int) -> str:
+    return _dt.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _summary(text: str) -> str:
+    windows = text.count("[[windows]]")
+    panes = text.count("[[windows.panes]]")
+    return f"{windows} window(s), {panes} pane(s)"
+
+
+def _cmd_capture(store: SnapshotStore, args: argparse.Namespace) -> int:
+    while True:
+        try:
+            changed = store.capture(include_relay=args.include_relay, keep=args.keep)
+        except TmuxError as exc:
+            print(f"relay kit snapshot: {exc}", file=sys.stderr)
+            if not args.interval:
+                return 1
+            changed = []
+        for kit, session, digest in changed:
+            print(f"{kit}\t{digest[:_SHORT]}\t{session}", flush=True)
+        if not args.interval:
+            if not changed and not args.quiet:
+                print("No session changed since the last snapshot")
+            return 0
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return 0
+
+
+def _cmd_list(store: SnapshotStore, args: argparse.Namespace) -> int:
+    if not args.kit:
+        heads = store.heads()
+        for kit in sorted(heads):
+            entries = store.history(kit)
+            latest = _format_ts(entries[-1][0]) if entries else "-"
+            print(f"{kit}\t{len(entries)}\t{latest}\t{heads[kit][:_SHORT]}")
+        return 0
+    entries = store.history(args.kit)
+    if not entries:
+        raise SnapshotError(f"No snapshots for kit: {args.kit}")
+    for back, (ts, digest, session) in enumerate(reversed(entries)):
+        print(f"~{back}\t{_format_ts(ts)}\t{digest[:_SHORT]}\t{_summary(store.read_object(digest))}")
+    return 0
+
+
+def _cmd_show(store: SnapshotStore, args: argparse.Namespace) -> int:
+    _, digest, _ = store.resolve(args.kit, args.rev)
+    sys.stdout.write(store.read_object(digest))
+    return 0
+
+
+def _cmd_diff(store: SnapshotStore, args: argparse.Namespace) -> int:
+    old_rev = args.old or "~1"
+    new_rev = args.new or ""
+    old = store.resolve(args.kit, old_rev)
+    new = store.resolve(args.kit, new_rev)
+    # Equal hashes mean equal snapshots; only differing objects are read.
+    if old[1] == new[1]:
+        return 0
+    diff = difflib.unified_diff(
+        store.read_object(old[1]).splitlines(keepends=True),
+        store.read_object(new[1]).splitlines(keepends=True),
+        fromfile=f"{args.kit}@{old[1][:_SHORT]} ({_format_ts(old[0])})",
+        tofile=f"{args.kit}@{new[1][:_SHORT]} ({_format_ts(new[0])})",
+    )
+    sys.stdout.writelines(diff)
+    return 1
+
+
+def _cmd_restore(store: SnapshotStore, args: argparse.Namespace) -> int:
+    kit_file = store.restore(args.kit, args.rev, kits_dir=args.kits_dir, name=args.name, force=args.force)
+    print(f"Restored {args.kit} -> {kit_file}")
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="relay kit snapshot", description="Relay session snapshots")
+    parser.add_argument("--root", required=True, help="Snapshot store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cap = sub.add_parser("capture", help="Snapshot every session that changed")
+    cap.add_argument("--interval", type=int, default=0, help="Repeat every N seconds")
+    cap.add_argument("--include-relay", action="store_true", help="Also snapshot relay-* sessions")
+    cap.add_argument("--keep", type=int, default=0, help="Snapshots to keep per kit (0 keeps all)")
+    cap.add_argument("--quiet", action="store_true")
+
+    lst = sub.add_parser("list", help="List kits, or one kit's snapshots newest first")
+    lst.add_argument("kit", nargs="?")
+
+    show = sub.add_parser("show", help="Print a snapshot")
+    show.add_argument("kit")
+    show.add_argument("rev", nargs="?", default="")
+
+    diff = sub.add_parser("diff", help="Diff two snapshots (default: previous vs latest)")
+    diff.add_argument("kit")
+    diff.add_argument("old", nargs="?", default="")
+    diff.add_argument("new", nargs="?", default="")
+
+    res = sub.add_parser("restore", help="Write a snapshot back as a kit")
+    res.add_argument("kit")
+    res.add_argument("rev", nargs="?", default="")
+    res.add_argument("--kits-dir", required=True)
+    res.add_argument("--as", dest="name", default="")
+    res.add_argument("--force", action="store_true")
+
+    args = parser.parse_args(argv)
+    store = SnapshotStore(args.root)
+    handlers = {
+        "capture": _cmd_capture,
+        "list": _cmd_list,
+        "show": _cmd_show,
+        "diff": _cmd_diff,
+        "restore": _cmd_restore,
+    }
+    try:
+        return handlers[args.command](store, args)
+    except SnapshotError as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+    except (ImportRuleError, TomlMissingError) as exc:
+        print(f"Invalid import rules: {exc}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
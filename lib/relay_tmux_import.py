@@ -6,9 +6,13 @@ import datetime as _dt
 import os
 import re
 import subprocess
+import sys
 from dataclasses import dataclass, field
 from typing import Dict, Iterable, List, Optional, Sequence
 
+from relay_import_rules import ImportRuleError, default_engine
+from relay_toml import TomlMissingError
+
 _TMUX_SEPARATOR = "__RELAY_SEP__"
 
 
@@ -86,95 +90,126 @@ def _parse_records(blob: str, expected_fields: int) -> Iterable[List[str]]:
     return rows
 
 
-def _gather_session(session: str) -> SessionSnapshot:
+# Every window and pane field an import needs, so one list-panes call covers a
+# whole session (-s) or the whole server (-a).
+_SNAPSHOT_FORMAT = _TMUX_SEPARATOR.join(
+    [
+        "#{session_name}",
+        "#{session_path}",
+        "#{window_index}",
+        "#{window_id}",
+        "#{window_name}",
+        "#{window_layout}",
+        "#{pane_active}",
+        "#{pane_index}",
+        "#{pane_id}",
+        "#{pane_current_path}",
+        "#{pane_current_command}",
+        "#{pane_start_command}",
+        "#{pane_title}",
+        "#{pane_width}",
+        "#{pane_height}",
+    ]
+)
+_SNAPSHOT_FIELDS = 15
+
+
+def _to_int(value: str, default: int = 0) -> int:
     try:
-        session_path = _run_tmux(["display-message", "-p", "-t", session, "#{session_path}"])
-    except TmuxError:
-        session_path = ""
-
-    window_fmt = _TMUX_SEPARATOR.join(
-        [
-            "#{window_index}",
-            "#{window_id}",
-            "#{window_name}",
-            "#{window_layout}",
-            "#{window_active}",
-            "#{window_panes}",
-            "#{window_active_clients}",
-        ]
-    )
-    window_blob = _run_tmux(["list-windows", "-t", session, "-F", window_fmt])
-    windows: List[Window] = []
-
-    for window_fields in _parse_records(window_blob, 7):
-        index_str, window_id, name, layout, _, _, _ = window_fields
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _group_snapshots(blob: str) -> List[SessionSnapshot]:
+    """Group list-panes rows into sessions and windows, in tmux order."""
+    snapshots: Dict[str, SessionSnapshot] = {}
+    windows: Dict[tuple, Window] = {}
+    for row in _parse_records(blob, _SNAPSHOT_FIELDS):
+        (
+            session,
+            session_path,
+            window_index,
+            window_id,
+            window_name,
+            layout,
+            pane_active,
+            pane_index,
+            pane_id,
+            pane_path,
+            pane_current_cmd,
+            pane_start_cmd,
+            pane_title,
+            pane_w,
+            pane_h,
+        ) = row
         try:
-            index = int(index_str)
+            index = int(window_index)
+            pane_idx = int(pane_index)
         except ValueError:
             continue
-        pane_fmt = _TMUX_SEPARATOR.join(
-            [
-                "#{pane_index}",
-                "#{pane_id}",
-                "#{pane_current_path}",
-                "#{pane_current_command}",
-                "#{pane_start_command}",
-                "#{pane_title}",
-                "#{pane_width}",
-                "#{pane_height}",
-            ]
-        )
-        pane_blob = _run_tmux(["list-panes", "-t", window_id, "-F", pane_fmt])
-        panes: List[Pane] = []
-        for pane_fields in _parse_records(pane_blob, 8):
-            (
-                pane_index,
-                pane_id,
-                pane_path,
-                pane_current_cmd,
-                pane_start_cmd,
-                pane_title,
-                pane_w,
-                pane_h,
-            ) = pane_fields
-            try:
-                pane_idx = int(pane_index)
-            except ValueError:
-                continue
-            try:
-                width = int(pane_w)
-            except ValueError:
-                width = 0
-            try:
-                height = int(pane_h)
-            except ValueError:
-                height = 0
-            panes.append(
-                Pane(
-                    index=pane_idx,
-                    pane_id=pane_id,
-                    path=pane_path,
-                    current_command=pane_current_cmd.strip(),
-                    start_command=pane_start_cmd.strip(),
-                    title=pane_title.strip(),
-                    width=width,
-                    height=height,
-                )
-            )
-        windows.append(
-            Window(
+        snapshot = snapshots.get(session)
+        if snapshot is None:
+            snapshot = SessionSnapshot(session=session, session_path=session_path.strip(), windows=[])
+            snapshots[session] = snapshot
+        window = windows.get((session, window_id))
+        if window is None:
+            window = Window(
                 index=index,
                 window_id=window_id,
-                name=name.strip(),
-                path=_run_tmux(
-                    ["display-message", "-p", "-t", window_id, "#{window_active_path}"]
-                ).strip(),
+                name=window_name.strip(),
+                path="",
                 layout=layout.strip(),
-                panes=sorted(panes, key=lambda p: p.index),
+                panes=[],
+            )
+            windows[(session, window_id)] = window
+            snapshot.windows.append(window)
+        if pane_active == "1":
+            # The window's working directory is that of its active pane.
+            window.path = pane_path.strip()
+        window.panes.append(
+            Pane(
+                index=pane_idx,
+                pane_id=pane_id,
+                path=pane_path,
+                current_command=pane_current_cmd.strip(),
+                start_command=pane_start_cmd.strip(),
+                title=pane_title.strip(),
+                width=_to_int(pane_w),
+                height=_to_int(pane_h),
             )
         )
-    windows.sort(key=lambda w: w.index)
-    return SessionSnapshot(session=session, session_path=session_path.strip(), windows=windows)
+    for snapshot in snapshots.values():
+        snapshot.windows.sort(key=lambda w: w.index)
+        for window in snapshot.windows:
+            window.panes.sort(key=lambda p: p.index)
+    return list(snapshots.values())
+
+
+def _gather_session(session: str) -> SessionSnapshot:
+    blob = _run_tmux(["list-panes", "-s", "-t", session, "-F", _SNAPSHOT_FORMAT])
+    snapshots = _group_snapshots(blob)
+    if not snapshots:
+        return SessionSnapshot(session=session, session_path="", windows=[])
+    # -t may be a prefix or session id; keep the name the caller used.
+    snapshots[0].session = session
+    return snapshots[0]
+
+
+def gather_sessions(*, exclude_prefix: str = "relay-") -> List[SessionSnapshot]:
+    """Snapshot every session on the server with a single tmux call.
+
+    Sessions whose name starts with ``exclude_prefix`` (those Relay manages)
+    are skipped.
+    """
+    blob = _run_tmux(["list-panes", "-a", "-F", _SNAPSHOT_FORMAT])
+    snapshots = [
+        snapshot
+        for snapshot in _group_snapshots(blob)
+        if not (exclude_prefix and snapshot.session.startswith(exclude_prefix))
+    ]
+    snapshots.sort(key=lambda s: s.session)
+    return snapshots
 
 
 def _command_for_pane(pane: Pane) -> str:
@@ -214,67 +249,12 @@ def _escape_toml(value: str) -> str:
     return f'"{escaped}"'
 
 
-def _classify_command(command: str) -> Optional[str]:
-    lowered = command.strip().lower()
-    if not lowered:
-        return None
-    if lowered in {"sh", "bash", "zsh", "fish"}:
-        return "Shell: review history for common tasks"
-    if lowered.startswith(("npm run", "yarn", "pnpm")):
-        return "Dev server"
-    if lowered.startswith("tail") or "journalctl" in lowered:
-        return "Log monitor"
-    if lowered.startswith("kubectl logs"):
-        return "Kubernetes logs"
-    if lowered.startswith("nvim") or lowered.startswith("vim") or lowered.startswith("emacs"):
-        return "Editor"
-    if lowered.startswith("htop"):
-        return "Process monitor"
-    return None
-
-
-_KUBECTL_POD_RE = re.compile(r"kubectl\s+logs[^\n]*\bpod/([\w.-]+)")
-_IP_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
-_INLINE_SECRET_RE = re.compile(r"\b(?:DATABASE_URL|PGURI|MYSQL_URL|AMQP_URL)=[^\s]+", re.IGNORECASE)
-_URL_CREDENTIAL_RE = re.compile(r"://[^\s/:]+:[^\s@]+@")
-
-
-def _suggest_command(command: str, match: re.Match) -> Optional[str]:
-    pod_name = match.group(1)
-    base = pod_name.split("-", 1)[0]
-    if base and base != pod_name:
-        return command.replace(f"pod/{pod_name}", f"deployment/{base}")
-    return None
-
-
 def _collect_warnings(pane: Pane) -> None:
     command = pane.display_command
     if not command:
         return
-    kubectl_match = _KUBECTL_POD_RE.search(command)
-    if kubectl_match:
-        suggestion = _suggest_command(command, kubectl_match)
-        message = (
-            "Pod name '" + kubectl_match.group(1) + "' is likely ephemeral; consider using a selector"
-        )
+    for message, suggestion in default_engine().scan(command):
         pane.warnings.append(PaneWarning(message=message, suggestion=suggestion))
-    if _URL_CREDENTIAL_RE.search(command) or _INLINE_SECRET_RE.search(command):
-        pane.warnings.append(
-            PaneWarning(
-                message="Command contains inline credentials; move secrets to a persona or env var",
-                suggestion=None,
-            )
-        )
-    for match in _IP_RE.finditer(command):
-        ip = match.group(0)
-        if ip.startswith("127.") or ip == "0.0.0.0":
-            continue
-        pane.warnings.append(
-            PaneWarning(
-                message=f"Hard-coded address '{ip}' detected; confirm it is stable",
-                suggestion=None,
-            )
-        )
 
 
 def _render_windows(windows: Sequence[Window], base_dir: str) -> List[str]:
@@ -292,7 +272,7 @@ def _render_windows(windows: Sequence[Window], base_dir: str) -> List[str]:
             lines.append("")
             pane_title = f"Pane {pane.index}: {pane.display_command}"
             lines.append(f"# {pane_title}")
-            label = _classify_command(pane.display_command)
+            label = default_engine().classify(pane.display_command)
             if label:
                 lines.append(f"# {label}")
             for warn in pane.warnings:
@@ -316,7 +296,13 @@ def _render_warnings_block(warnings: Iterable[PaneWarning]) -> List[str]:
     return lines
 
 
-def build_kit(snapshot: SessionSnapshot, *, kit_name: str, interactive: bool = False) -> Dict[str, object]:
+def build_kit(
+    snapshot: SessionSnapshot,
+    *,
+    kit_name: str,
+    interactive: bool = False,
+    header: bool = True,
+) -> Dict[str, object]:
     base_dir = snapshot.session_path
     if not base_dir:
         for window in snapshot.windows:
@@ -367,10 +353,13 @@ def build_kit(snapshot: SessionSnapshot, *, kit_name: str, interactive: bool = F
                     pane.warnings = []
                     _collect_warnings(pane)
 
-    stamp = _dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S %Z")
-    header_comment = f"# Generated from tmux session '{snapshot.session}' on {stamp}".rstrip()
-    review_comment = "# REVIEW BEFORE USE: Commands are snapshots; confirm they are repeatable"
-    kit_lines = [header_comment, review_comment, "", "version = 1"]
+    kit_lines: List[str] = []
+    if header:
+        stamp = _dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S %Z")
+        header_comment = f"# Generated from tmux session '{snapshot.session}' on {stamp}".rstrip()
+        review_comment = "# REVIEW BEFORE USE: Commands are snapshots; confirm they are repeatable"
+        kit_lines.extend([header_comment, review_comment, ""])
+    kit_lines.append("version = 1")
     session_comment = ""
     if kit_name != snapshot.session:
         session_comment = f"  # renamed from {snapshot.session}"
@@ -417,15 +406,70 @@ def _write_warnings(path: str, warnings: Sequence[PaneWarning]) -> None:
             handle.write("\n")
 
 
+def sanitize_kit_name(name: str) -> str:
+    """Mirror ``sanitize_kit_name`` in bin/relay-kit."""
+    cleaned = "".join(chr(ord(ch) + 32) if "A" <= ch <= "Z" else ch for ch in name)
+    cleaned = re.sub(r"[^a-z0-9_-]", "-", cleaned)
+    cleaned = re.sub(r"-{2,}", "-", cleaned)
+    cleaned = re.sub(r"_{2,}", "_", cleaned)
+    cleaned = re.sub(r"^-", "", cleaned)
+    cleaned = re.sub(r"-$", "", cleaned)
+    cleaned = re.sub(r"^_", "", cleaned)
+    cleaned = re.sub(r"_$", "", cleaned)
+    return cleaned or "imported"
+
+
+def import_all(*, kits_dir: Optional[str], interactive: bool = False) -> int:
+    """Import every non-Relay session from one tmux snapshot.
+
+    With ``kits_dir`` each session becomes ``<kits_dir>/<kit>/kit.toml``
+    (existing kits are left alone); without it the kits are printed.
+    """
+    status = 0
+    for snapshot in gather_sessions():
+        kit_name = sanitize_kit_name(snapshot.session)
+        result = build_kit(snapshot, kit_name=kit_name, interactive=interactive)
+        kit_text = result["kit_text"]
+        if not kits_dir:
+            print(kit_text)
+            print()
+            continue
+        kit_dir = os.path.join(kits_dir, kit_name)
+        kit_file = os.path.join(kit_dir, "kit.toml")
+        if os.path.exists(kit_file):
+            print(f"Kit already exists: {kit_name} (session {snapshot.session})", file=sys.stderr)
+            status = 2
+            continue
+        _write_file(kit_file, kit_text)
+        _write_warnings(os.path.join(kit_dir, "import.log"), result["warnings"])
+        print(f"Imported {snapshot.session} -> {kit_file}")
+    return status
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Convert tmux session to Relay kit")
-    parser.add_argument("session", help="tmux session to import")
-    parser.add_argument("kit_name", help="Name to use inside kit.toml")
+    parser.add_argument("session", nargs="?", help="tmux session to import")
+    parser.add_argument("kit_name", nargs="?", help="Name to use inside kit.toml")
     parser.add_argument("--output", help="Path to write kit.toml (omit for stdout)")
     parser.add_argument("--warnings", help="Write warnings to a log file")
     parser.add_argument("--interactive", action="store_true", help="Prompt for suggested fixes")
+    parser.add_argument("--all", action="store_true", help="Import every non-relay session")
+    parser.add_argument("--kits-dir", help="With --all, write kits under this directory")
     args = parser.parse_args(argv)
 
+    try:
+        default_engine()
+    except (ImportRuleError, TomlMissingError) as exc:
+        print(f"Invalid import rules: {exc}", file=sys.stderr)
+        return 2
+
+    if args.all:
+        if args.session or args.output or args.warnings:
+            parser.error("--all takes no session, --output or --warnings")
+        return import_all(kits_dir=args.kits_dir, interactive=args.interactive)
+    if not args.session or not args.kit_name:
+        parser.error("session and kit_name are required")
+
     result = import_session(args.session, kit_name=args.kit_name, interactive=args.interactive)
     kit_text = result["kit_text"]
     warnings = result["warnings"]
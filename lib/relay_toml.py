@@ -30,6 +30,19 @@ def _import_toml_module() -> Any:
 
         return tomllib
     except ModuleNotFoundError:
+        try:
+            import tomli  # type: ignore[import]
+
+            return tomli
+        except ModuleNotFoundError as exc:  # pragma: no cover - environment dependent
+            import sys
+
+            if not sys.flags.no_site:
+                raise TomlMissingError(_ERROR_MESSAGE) from exc
+        # Started with ``python3 -S``: tomli may live in site-packages.
+        import site
+
+        site.main()
         try:
             import tomli  # type: ignore[import]
 
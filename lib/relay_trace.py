@@ -0,0 +1,237 @@
+"""Launch tracing for Relay, and the summary behind ``relay kit trace``.
+
+Tracing is on while ``RELAY_TRACE`` names a file.  :func:`span` appends one
+Chrome trace "complete" event per timed block, in the same format the shell
+helpers in ``relay_trace.sh`` write: one JSON event per line followed by a
+comma, with no closing bracket.  chrome://tracing and Perfetto load such a
+file as-is, and every Relay process of a launch (the launcher, the plan
+compiler, the panes) can append to it at once.
+
+With ``RELAY_TRACE`` unset, :func:`span` costs one environment lookup; the
+module itself only imports ``contextlib``, ``os``, ``sys`` and ``time`` up
+front, so instrumented libraries can import it unconditionally.
+"""
+from __future__ import annotations
+
+import contextlib
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+_named_pids: set = set()
+
+
+def _process_label() -> str:
+    name = os.path.basename(sys.argv[0] or "") if sys.argv else ""
+    name = os.path.splitext(name)[0]
+    return name if name and name not in ("-", "-c") else "python3"
+
+
+def _append(path: str, events: List[Dict]) -> None:
+    import json
+
+    try:
+        with open(path, "a", encoding="utf-8") as handle:
+            if handle.tell() == 0:
+                handle.write("[\n")
+            handle.write("".join(json.dumps(event, separators=(",", ":")) + ",\n" for event in events))
+    except OSError:
+        # A trace is a diagnostic aid; never fail the traced command over it.
+        pass
+
+
+@contextlib.contextmanager
+def span(name: str, **args) -> Iterator[None]:
+    """Record the enclosed block as a ``name`` span when tracing is on."""
+    path = os.environ.get("RELAY_TRACE")
+    if not path:
+        yield
+        return
+    started = time.time_ns()
+    try:
+        yield
+    finally:
+        finished = time.time_ns()
+        inherited = os.environ.get("RELAY_TRACE_PID", "")
+        pid = int(inherited) if inherited.isdigit() else os.getpid()
+        tid_env = os.environ.get("RELAY_TRACE_TID", "")
+        tid = int(tid_env) if tid_env.isdigit() else pid
+        events = []
+        if not inherited and pid not in _named_pids:
+            _named_pids.add(pid)
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": _process_label()}})
+        event = {
+            "name": name,
+            "cat": "relay",
+            "ph": "X",
+            "ts": started // 1000,
+            "dur": (finished - started) // 1000,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        events.append(event)
+        _append(path, events)
+
+
+class Span:
+    """One timed block; ``start``, ``dur`` and ``self_time`` are in microseconds."""
+
+    __slots__ = ("name", "pid", "tid", "start", "dur", "args", "self_time")
+
+    def __init__(self, name: str, pid: int, tid: int, start: int, dur: int, args: Optional[Dict] = None) -> None:
+        self.name = name
+        self.pid = pid
+        self.tid = tid
+        self.start = start
+        self.dur = dur
+        self.args = args or {}
+        self.self_time = dur
+
+    @property
+    def end(self) -> int:
+        return self.start + self.dur
+
+
+def load_events(path: str) -> List[Dict]:
+    """Read a trace file, whether or not its array was ever closed."""
+    import json
+
+    with open(path, encoding="utf-8") as handle:
+        text = handle.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        data = data.get("traceEvents")
+    if isinstance(data, list):
+        return [event for event in data if isinstance(event, dict)]
+    events = []
+    for line in text.splitlines():
+        line = line.strip().rstrip(",")
+        if not line or line in ("[", "]"):
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(event, dict):
+            events.append(event)
+    return events
+
+
+def build_spans(events: Sequence[Dict]) -> Tuple[List[Span], List[Dict]]:
+    """Pair B/E events and collect X events into spans; return spans and instants.
+
+    A span left open (its process failed before ending it) is closed at the
+    last event seen for that process.
+    """
+    timed = [event for event in events if event.get("ph") in ("B", "E", "X", "i", "I") and "ts" in event]
+    timed.sort(key=lambda event: event["ts"])
+    spans: List[Span] = []
+    instants: List[Dict] = []
+    stacks: Dict[Tuple[int, int], List[Dict]] = {}
+    last_ts: Dict[int, int] = {}
+    for event in timed:
+        pid, tid, ts = int(event.get("pid", 0)), int(event.get("tid", 0)), int(event["ts"])
+        last_ts[pid] = max(last_ts.get(pid, ts), ts + int(event.get("dur", 0)))
+        phase = event["ph"]
+        if phase == "X":
+            spans.append(Span(event["name"], pid, tid, ts, int(event.get("dur", 0)), dict(event.get("args") or {})))
+        elif phase == "B":
+            stacks.setdefault((pid, tid), []).append(event)
+        elif phase == "E":
+            stack = stacks.get((pid, tid), [])
+            for position in range(len(stack) - 1, -1, -1):
+                if stack[position]["name"] == event["name"]:
+                    begin = stack.pop(position)
+                    args = dict(begin.get("args") or {})
+                    args.update(event.get("args") or {})
+                    spans.append(Span(begin["name"], pid, tid, int(begin["ts"]), ts - int(begin["ts"]), args))
+                    break
+        else:
+            instants.append(event)
+    for (pid, tid), stack in stacks.items():
+        for begin in stack:
+            start = int(begin["ts"])
+            spans.append(Span(begin["name"], pid, tid, start, last_ts.get(pid, start) - start, dict(begin.get("args") or {})))
+    _assign_self_time(spans)
+    return spans, instants
+
+
+def _assign_self_time(spans: List[Span]) -> None:
+    rows: Dict[Tuple[int, int], List[Span]] = {}
+    for item in spans:
+        item.self_time = item.dur
+        rows.setdefault((item.pid, item.tid), []).append(item)
+    for row in rows.values():
+        row.sort(key=lambda item: (item.start, -item.dur))
+        open_spans: List[Span] = []
+        for item in row:
+            while open_spans and item.start >= open_spans[-1].end:
+                open_spans.pop()
+            if open_spans:
+                open_spans[-1].self_time -= item.dur
+            open_spans.append(item)
+
+
+def _ms(micros: float) -> str:
+    return f"{micros / 1000:.1f}"
+
+
+def summarize(events: Sequence[Dict], top: int = 5) -> List[str]:
+    spans, instants = build_spans(events)
+    stamps = [item.start for item in spans] + [item.end for item in spans] + [int(event["ts"]) for event in instants]
+    if not stamps:
+        return ["No trace events recorded."]
+    wall = max(stamps) - min(stamps)
+    processes = {item.pid for item in spans} | {int(event.get("pid", 0)) for event in instants}
+    lines = [f"Wall time: {_ms(wall)} ms from first to last event, {len(processes)} process(es)", ""]
+
+    phases: Dict[str, List[Span]] = {}
+    for item in spans:
+        phases.setdefault(item.name, []).append(item)
+    lines.append(f"{'PHASE':<22} {'COUNT':>5} {'TOTAL ms':>10} {'SELF ms':>10} {'MAX ms':>9} {'%WALL':>6}")
+    ordered = sorted(phases.items(), key=lambda pair: (-sum(item.dur for item in pair[1]), pair[0]))
+    for name, items in ordered:
+        total = sum(item.dur for item in items)
+        share = 100.0 * total / wall if wall else 0.0
+        lines.append(
+            f"{name:<22} {len(items):>5} {_ms(total):>10} {_ms(sum(item.self_time for item in items)):>10}"
+            f" {_ms(max(item.dur for item in items)):>9} {share:>6.1f}"
+        )
+
+    slowest = sorted(spans, key=lambda item: -item.self_time)[: max(top, 0)]
+    if slowest:
+        lines.extend(["", "Slowest spans (self time):"])
+        for item in slowest:
+            detail = " ".join(f"{key}={value}" for key, value in sorted(item.args.items()))
+            lines.append(f"  {_ms(item.self_time):>8} ms  {item.name}{'  ' + detail if detail else ''}")
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="relay_trace", description="Summarize a Relay launch trace")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="Show where the traced time went")
+    summary.add_argument("trace")
+    summary.add_argument("--top", type=int, default=5, help="Slowest spans to list (default: 5)")
+    args = parser.parse_args(argv)
+
+    try:
+        events = load_events(args.trace)
+    except OSError as exc:
+        print(f"Unable to read trace {args.trace}: {exc}", file=sys.stderr)
+        return 2
+    print(f"Trace: {args.trace}")
+    print("\n".join(summarize(events, args.top)))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+# shellcheck shell=sh
+# Launch tracing shared by the Relay entrypoints (python side:
+# lib/relay_trace.py). When RELAY_TRACE names a file, relay_trace_begin and
+# relay_trace_end append Chrome trace events to it in the "JSON Array Format":
+# one event per line, each followed by a comma and no closing bracket, which
+# chrome://tracing and Perfetto load as-is and which several processes can
+# append to at once. With RELAY_TRACE unset every helper returns immediately.
+#
+# Events carry pid ${RELAY_TRACE_PID:-$$} and tid ${RELAY_TRACE_TID:-pid}, so
+# a pane's own processes can report onto the row the launcher opened for it.
+
+# Panes start in other directories, so pin a relative trace path here.
+if [ -n "${RELAY_TRACE:-}" ]; then
+  case "$RELAY_TRACE" in
+    /*) ;;
+    *) RELAY_TRACE="$PWD/$RELAY_TRACE" ;;
+  esac
+  export RELAY_TRACE
+fi
+
+# Set RELAY_TRACE_NOW to the current time in microseconds since the epoch.
+# bash and zsh provide EPOCHREALTIME; other shells pay one `date` fork.
+relay_trace_now() {
+  # shellcheck disable=SC3028  # bash/zsh fast path; unset elsewhere, so `date` below runs
+  rtn_raw=${EPOCHREALTIME:-}
+  case "$rtn_raw" in
+    *[.,]*)
+      RELAY_TRACE_NOW="${rtn_raw%[.,]*}${rtn_raw#*[.,]}"
+      return 0
+      ;;
+  esac
+  rtn_raw=$(date +%s%N 2>/dev/null)
+  case "$rtn_raw" in
+    ''|*[!0-9]*)
+      rtn_raw=$(date +%s)
+      RELAY_TRACE_NOW="${rtn_raw}000000"
+      ;;
+    *)
+      RELAY_TRACE_NOW=${rtn_raw%???}
+      ;;
+  esac
+}
+
+# Escape $1 for use inside a JSON string; the result is in RELAY_TRACE_QUOTED.
+relay_trace_quote_var() {
+  rtq_rest=$1
+  RELAY_TRACE_QUOTED=""
+  while :; do
+    case "$rtq_rest" in
+      *[\\\"]*)
+        rtq_head=${rtq_rest%%[\\\"]*}
+        rtq_rest=${rtq_rest#"$rtq_head"}
+        RELAY_TRACE_QUOTED="$RELAY_TRACE_QUOTED$rtq_head\\${rtq_rest%"${rtq_rest#?}"}"
+        rtq_rest=${rtq_rest#?}
+        ;;
+      *)
+        RELAY_TRACE_QUOTED="$RELAY_TRACE_QUOTED$rtq_rest"
+        return 0
+        ;;
+    esac
+  done
+}
+
+# relay_trace_event <phase> <name> [<key> <value>]...
+# Append one event; string values are JSON-escaped, all-digit values are
+# written as numbers.
+relay_trace_event() {
+  [ -n "${RELAY_TRACE:-}" ] || return 0
+  rte_phase=$1
+  rte_name=$2
+  shift 2
+  relay_trace_now
+  rte_pid=${RELAY_TRACE_PID:-$$}
+  rte_tid=${RELAY_TRACE_TID:-$rte_pid}
+  rte_args=""
+  while [ $# -ge 2 ]; do
+    case "$2" in
+      ''|*[!0-9]*)
+        relay_trace_quote_var "$2"
+        rte_args="$rte_args,\"$1\":\"$RELAY_TRACE_QUOTED\""
+        ;;
+      *)
+        rte_args="$rte_args,\"$1\":$2"
+        ;;
+    esac
+    shift 2
+  done
+  [ -z "$rte_args" ] || rte_args=",\"args\":{${rte_args#,}}"
+  {
+    [ -s "$RELAY_TRACE" ] || printf '[\n'
+    if [ "${RELAY_TRACE_NAMED:-}" != "$rte_pid" ] && [ -z "${RELAY_TRACE_PID:-}" ]; then
+      relay_trace_quote_var "${RELAY_TRACE_PROCESS:-${0##*/}}"
+      printf '{"name":"process_name","ph":"M","pid":%s,"tid":%s,"args":{"name":"%s"}},\n' \
+        "$rte_pid" "$rte_tid" "$RELAY_TRACE_QUOTED"
+    fi
+    printf '{"name":"%s","cat":"relay","ph":"%s","ts":%s,"pid":%s,"tid":%s%s},\n' \
+      "$rte_name" "$rte_phase" "$RELAY_TRACE_NOW" "$rte_pid" "$rte_tid" "$rte_args"
+  } >> "$RELAY_TRACE" 2>/dev/null
+  RELAY_TRACE_NAMED=$rte_pid
+}
+
+relay_trace_begin() {
+  [ -n "${RELAY_TRACE:-}" ] || return 0
+  relay_trace_event B "$@"
+}
+
+relay_trace_end() {
+  [ -n "${RELAY_TRACE:-}" ] || return 0
+  relay_trace_event E "$@"
+}
+
+relay_trace_instant() {
+  [ -n "${RELAY_TRACE:-}" ] || return 0
+  relay_trace_event i "$@"
+}
+
+# Name row <tid> of this process in the trace viewer (e.g. one row per pane).
+relay_trace_thread_name() {
+  [ -n "${RELAY_TRACE:-}" ] || return 0
+  relay_trace_quote_var "$2"
+  printf '{"name":"thread_name","ph":"M","pid":%s,"tid":%s,"args":{"name":"%s"}},\n' \
+    "${RELAY_TRACE_PID:-$$}" "$1" "$RELAY_TRACE_QUOTED" >> "$RELAY_TRACE" 2>/dev/null
+}
+
+# Build into RELAY_TRACE_MARK a shell command that records <phase> of span
+# <name> on row <tid> of this process when typed into a pane; the pane's own
+# shell may not be sh, so the command only uses words and assignments.
+relay_trace_pane_mark_var() {
+  shell_quote_var "$RELAY_TRACE"
+  rtm_file=$SHELL_QUOTED
+  shell_quote_var "$LIB_DIR/relay_trace.sh"
+  # shellcheck disable=SC2034  # output variable, read by the caller
+  RELAY_TRACE_MARK="RELAY_TRACE=$rtm_file RELAY_TRACE_PID=${RELAY_TRACE_PID:-$$} RELAY_TRACE_TID=$3 sh -c '. \"\$0\"; relay_trace_event \"\$1\" \"\$2\"' $SHELL_QUOTED $1 $2"
+}
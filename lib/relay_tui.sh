@@ -67,34 +67,49 @@ relay_tui_cache_enabled() {
   [ "${RELAY_TUI_CACHE_DISABLE:-0}" != "1" ]
 }
 
-relay_tui_cache_dir() {
-  state_root=$(relay_tui_state_dir) || return 1
-  root="$state_root/cache"
-  if [ -d "$root" ]; then
-    printf '%s\n' "$root"
+# Ask a running `relay daemon`; returns 111 when there is none (or the client
+# in relay_daemon.sh is not loaded) so callers compute the answer themselves.
+relay_tui_daemon() {
+  command -v relay_daemon_query >/dev/null 2>&1 || return 111
+  relay_daemon_query "$@"
+}
+
+relay_tui_preview_cache_dir() {
+  printf '%s/cache/previews/%s\n' "$(relay_tui_state_dir)" "$1"
+}
+
+# Print the fzf --preview command for a list of <kind> entries and start
+# refreshing that list's pre-rendered previews (lib/relay_preview.py) in the
+# background. The command shows the cached render of fzf field <field> and
+# only runs `relay-tui <subcmd> <field>` when there is none yet.
+relay_tui_preview_command() {
+  kind="$1"
+  subcmd="$2"
+  field="$3"
+  shift 3
+  fallback="${RELAY_TUI_BIN_DIR:-.}/relay-tui $subcmd $field"
+  lib_dir=$(relay_tui_lib_dir 2>/dev/null)
+  if ! relay_tui_cache_enabled || [ -z "$lib_dir" ] || [ ! -f "$lib_dir/relay_preview.py" ] \
+    || ! command -v python3 >/dev/null 2>&1; then
+    printf '%s\n' "$fallback"
     return 0
   fi
-  mkdir -p "$root" 2>/dev/null || return 1
-  printf '%s\n' "$root"
+  state_dir=$(relay_tui_state_dir)
+  PYTHONPATH="$lib_dir${PYTHONPATH:+:$PYTHONPATH}" python3 -m relay_preview --state-dir "$state_dir" \
+    "$kind" "$@" </dev/null >/dev/null 2>&1 &
+  quoted_dir=$(relay_tui_preview_cache_dir "$kind" | sed "s/'/'\\\\''/g")
+  printf "cat -- '%s'/%s 2>/dev/null || %s\n" "$quoted_dir" "$field" "$fallback"
 }
 
-relay_tui_cache_path() {
-  key="$1"
-  if ! relay_tui_cache_enabled; then
-    return 1
+# Drop the cached preview of <name> (every entry without one) after the TUI
+# changed it, so fzf renders it afresh until the next refresh.
+relay_tui_preview_forget() {
+  dir=$(relay_tui_preview_cache_dir "$1")
+  if [ -n "${2:-}" ]; then
+    rm -f -- "$dir/$2"
+  else
+    rm -f -- "$dir"/[!.]*
   fi
-  root=$(relay_tui_cache_dir 2>/dev/null) || {
-    RELAY_TUI_CACHE_DISABLE=1
-    return 1
-  }
-  printf '%s/%s.cache\n' "$root" "$key"
-}
-
-relay_tui_cache_remove() {
-  key="$1"
-  path=$(relay_tui_cache_path "$key" 2>/dev/null)
-  [ -n "$path" ] || return 0
-  rm -f "$path"
 }
 
 relay_tui_history_label() {
@@ -535,72 +550,61 @@ relay_tui_events_ensure_log() {
   [ -f "$log_path" ]
 }
 
+relay_tui_events_py() {
+  log_path="$1"
+  shift
+  command -v python3 >/dev/null 2>&1 || return 127
+  lib_dir=$(relay_tui_lib_dir 2>/dev/null) || return 127
+  [ -f "$lib_dir/relay_fastpath.py" ] || return 127
+  PYTHONPATH="$lib_dir${PYTHONPATH:+:$PYTHONPATH}" python3 -S -m relay_fastpath events --log "$log_path" "$@"
+}
+
 relay_tui_events_rows() {
   limit=${1:-100}
   log_path=$(relay_tui_events_log_path)
   if [ ! -f "$log_path" ]; then
     return 1
   fi
-  if ! command -v python3 >/dev/null 2>&1; then
-    tab=$(printf '\t')
-    tail -n "$limit" "$log_path" | awk -F'|' -v tab="$tab" '
-      NF==0 { next }
-      { idx += 1 }
-      { type=$1 }
-      { ts = (NF >= 2 ? $2 : "") }
-      {
-        msg=""
-        if (NF > 2) {
-          for (i=3; i<=NF; i++) {
-            if (i>3) msg = msg "|"
-            msg = msg $i
-          }
-        }
-      }
-      {
-        print idx tab type tab ts tab msg tab $0
-      }
-    '
-    return 0
+  relay_tui_daemon events.rows "$log_path" "$limit"
+  status=$?
+  [ $status -eq 111 ] || return $status
+  # Python reads the log backwards from its end, only as far as it needs.
+  relay_tui_events_py "$log_path" rows --limit "$limit"
+  status=$?
+  if [ $status -ne 127 ]; then
+    return $status
   fi
-  python3 - "$log_path" "$limit" <<'PY'
-import os
-import sys
-from datetime import datetime
-
-path = sys.argv[1]
-limit = int(sys.argv[2]) if len(sys.argv) > 2 else 100
-if not os.path.exists(path):
-    sys.exit(1)
-
-with open(path, 'r', encoding='utf-8', errors='replace') as fh:
-    lines = [line.rstrip('\n') for line in fh]
-
-if not lines:
-    sys.exit(1)
-
-selected = lines[-limit:]
-tab = '\t'
-
-def format_ts(value):
-    try:
-        ts = int(value)
-        return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-    except Exception:
-        return value
-
-for idx, raw in enumerate(reversed(selected), 1):
-    parts = raw.split('|')
-    if len(parts) >= 2:
-        event_type = parts[0]
-        timestamp = format_ts(parts[1])
-        message = '|'.join(parts[2:]) if len(parts) > 2 else ''
-    else:
-        event_type = raw
-        timestamp = ''
-        message = ''
-    print(f"{idx}{tab}{event_type}{tab}{timestamp}{tab}{message}{tab}{raw}")
-PY
+  # Without python3, relay_events.awk reads the newest lines by the same
+  # record rules as relay_event_reader. When the last $limit lines hold fewer
+  # events (blank lines, or a rotation left the active log short), it reads
+  # the whole active log and as many of the newest segments as make up the rest.
+  lib_dir=$(relay_tui_lib_dir 2>/dev/null) || return 1
+  events_tail=1
+  set -- "$log_path"
+  events_have=$(tail -n "$limit" "$log_path" | grep -c '[^[:space:]]')
+  if [ "$events_have" -lt "$limit" ]; then
+    events_tail=0
+    events_have=$(grep -c '[^[:space:]]' "$log_path")
+    events_segments=""
+    for segment in "${log_path%.log}.d"/seg-*.jsonl; do
+      [ -f "$segment" ] && events_segments="$segment
+$events_segments"
+    done
+    while [ "$events_have" -lt "$limit" ] && [ -n "$events_segments" ]; do
+      segment=${events_segments%%"
+"*}
+      events_segments=${events_segments#*"
+"}
+      set -- "$segment" "$@"
+      events_have=$((events_have + $(grep -c '[^[:space:]]' "$segment")))
+    done
+  fi
+  # awk keeps the newest $limit events of whatever it is given.
+  if [ "$events_tail" = "1" ]; then
+    tail -n "$limit" "$log_path"
+  else
+    cat "$@"
+  fi | LC_ALL=C awk -v limit="$limit" -v zone="$(date +%z 2>/dev/null)" -f "$lib_dir/relay_events.awk"
 }
 
 relay_tui_events_detail() {
@@ -609,61 +613,20 @@ relay_tui_events_detail() {
     printf '%s\n' 'No event selected.'
     return 0
   fi
-  if ! command -v python3 >/dev/null 2>&1; then
-    relay_tui_events_rows "$event_id" | sed -n "1p"
-    return 0
-  fi
   log_path=$(relay_tui_events_log_path)
   if [ ! -f "$log_path" ]; then
     printf '%s\n' 'Event log not available.'
     return 1
   fi
-  python3 - "$log_path" "$event_id" <<'PY'
-import os
-import sys
-from datetime import datetime
-
-path = sys.argv[1]
-target_index = int(sys.argv[2])
-
-if not os.path.exists(path):
-    sys.exit(1)
-
-with open(path, 'r', encoding='utf-8', errors='replace') as fh:
-    lines = [line.rstrip('\n') for line in fh]
-
-if not lines:
-    sys.exit(1)
-
-selected = lines[-200:]
-selected.reverse()
-
-if target_index < 1 or target_index > len(selected):
-    print('Event no longer available (refresh).')
-    sys.exit(0)
-
-raw = selected[target_index - 1]
-parts = raw.split('|')
-
-print(f'Raw: {raw}')
-
-if len(parts) >= 2:
-    event_type = parts[0]
-    timestamp = parts[1]
-    try:
-        stamp = datetime.fromtimestamp(int(timestamp)).strftime('%Y-%m-%d %H:%M:%S')
-    except Exception:
-        stamp = timestamp
-    message = '|'.join(parts[2:]) if len(parts) > 2 else ''
-    print(f'Type: {event_type}')
-    print(f'Time: {stamp}')
-    print(f'Seconds: {timestamp}')
-    if message:
-        print('\nMessage:')
-        print(f'  {message}')
-else:
-    print('Unable to parse event payload.')
-PY
+  relay_tui_daemon events.detail "$log_path" "$event_id"
+  status=$?
+  [ $status -eq 111 ] || return $status
+  relay_tui_events_py "$log_path" detail --index "$event_id"
+  status=$?
+  if [ $status -ne 127 ]; then
+    return $status
+  fi
+  relay_tui_events_rows "$event_id" | sed -n "${event_id}p"
 }
 
 relay_tui_events_emit_prompt() {
@@ -703,7 +666,8 @@ relay_tui_events_clear_prompt() {
 }
 
 relay_tui_events_tail() {
-  relay_tui_run events tail
+  printf '%s\n' 'Following new events, Ctrl+C to return.' >&2
+  relay_tui_run events follow --text
 }
 
 relay_tui_events() {
@@ -718,11 +682,12 @@ relay_tui_events() {
       printf '%s\n' 'No events recorded yet. Use ctrl-e to emit a test event.'
       return 0
     fi
+    preview=$(relay_tui_preview_command events events-preview '{1}' --log "$(relay_tui_events_log_path)" --limit 200)
     selection=$(printf '%s\n' "$rows" | fzf \
       --delimiter '\t' \
       --with-nth=2,3,4 \
       --prompt 'Events > ' \
-      --preview "${RELAY_TUI_BIN_DIR:-.}/relay-tui events-preview {1}" \
+      --preview "$preview" \
       --preview-window=down,60% \
       --expect=enter,ctrl-e,ctrl-t,ctrl-c,ctrl-r)
     status=$?
@@ -734,6 +699,7 @@ relay_tui_events() {
     case "$key" in
       ctrl-e)
         relay_tui_events_emit_prompt
+        relay_tui_preview_forget events
         continue
         ;;
       ctrl-t)
@@ -742,6 +708,7 @@ relay_tui_events() {
         ;;
       ctrl-c)
         relay_tui_events_clear_prompt
+        relay_tui_preview_forget events
         continue
         ;;
       ctrl-r)
@@ -812,7 +779,10 @@ relay_tui_kits_status_data_load() {
   if [ "${RELAY_TUI_KITS_STATUS_READY:-0}" = "1" ]; then
     return 0
   fi
-  RELAY_TUI_KITS_STATUS_DATA=$(relay_tui_run kit status 2>/dev/null || printf '')
+  RELAY_TUI_KITS_STATUS_DATA=$(relay_tui_daemon status tsv 2>/dev/null)
+  if [ $? -eq 111 ]; then
+    RELAY_TUI_KITS_STATUS_DATA=$(relay_tui_run kit status --tsv 2>/dev/null || printf '')
+  fi
   RELAY_TUI_KITS_STATUS_READY=1
   return 0
 }
@@ -823,22 +793,7 @@ relay_tui_kits_status_of() {
   if [ -z "${RELAY_TUI_KITS_STATUS_DATA:-}" ]; then
     return 1
   fi
-  printf '%s\n' "$RELAY_TUI_KITS_STATUS_DATA" | awk -F': ' -v n="$name" 'index($1, n) == 1 && $1 == n { print $2; exit }'
-}
-
-relay_tui_kits_status_symbol() {
-  status="$1"
-  case "$status" in
-    running|active|attached)
-      printf '*'
-      ;;
-    stopped|inactive|'')
-      printf '-'
-      ;;
-    *)
-      printf '!'
-      ;;
-  esac
+  printf '%s\n' "$RELAY_TUI_KITS_STATUS_DATA" | awk -F '\t' -v n="$name" '$1 == n { print $2; exit }'
 }
 
 relay_tui_kit_description() {
@@ -854,27 +809,6 @@ relay_tui_kit_description() {
   printf 'Kit directory: %s\n' "$kit_path"
 }
 
-relay_tui_kits_cache_valid() {
-  cache_file="$1"
-  dir=$(relay_tui_kits_dir)
-  [ -s "$cache_file" ] || return 1
-  [ -d "$dir" ] || return 1
-  if find "$dir" -mindepth 1 -maxdepth 1 -type d -newer "$cache_file" 2>/dev/null | head -n 1 | read -r _; then
-    return 1
-  fi
-  if find "$dir" -name 'kit.toml' -type f -newer "$cache_file" 2>/dev/null | head -n 1 | read -r _; then
-    return 1
-  fi
-  tab_char=$(printf '\t')
-  while IFS=$tab_char read -r name _; do
-    [ -n "$name" ] || continue
-    if [ ! -d "$dir/$name" ]; then
-      return 1
-    fi
-  done < "$cache_file"
-  return 0
-}
-
 relay_tui_kits_listing_generate() {
   dir=$(relay_tui_kits_dir)
   if [ ! -d "$dir" ]; then
@@ -895,41 +829,51 @@ relay_tui_kits_listing_generate() {
 }
 
 relay_tui_kits_listing() {
-  if ! relay_tui_cache_enabled; then
-    relay_tui_kits_listing_generate
-    return $?
-  fi
-  cache_path=$(relay_tui_cache_path 'kits-listing')
-  if [ -z "$cache_path" ]; then
-    relay_tui_kits_listing_generate
-    return $?
-  fi
-  if [ -f "$cache_path" ] && relay_tui_kits_cache_valid "$cache_path"; then
-    cat "$cache_path"
+  listing=$(relay_tui_daemon kits 2>/dev/null)
+  if [ $? -ne 111 ]; then
+    [ -n "$listing" ] || return 1
+    printf '%s\n' "$listing"
     return 0
   fi
-  listing=$(relay_tui_kits_listing_generate 2>/dev/null)
-  status=$?
-  [ $status -eq 0 ] || return $status
-  if [ -z "$listing" ]; then
-    rm -f "$cache_path"
-    return 1
+  if relay_tui_cache_enabled && command -v relay_index_rows >/dev/null 2>&1; then
+    listing=$(relay_index_rows kits 2>/dev/null)
+    if [ $? -eq 0 ]; then
+      [ -n "$listing" ] || return 1
+      printf '%s\n' "$listing"
+      return 0
+    fi
   fi
-  printf '%s\n' "$listing"
-  printf '%s\n' "$listing" > "$cache_path" 2>/dev/null || true
-  return 0
+  relay_tui_kits_listing_generate
 }
 
 relay_tui_kits_rows() {
+  rows=$(relay_tui_daemon kits.rows 2>/dev/null)
+  if [ $? -ne 111 ]; then
+    [ -n "$rows" ] || return 1
+    printf '%s\n' "$rows"
+    return 0
+  fi
   listing=$(relay_tui_kits_listing 2>/dev/null)
   [ -n "$listing" ] || return 1
-  tab_char=$(printf '\t')
-  printf '%s\n' "$listing" | while IFS=$tab_char read -r name desc; do
-    [ -n "$name" ] || continue
-    status=$(relay_tui_kits_status_of "$name")
-    symbol=$(relay_tui_kits_status_symbol "$status")
-    printf '%s\t%-24s\t%s\n' "$symbol" "$name" "$desc"
-  done
+  relay_tui_kits_status_data_load
+  # One status query for every kit, joined against the listing in one pass.
+  {
+    printf '%s\n' "${RELAY_TUI_KITS_STATUS_DATA:-}"
+    printf '%s\n' '--relay-kits--'
+    printf '%s\n' "$listing"
+  } | awk -F '\t' '
+    $0 == "--relay-kits--" { listing = 1; next }
+    !listing { if ($1 != "") state[$1] = $2; next }
+    $1 == "" { next }
+    {
+      status = ($1 in state) ? state[$1] : ""
+      if (status == "running" || status == "active" || status == "attached") symbol = "*"
+      else if (status == "stopped" || status == "inactive" || status == "") symbol = "-"
+      else symbol = "!"
+      desc = $0
+      sub(/^[^\t]*\t?/, "", desc)
+      printf "%s\t%-24s\t%s\n", symbol, $1, desc
+    }'
 }
 
 relay_tui_kits_create() {
@@ -943,7 +887,6 @@ relay_tui_kits_create() {
     return 1
   fi
   relay_tui_run kit edit "$name"
-  relay_tui_cache_remove 'kits-listing'
 }
 
 relay_tui_kits_delete() {
@@ -966,13 +909,17 @@ relay_tui_kits_delete() {
     return 1
   fi
   relay_tui_kits_status_reset
-  relay_tui_cache_remove 'kits-listing'
   printf 'relay-tui: deleted kit "%s".\n' "$kit" >&2
   return 0
 }
 
+# The session kit $1 runs in: column 3 of the kit status report, which takes
+# it from kit.toml; a kit the report does not know runs in one named after it.
 relay_tui_kit_session_name() {
-  printf 'relay-%s\n' "$1"
+  relay_tui_kits_status_data_load
+  printf '%s\n' "${RELAY_TUI_KITS_STATUS_DATA:-}" | awk -F '\t' -v n="$1" '
+    $1 == n && $3 != "" { session = $3; exit }
+    END { print (session != "" ? session : n) }'
 }
 
 relay_kit_smart_action() {
@@ -1021,10 +968,11 @@ relay_tui_kits_preview() {
   printf 'Directory: %s\n' "$dir"
   if [ "$status" = "running" ] && command -v tmux >/dev/null 2>&1; then
     session=$(relay_tui_kit_session_name "$kit")
-    windows=$(tmux list-windows -t "$session" -F '#{window_index}\t#{window_name}\t#{window_panes}' 2>/dev/null || printf '')
+    # The window name comes last: it is the one field that may hold spaces.
+    windows=$(tmux list-windows -t "$session" -F '#{window_index} #{window_panes} #{window_name}' 2>/dev/null || printf '')
     if [ -n "$windows" ]; then
       printf '\nWindows:\n'
-      printf '%s\n' "$windows" | while IFS=$(printf '\t') read -r idx label panes; do
+      printf '%s\n' "$windows" | while read -r idx panes label; do
         [ -n "$idx" ] || continue
         if [ -z "$label" ]; then
           label="window$idx"
@@ -1062,11 +1010,20 @@ relay_tui_kits() {
       'Ctrl-D:Delete' \
       'Ctrl-S:Stop' \
       'Ctrl-N:New')
+    set -- --kits-dir "$(relay_tui_kits_dir)" --personas-dir "$(relay_tui_personas_dir)"
+    if relay_tui_feature_enabled bat && command -v bat >/dev/null 2>&1; then
+      if relay_tui_feature_enabled ansi; then
+        set -- "$@" --bat ansi
+      else
+        set -- "$@" --bat plain
+      fi
+    fi
+    preview=$(relay_tui_preview_command kits kits-preview '{2}' "$@")
     selection=$(printf '%s\n' "$rows" | fzf \
       --delimiter '\t' \
       --with-nth=2,3 \
       --prompt 'Kits > ' \
-      --preview "${RELAY_TUI_BIN_DIR:-.}/relay-tui kits-preview {2}" \
+      --preview "$preview" \
       --preview-window=down,60% \
       --header "$header" \
       --expect=enter,ctrl-e,ctrl-s,ctrl-n,ctrl-d)
@@ -1086,11 +1043,12 @@ relay_tui_kits() {
     if [ -z "$kit" ]; then
       continue
     fi
+    # Whatever the key, the action may change what the preview shows.
+    relay_tui_preview_forget kits "$kit"
     case "$key" in
       ctrl-e)
         relay_tui_run kit edit "$kit"
         relay_tui_kits_status_reset
-        relay_tui_cache_remove 'kits-listing'
         continue
         ;;
       ctrl-d)
@@ -1176,27 +1134,6 @@ relay_tui_persona_description() {
   printf 'Persona directory: %s\n' "$dir"
 }
 
-relay_tui_personas_cache_valid() {
-  cache_file="$1"
-  dir=$(relay_tui_personas_dir)
-  [ -s "$cache_file" ] || return 1
-  [ -d "$dir" ] || return 1
-  if find "$dir" -mindepth 1 -maxdepth 1 -type d -newer "$cache_file" 2>/dev/null | head -n 1 | read -r _; then
-    return 1
-  fi
-  if find "$dir" -name 'persona.toml' -type f -newer "$cache_file" 2>/dev/null | head -n 1 | read -r _; then
-    return 1
-  fi
-  tab_char=$(printf '\t')
-  while IFS=$tab_char read -r name _; do
-    [ -n "$name" ] || continue
-    if [ ! -d "$dir/$name" ]; then
-      return 1
-    fi
-  done < "$cache_file"
-  return 0
-}
-
 relay_tui_personas_listing_generate() {
   dir=$(relay_tui_personas_dir)
   if [ ! -d "$dir" ]; then
@@ -1217,29 +1154,21 @@ relay_tui_personas_listing_generate() {
 }
 
 relay_tui_personas_listing() {
-  if ! relay_tui_cache_enabled; then
-    relay_tui_personas_listing_generate
-    return $?
-  fi
-  cache_path=$(relay_tui_cache_path 'personas-listing')
-  if [ -z "$cache_path" ]; then
-    relay_tui_personas_listing_generate
-    return $?
-  fi
-  if [ -f "$cache_path" ] && relay_tui_personas_cache_valid "$cache_path"; then
-    cat "$cache_path"
+  listing=$(relay_tui_daemon personas 2>/dev/null)
+  if [ $? -ne 111 ]; then
+    [ -n "$listing" ] || return 1
+    printf '%s\n' "$listing"
     return 0
   fi
-  listing=$(relay_tui_personas_listing_generate 2>/dev/null)
-  status=$?
-  [ $status -eq 0 ] || return $status
-  if [ -z "$listing" ]; then
-    rm -f "$cache_path"
-    return 1
+  if relay_tui_cache_enabled && command -v relay_index_rows >/dev/null 2>&1; then
+    listing=$(relay_index_rows personas 2>/dev/null)
+    if [ $? -eq 0 ]; then
+      [ -n "$listing" ] || return 1
+      printf '%s\n' "$listing"
+      return 0
+    fi
   fi
-  printf '%s\n' "$listing"
-  printf '%s\n' "$listing" > "$cache_path" 2>/dev/null || true
-  return 0
+  relay_tui_personas_listing_generate
 }
 
 relay_tui_personas_rows() {
@@ -1271,7 +1200,6 @@ relay_tui_personas_create() {
     return 1
   fi
   relay_tui_run persona edit "$name"
-  relay_tui_cache_remove 'personas-listing'
 }
 
 relay_tui_persona_assign() {
@@ -1356,7 +1284,6 @@ relay_tui_personas_delete() {
     printf 'relay-tui: failed to delete persona "%s".\n' "$persona" >&2
     return 1
   fi
-  relay_tui_cache_remove 'personas-listing'
   printf 'relay-tui: deleted persona "%s".\n' "$persona" >&2
   return 0
 }
@@ -1380,95 +1307,29 @@ relay_tui_personas_preview() {
     printf '\npersona.toml not found. Use relay persona edit %s to create it.\n' "$persona"
     return 0
   fi
+  show_secrets=0
+  if [ "${RELAY_TUI_SHOW_SECRETS:-}" = "1" ]; then
+    show_secrets=1
+  fi
+  relay_tui_daemon persona.preview "$persona" "$show_secrets"
+  status=$?
+  [ $status -eq 111 ] || return $status
   if ! command -v python3 >/dev/null 2>&1; then
     printf '\npython3 not available; showing raw file.\n'
     sed 's/^/  /' "$file"
     return 0
   fi
-  show_secrets=0
-  if [ "${RELAY_TUI_SHOW_SECRETS:-}" = "1" ]; then
-    show_secrets=1
-  fi
   lib_dir=$(relay_tui_lib_dir 2>/dev/null)
   if [ -z "$lib_dir" ]; then
     printf '\nTOML preview unavailable; could not resolve Relay lib directory.\n'
     sed 's/^/  /' "$file"
     return 0
   fi
-  PYTHONPATH="$lib_dir${PYTHONPATH:+:$PYTHONPATH}" python3 - "$file" "$show_secrets" <<'PY'
-import re
-import sys
-
-from relay_toml import TomlMissingError, load_path
-
-path = sys.argv[1]
-show_secrets = sys.argv[2] == '1'
-
-try:
-    data = load_path(path) or {}
-except TomlMissingError as exc:
-    print(exc, file=sys.stderr)
-    sys.exit(2)
-
-env = dict((data.get('env') or {}))
-path_cfg = data.get('path') or {}
-prepend = [str(x) for x in (path_cfg.get('prepend') or [])]
-append = [str(x) for x in (path_cfg.get('append') or [])]
-
-sensitive_pattern = re.compile(r'(secret|token|pass|key)', re.I)
-has_sensitive = any(
-    sensitive_pattern.search(str(key)) or sensitive_pattern.search(str(value))
-    for key, value in env.items()
-)
-
-def render_value(key, value):
-    if show_secrets or not has_sensitive:
-        return str(value)
-    if sensitive_pattern.search(str(key)) or sensitive_pattern.search(str(value)):
-        return '*** hidden ***'
-    return str(value)
-
-print('\nEnvironment:')
-if env:
-    print('  {0:<20} {1}'.format('Key', 'Value'))
-    print('  {0:<20} {1}'.format('-' * 20, '-' * 32))
-    for key in sorted(env):
-        print('  {0:<20} {1}'.format(key, render_value(key, env[key])))
-else:
-    print('  (none)')
-
-print('\nPATH adjustments:')
-if prepend:
-    print('  prepend:')
-    for item in prepend:
-        print(f'    - {item}')
-if append:
-    print('  append:')
-    for item in append:
-        print(f'    - {item}')
-if not prepend and not append:
-    print('  (none)')
-
-metadata = {k: v for k, v in data.items() if k not in {'env', 'path'}}
-if metadata:
-    print('\nAdditional sections:')
-    for key in sorted(metadata):
-        value = metadata[key]
-        if isinstance(value, dict):
-            print(f'  [{key}]')
-            if value:
-                for sub_key in sorted(value):
-                    print('    {0:<18} {1}'.format(sub_key, value[sub_key]))
-            else:
-                print('    (empty)')
-        else:
-            print('  {0:<20} {1}'.format(key, value))
-else:
-    print('\nAdditional sections: (none)')
-
-if has_sensitive and not show_secrets:
-    print('\n(Secrets hidden. Set RELAY_TUI_SHOW_SECRETS=1 to reveal.)')
-PY
+  set -- "$file"
+  if [ "$show_secrets" = "1" ]; then
+    set -- "$@" --show-secrets
+  fi
+  PYTHONPATH="$lib_dir${PYTHONPATH:+:$PYTHONPATH}" python3 -S -m relay_fastpath preview "$@"
 }
 
 relay_tui_personas() {
@@ -1491,11 +1352,16 @@ relay_tui_personas() {
       'Ctrl-X:Exec' \
       'Ctrl-N:New' \
       'Ctrl-U:Use')
+    set -- --personas-dir "$(relay_tui_personas_dir)" --active "$(relay_tui_personas_active_tokens)"
+    if [ "${RELAY_TUI_SHOW_SECRETS:-}" = "1" ]; then
+      set -- "$@" --show-secrets
+    fi
+    preview=$(relay_tui_preview_command personas personas-preview '{2}' "$@")
     selection=$(printf '%s\n' "$rows" | fzf \
       --delimiter '\t' \
       --with-nth=2,3 \
       --prompt 'Personas > ' \
-      --preview "${RELAY_TUI_BIN_DIR:-.}/relay-tui personas-preview {2}" \
+      --preview "$preview" \
       --preview-window=down,60% \
       --header "$header" \
       --expect=enter,ctrl-e,ctrl-a,ctrl-x,ctrl-n,ctrl-u,ctrl-d)
@@ -1515,10 +1381,10 @@ relay_tui_personas() {
     if [ -z "$persona" ]; then
       continue
     fi
+    relay_tui_preview_forget personas "$persona"
     case "$key" in
       ctrl-e)
         relay_tui_run persona edit "$persona"
-        relay_tui_cache_remove 'personas-listing'
         continue
         ;;
       ctrl-a)
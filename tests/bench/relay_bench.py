@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""Startup-time benchmarks for the Relay entrypoints.
+
+Generates synthetic kit and persona trees, runs each entrypoint against a
+private tmux server and reports, per scenario and tree size:
+
+* wall time (first/cold run, then min/median/mean/max of the warm runs);
+* process spawns: every PATH command a run starts, by name (PATH shims),
+  plus raw fork/clone counts when ``strace`` is installed;
+* python processes started and their summed import time
+  (``PYTHONPROFILEIMPORTTIME``).
+
+Timing and counting use separate passes so the shims never inflate wall time.
+Results are JSON and can be diffed between commits::
+
+    python3 tests/bench/relay_bench.py run --output before.json
+    git checkout my-branch
+    python3 tests/bench/relay_bench.py run --output after.json
+    python3 tests/bench/relay_bench.py compare before.json after.json
+
+Nothing outside the benchmark's temporary directory is touched: kits,
+personas and state live there, and tmux runs with a private ``TMUX_TMPDIR``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RELAY = os.path.join(REPO_ROOT, "bin", "relay")
+RESULT_VERSION = 1
+PERSONA_POOL = 50
+WIDE_PANES = 50
+_IMPORT_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+_FORK_RE = re.compile(r"\b(?:clone3?|fork|vfork)\(")
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    unit: str
+    sizes: Callable[["argparse.Namespace"], List[int]]
+    command: Callable[["Bench", int], List[str]]
+    # Run after every timed run, untimed (e.g. stop the kit that was started).
+    reset: Optional[Callable[["Bench", int], None]] = None
+    needs_tmux: bool = False
+
+
+@dataclass
+class Result:
+    scenario: str
+    unit: str
+    size: int
+    first_ms: float
+    wall_ms: Dict[str, float]
+    runs: int
+    exit_status: int
+    spawns: Optional[Dict[str, object]] = None
+    python_processes: Optional[int] = None
+    python_import_ms: Optional[float] = None
+    forks: Optional[int] = None
+    notes: List[str] = field(default_factory=list)
+
+
+def _kit_sizes(args: argparse.Namespace) -> List[int]:
+    return args.sizes
+
+
+def _depths(args: argparse.Namespace) -> List[int]:
+    return [depth for depth in args.depths if depth <= PERSONA_POOL]
+
+
+def _fixed(value: int) -> Callable[[argparse.Namespace], List[int]]:
+    return lambda args: [value]
+
+
+class Bench:
+    """A private Relay installation with generated trees and a tmux server."""
+
+    def __init__(self, root: str, with_daemon: bool) -> None:
+        self.root = root
+        self.with_daemon = with_daemon
+        self.stub_dir = os.path.join(root, "stubs")
+        self.shim_dir = os.path.join(root, "shims")
+        self.spawn_log = os.path.join(root, "spawns.log")
+        self.tmux_tmpdir = os.path.join(root, "tmux")
+        self.real_path = os.environ.get("PATH", "/usr/bin:/bin")
+        self.has_tmux = shutil.which("tmux") is not None
+        self._trees: Dict[int, str] = {}
+        os.makedirs(self.stub_dir)
+        os.makedirs(self.tmux_tmpdir)
+        # The TUI menus are measured up to the point fzf has its full list:
+        # the stub reads every row, then "cancels" like Esc would.
+        self._write_script(os.path.join(self.stub_dir, "fzf"), "#!/bin/sh\ncat >/dev/null\nexit 130\n")
+
+    # -- environment -------------------------------------------------------
+    @staticmethod
+    def _write_script(path: str, body: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(body)
+        os.chmod(path, 0o755)
+
+    def tree(self, kits: int) -> str:
+        """Return the data root holding ``kits`` kits plus the shared persona pool."""
+        if kits not in self._trees:
+            path = os.path.join(self.root, f"tree-{kits}")
+            generate_tree(path, kits)
+            self._trees[kits] = path
+        return self._trees[kits]
+
+    def env(self, tree: str, *, counting: bool = False) -> Dict[str, str]:
+        env = dict(os.environ)
+        for key in list(env):
+            if key.startswith("RELAY_") or key in ("TMUX", "TMUX_PANE"):
+                del env[key]
+        path = f"{self.stub_dir}:{self.real_path}"
+        if counting:
+            path = f"{self.shim_dir}:{path}"
+            env["RELAY_BENCH_SPAWN_LOG"] = self.spawn_log
+            env["PYTHONPROFILEIMPORTTIME"] = "1"
+        env.update(
+            PATH=path,
+            HOME=os.path.join(self.root, "home"),
+            TMUX_TMPDIR=self.tmux_tmpdir,
+            # relay-kit's socket-aware calls and plain `tmux` then agree on
+            # the one private server under TMUX_TMPDIR.
+            RELAY_TMUX_SOCKET_NAME="default",
+            RELAY_KITS_DIR=os.path.join(tree, "kits"),
+            RELAY_PERSONAS_DIR=os.path.join(tree, "personas"),
+            RELAY_STATE_DIR=os.path.join(tree, "state"),
+            RELAY_DATA_DIR=os.path.join(tree, "data"),
+            RELAY_DAEMON_SOCKET=os.path.join(tree, "d.sock"),
+            EDITOR="true",
+        )
+        if not self.with_daemon:
+            env["RELAY_DAEMON_DISABLE"] = "1"
+        return env
+
+    def start_tmux(self) -> None:
+        if not self.has_tmux:
+            return
+        env = self.env(self.tree(0))
+        subprocess.run(["tmux", "-f", "/dev/null", "new-session", "-d", "-s", "bench-keep"], env=env, check=True)
+        for option in ("default-shell", "default-command"):
+            subprocess.run(["tmux", "set", "-g", option, "/bin/sh"], env=env, check=True)
+
+    def stop_tmux(self) -> None:
+        if self.has_tmux:
+            subprocess.run(["tmux", "kill-server"], env=self.env(self.tree(0)), stderr=subprocess.DEVNULL)
+
+    def install_shims(self) -> None:
+        """Wrap every command on PATH so each spawn is logged by name."""
+        os.makedirs(self.shim_dir, exist_ok=True)
+        seen = set()
+        for directory in [self.stub_dir, *self.real_path.split(os.pathsep)]:
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                continue
+            for name in names:
+                real = os.path.join(directory, name)
+                if name in seen or not os.access(real, os.X_OK) or os.path.isdir(real):
+                    continue
+                if not re.match(r"^[\w.+-]+$", name):
+                    continue
+                seen.add(name)
+                self._write_script(
+                    os.path.join(self.shim_dir, name),
+                    f'#!/bin/sh\nprintf \'%s\\n\' {name} >> "$RELAY_BENCH_SPAWN_LOG"\nexec \'{real}\' "$@"\n',
+                )
+
+    def daemon(self, tree: str, action: str) -> None:
+        subprocess.run([RELAY, "daemon", action], env=self.env(tree), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def run(self, argv: Sequence[str], tree: str, *, counting: bool = False, strace: Optional[str] = None):
+        env = self.env(tree, counting=counting)
+        if strace:
+            argv = ["strace", "-f", "-qq", "-e", "trace=process", "-o", strace, *argv]
+        return subprocess.run(
+            list(argv), env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+
+
+def generate_tree(path: str, kits: int) -> None:
+    """Write ``kits`` small kits, one 50-pane kit and a pool of personas."""
+    kits_dir = os.path.join(path, "kits")
+    personas_dir = os.path.join(path, "personas")
+    for directory in (kits_dir, personas_dir, os.path.join(path, "state"), os.path.join(path, "data")):
+        os.makedirs(directory, exist_ok=True)
+    for index in range(1, PERSONA_POOL + 1):
+        persona_dir = os.path.join(personas_dir, f"p{index:02d}")
+        os.makedirs(persona_dir, exist_ok=True)
+        env_lines = "\n".join(f'BENCH_P{index:02d}_VAR{var} = "value-{index}-{var}"' for var in range(5))
+        with open(os.path.join(persona_dir, "persona.toml"), "w", encoding="utf-8") as handle:
+            handle.write(
+                f"# Benchmark persona {index}\n[env]\n{env_lines}\n"
+                f'[path]\nprepend = ["/opt/bench/p{index:02d}/bin"]\n'
+            )
+    for index in range(1, kits + 1):
+        kit_dir = os.path.join(kits_dir, f"kit{index:04d}")
+        os.makedirs(kit_dir, exist_ok=True)
+        persona = f"p{(index % PERSONA_POOL) + 1:02d}"
+        with open(os.path.join(kit_dir, "kit.toml"), "w", encoding="utf-8") as handle:
+            handle.write(
+                f'version = 1\nsession = "relay-kit{index:04d}"\ndescription = "Benchmark kit {index}"\n'
+                f'attach = false\npersonas = ["{persona}"]\n\n'
+                '[[windows]]\nname = "main"\npanes = ["sleep 600", "sleep 600"]\n\n'
+                '[[windows]]\nname = "logs"\npanes = ["sleep 600"]\n'
+            )
+    wide_dir = os.path.join(kits_dir, "bench-wide")
+    os.makedirs(wide_dir, exist_ok=True)
+    with open(os.path.join(wide_dir, "kit.toml"), "w", encoding="utf-8") as handle:
+        handle.write('version = 1\nsession = "relay-bench-wide"\ndescription = "50-pane kit"\nattach = false\n')
+        handle.write('personas = ["p01", "p02", "p03"]\n')
+        per_window = 10
+        for window in range(WIDE_PANES // per_window):
+            panes = ", ".join('"sleep 600"' for _ in range(per_window))
+            handle.write(f'\n[[windows]]\nname = "w{window}"\nlayout = "tiled"\npanes = [{panes}]\n')
+
+
+def _stop_wide(bench: Bench, size: int) -> None:
+    subprocess.run(
+        [RELAY, "kit", "stop", "bench-wide"],
+        env=bench.env(bench.tree(0)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+SCENARIOS: Tuple[Scenario, ...] = (
+    Scenario("relay-help", "relay help (dispatcher only)", "kits", _fixed(0), lambda b, n: [RELAY, "help"]),
+    Scenario("relay-status", "relay status board", "kits", _kit_sizes, lambda b, n: [RELAY, "status"], needs_tmux=True),
+    Scenario("kit-list", "relay kit list", "kits", _kit_sizes, lambda b, n: [RELAY, "kit", "list"]),
+    Scenario("kit-list-long", "relay kit list --long", "kits", _kit_sizes, lambda b, n: [RELAY, "kit", "list", "--long"]),
+    Scenario(
+        "kit-status", "relay kit status --tsv", "kits", _kit_sizes,
+        lambda b, n: [RELAY, "kit", "status", "--tsv"], needs_tmux=True,
+    ),
+    Scenario(
+        "kit-up", "relay kit up on a 50-pane kit (stopped between runs)", "panes", _fixed(WIDE_PANES),
+        lambda b, n: [RELAY, "kit", "up", "bench-wide"], reset=_stop_wide, needs_tmux=True,
+    ),
+    Scenario(
+        "kit-up-dry", "relay kit up --dry-run on a 50-pane kit", "panes", _fixed(WIDE_PANES),
+        lambda b, n: [RELAY, "kit", "up", "bench-wide", "--dry-run"],
+    ),
+    Scenario(
+        "persona-exec", "relay persona exec <stack> -- true", "depth", _depths,
+        lambda b, n: [RELAY, "persona", "exec", *[f"p{i:02d}" for i in range(1, n + 1)], "--", "true"],
+    ),
+    Scenario("tui-menu", "relay tui menu until fzf has its rows", "kits", _fixed(0), lambda b, n: [RELAY, "tui"]),
+    Scenario("tui-kits", "relay tui kits until fzf has its rows", "kits", _kit_sizes, lambda b, n: [RELAY, "tui", "kits"], needs_tmux=True),
+    Scenario("tui-personas", "relay tui personas until fzf has its rows", "personas", _fixed(PERSONA_POOL), lambda b, n: [RELAY, "tui", "personas"]),
+)
+
+
+def _tree_for(scenario: Scenario, size: int) -> int:
+    return size if scenario.unit == "kits" else 0
+
+
+def parse_import_times(stderr: str) -> Tuple[int, float]:
+    """Return (python processes, summed top-level import time in ms)."""
+    processes = 0
+    total_us = 0
+    for line in stderr.splitlines():
+        if line.startswith("import time: self [us]"):
+            processes += 1
+            continue
+        match = _IMPORT_LINE_RE.match(line)
+        # Top-level modules are indented by the single separator space only.
+        if match and len(match.group(3)) == 1:
+            total_us += int(match.group(2))
+    return processes, round(total_us / 1000.0, 3)
+
+
+def measure(bench: Bench, scenario: Scenario, size: int, repeat: int, counts: bool) -> Result:
+    tree = bench.tree(_tree_for(scenario, size))
+    argv = scenario.command(bench, size)
+    if bench.with_daemon:
+        bench.daemon(tree, "start")
+
+    def timed() -> Tuple[float, int]:
+        started = time.perf_counter()
+        completed = bench.run(argv, tree)
+        elapsed = (time.perf_counter() - started) * 1000.0
+        if scenario.reset:
+            scenario.reset(bench, size)
+        return elapsed, completed.returncode
+
+    first_ms, status = timed()
+    samples = []
+    for _ in range(repeat):
+        elapsed, status = timed()
+        samples.append(elapsed)
+    result = Result(
+        scenario=scenario.name,
+        unit=scenario.unit,
+        size=size,
+        first_ms=round(first_ms, 3),
+        wall_ms={
+            "min": round(min(samples), 3),
+            "median": round(statistics.median(samples), 3),
+            "mean": round(statistics.fmean(samples), 3),
+            "max": round(max(samples), 3),
+        },
+        runs=len(samples),
+        exit_status=status,
+    )
+    if status != 0:
+        result.notes.append(f"exit status {status}")
+
+    if counts:
+        if os.path.exists(bench.spawn_log):
+            os.unlink(bench.spawn_log)
+        strace_log = os.path.join(bench.root, "strace.log") if shutil.which("strace") else None
+        completed = bench.run(argv, tree, counting=True, strace=strace_log)
+        if scenario.reset:
+            scenario.reset(bench, size)
+        by_command: Dict[str, int] = {}
+        if os.path.exists(bench.spawn_log):
+            with open(bench.spawn_log, encoding="utf-8") as handle:
+                for line in handle:
+                    name = line.strip()
+                    if name:
+                        by_command[name] = by_command.get(name, 0) + 1
+        result.spawns = {"total": sum(by_command.values()), "by_command": dict(sorted(by_command.items()))}
+        result.python_processes, result.python_import_ms = parse_import_times(completed.stderr.decode("utf-8", "replace"))
+        if strace_log and os.path.exists(strace_log):
+            with open(strace_log, encoding="utf-8", errors="replace") as handle:
+                result.forks = sum(1 for line in handle if _FORK_RE.search(line))
+    if bench.with_daemon:
+        bench.daemon(tree, "stop")
+    return result
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", "-C", REPO_ROOT, *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _format_row(result: Dict) -> str:
+    spawns = result.get("spawns") or {}
+    forks = result.get("forks")
+    return "{:<15} {:>5} {:<8} {:>9.1f} {:>9.1f} {:>7} {:>6} {:>5} {:>9}".format(
+        result["scenario"],
+        result["size"],
+        result["unit"],
+        result["first_ms"],
+        result["wall_ms"]["median"],
+        spawns.get("total", "-"),
+        "-" if forks is None else forks,
+        "-" if result.get("python_processes") is None else result["python_processes"],
+        "-" if result.get("python_import_ms") is None else f"{result['python_import_ms']:.1f}",
+    )
+
+
+def print_table(results: Sequence[Dict]) -> None:
+    print("{:<15} {:>5} {:<8} {:>9} {:>9} {:>7} {:>6} {:>5} {:>9}".format(
+        "scenario", "size", "unit", "first_ms", "median", "spawns", "forks", "py", "import_ms"
+    ))
+    for result in results:
+        print(_format_row(result))
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    selected = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    unknown = set(args.scenario or ()) - {s.name for s in SCENARIOS}
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    root = tempfile.mkdtemp(prefix="relay-bench-")
+    bench = Bench(root, args.daemon)
+    results: List[Result] = []
+    try:
+        if not args.no_counts:
+            bench.install_shims()
+        bench.start_tmux()
+        for scenario in selected:
+            if scenario.needs_tmux and not bench.has_tmux:
+                print(f"skip {scenario.name}: tmux not installed", file=sys.stderr)
+                continue
+            for size in scenario.sizes(args):
+                result = measure(bench, scenario, size, args.repeat, not args.no_counts)
+                results.append(result)
+                if not args.quiet:
+                    print(_format_row(result.__dict__), file=sys.stderr)
+    finally:
+        bench.stop_tmux()
+        if args.keep:
+            print(f"kept benchmark tree at {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    payload = {
+        "version": RESULT_VERSION,
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created": int(time.time()),
+        "host": {"system": platform.system(), "machine": platform.machine(), "python": platform.python_version()},
+        "options": {"repeat": args.repeat, "sizes": args.sizes, "depths": args.depths, "daemon": args.daemon},
+        "results": [result.__dict__ for result in results],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+            handle.write("\n")
+    print_table(payload["results"])
+    return 1 if any(result.exit_status != 0 for result in results) else 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    with open(args.base, encoding="utf-8") as handle:
+        base = json.load(handle)
+    with open(args.new, encoding="utf-8") as handle:
+        new = json.load(handle)
+    base_rows = {(row["scenario"], row["size"]): row for row in base.get("results", [])}
+    print(f"base {base.get('commit') or '?'}{'+' if base.get('dirty') else ''}  "
+          f"new {new.get('commit') or '?'}{'+' if new.get('dirty') else ''}")
+    print("{:<15} {:>5} {:>10} {:>10} {:>8} {:>9}".format("scenario", "size", "base_ms", "new_ms", "delta", "spawns"))
+    regressions = 0
+    for row in new.get("results", []):
+        old = base_rows.get((row["scenario"], row["size"]))
+        if old is None:
+            continue
+        before = old["wall_ms"]["median"]
+        after = row["wall_ms"]["median"]
+        delta = (after - before) / before * 100.0 if before else 0.0
+        spawn_delta = ""
+        if old.get("spawns") and row.get("spawns"):
+            spawn_delta = f"{row['spawns']['total'] - old['spawns']['total']:+d}"
+        flag = ""
+        if delta > args.threshold:
+            regressions += 1
+            flag = "  <-- slower"
+        print("{:<15} {:>5} {:>10.1f} {:>10.1f} {:>7.1f}% {:>9}{}".format(
+            row["scenario"], row["size"], before, after, delta, spawn_delta, flag
+        ))
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def _int_list(value: str) -> List[int]:
+    try:
+        return [int(part) for part in value.split(",") if part.strip()]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers: {value}") from exc
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="relay_bench", description="Relay startup-time benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Run the benchmarks")
+    run.add_argument("--scenario", action="append", help="Only this scenario (repeatable); see `list`")
+    run.add_argument("--sizes", type=_int_list, default=[10, 100, 1000], help="Kit tree sizes (default 10,100,1000)")
+    run.add_argument("--depths", type=_int_list, default=[1, 10, 50], help="Persona stack depths (default 1,10,50)")
+    run.add_argument("--repeat", type=int, default=5, help="Warm runs per measurement (default 5)")
+    run.add_argument("--quick", action="store_true", help="Smoke run: size 10, depth 1, one warm run")
+    run.add_argument("--daemon", action="store_true", help="Run with `relay daemon` started for each tree")
+    run.add_argument("--no-counts", action="store_true", help="Skip the spawn/import counting pass")
+    run.add_argument("--output", help="Write JSON results here")
+    run.add_argument("--keep", action="store_true", help="Keep the generated trees")
+    run.add_argument("--quiet", action="store_true", help="Only print the final table")
+    compare = sub.add_parser("compare", help="Compare two result files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=10.0, help="Flag medians slower by more than this %%")
+    compare.add_argument("--fail-on-regression", action="store_true", help="Exit 1 when anything is flagged")
+    sub.add_parser("list", help="List scenarios")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for scenario in SCENARIOS:
+            print(f"{scenario.name:<15} {scenario.description}")
+        return 0
+    if args.command == "compare":
+        return cmd_compare(args)
+    if args.quick:
+        args.sizes, args.depths, args.repeat = [10], [1], 1
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return cmd_run(args)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env sh
+# Smoke-test the startup benchmark harness: one quick run, JSON shape, compare.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BENCH="$REPO_ROOT/tests/bench/relay_bench.py"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for bench_smoke test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+unset TMUX || true
+
+python3 "$BENCH" run --quick --quiet --scenario kit-list-long --scenario persona-exec --scenario tui-kits \
+  --output "$TMPDIR/base.json" > "$TMPDIR/table.txt" || {
+  echo "FAIL: benchmark run failed" >&2
+  cat "$TMPDIR/table.txt" >&2
+  exit 1
+}
+grep -q '^kit-list-long  *10 kits' "$TMPDIR/table.txt" || { echo "FAIL: table missing kit-list-long row" >&2; exit 1; }
+
+python3 - "$TMPDIR/base.json" <<'PY'
+import json, sys
+data = json.load(open(sys.argv[1]))
+assert data["version"] == 1, data
+rows = {row["scenario"]: row for row in data["results"]}
+assert set(rows) == {"kit-list-long", "persona-exec", "tui-kits"}, rows.keys()
+for row in rows.values():
+    assert row["exit_status"] == 0, row
+    assert row["runs"] == 1 and row["wall_ms"]["median"] > 0, row
+    assert row["spawns"]["total"] == sum(row["spawns"]["by_command"].values()), row
+# The TUI scenario ends at the (stubbed) fzf, after building its rows.
+assert rows["tui-kits"]["spawns"]["by_command"].get("fzf", 0) >= 1, rows["tui-kits"]
+assert rows["persona-exec"]["size"] == 1, rows["persona-exec"]
+# Make a "slower" copy for the comparison check below.
+for row in data["results"]:
+    row["wall_ms"]["median"] *= 3
+json.dump(data, open(sys.argv[1].replace("base", "slow"), "w"))
+PY
+
+python3 "$BENCH" compare "$TMPDIR/base.json" "$TMPDIR/base.json" --fail-on-regression >/dev/null \
+  || { echo "FAIL: identical results reported as a regression" >&2; exit 1; }
+if python3 "$BENCH" compare "$TMPDIR/base.json" "$TMPDIR/slow.json" --fail-on-regression > "$TMPDIR/cmp.txt"; then
+  echo "FAIL: 3x slower results not flagged" >&2
+  cat "$TMPDIR/cmp.txt" >&2
+  exit 1
+fi
+grep -q 'slower' "$TMPDIR/cmp.txt" || { echo "FAIL: compare output missing regression marker" >&2; exit 1; }
+
+echo "OK: benchmark harness"
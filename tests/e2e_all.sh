@@ -44,6 +44,31 @@ run_test crlf_configs "$THIS_DIR/crlf_configs.sh"
 run_test unicode_names "$THIS_DIR/unicode_names.sh"
 run_test strict_shell_opts "$THIS_DIR/strict_shell_opts.sh"
 run_test events_concurrency "$THIS_DIR/events_concurrency.sh"
+run_test plan_cache "$THIS_DIR/plan_cache.sh"
+run_test kit_batch_launch "$THIS_DIR/kit_batch_launch.sh"
+run_test kit_layout "$THIS_DIR/kit_layout.sh"
+run_test persona_stack_cache "$THIS_DIR/persona_stack_cache.sh"
+run_test kit_bulk "$THIS_DIR/kit_bulk.sh"
+run_test kit_status "$THIS_DIR/kit_status.sh"
+run_test events_store "$THIS_DIR/events_store.sh"
+run_test events_stats "$THIS_DIR/events_stats.sh"
+run_test events_throughput "$THIS_DIR/events_throughput.sh"
+run_test events_follow "$THIS_DIR/events_follow.sh"
+run_test kit_import_all "$THIS_DIR/kit_import_all.sh"
+run_test kit_import_rules "$THIS_DIR/kit_import_rules.sh"
+run_test kit_snapshot "$THIS_DIR/kit_snapshot.sh"
+run_test relay_daemon "$THIS_DIR/relay_daemon.sh"
+run_test kit_index "$THIS_DIR/kit_index.sh"
+run_test kit_trace "$THIS_DIR/kit_trace.sh"
+run_test kit_plan_protocol "$THIS_DIR/kit_plan_protocol.sh"
+run_test kit_fragments "$THIS_DIR/kit_fragments.sh"
+run_test kit_ready_lazy "$THIS_DIR/kit_ready_lazy.sh"
+run_test kit_reconcile "$THIS_DIR/kit_reconcile.sh"
+run_test tui_preview_cache "$THIS_DIR/tui_preview_cache.sh"
+run_test fastpath_imports "$THIS_DIR/fastpath_imports.sh"
+run_test persona_graph "$THIS_DIR/persona_graph.sh"
+run_test event_reader "$THIS_DIR/event_reader.sh"
+run_test bench_smoke "$THIS_DIR/bench_smoke.sh"
 
 printf '\nSummary: %d passed, %d failed, %d skipped\n' "$pass" "$fail" "$skip"
 [ "$fail" -eq 0 ]
\ No newline at end of file
@@ -0,0 +1,178 @@
+#!/usr/bin/env sh
+# Validate the backwards event reader (bounded reads, paging, partial lines)
+# and hold relay_events.awk, the parser of the shell fallbacks, to the rows
+# and show output python gives for the same records.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+LIB_DIR="$REPO_ROOT/lib"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for event_reader test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DAEMON_DISABLE=1
+export TZ=UTC
+unset RELAY_EVENT_LOG || true
+mkdir -p "$RELAY_STATE_DIR"
+LOG_PATH="$RELAY_STATE_DIR/events.log"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+# The TUI's entry point for event rows.
+events_py() {
+  PYTHONPATH="$LIB_DIR" python3 -S -m relay_fastpath events --log "$LOG_PATH" "$@"
+}
+
+# Records the two parsers must agree on: legacy messages holding "|", JSON
+# escapes (surrogate pairs included), nested "type" keys, non-string members,
+# lines that only look like JSON, CRLF endings and blank lines.
+PYTHONPATH="$LIB_DIR" python3 - "$LOG_PATH" <<'PY'
+import sys
+
+lines = [
+    "legacy|1760000000|deploy|web|ok",
+    "legacy|soon|ts is not a number",
+    "bare-type",
+    "",
+    "   ",
+    '{"ts":1760000002,"type":"deploy","message":"release \\"42\\" \\\\ \\/ a\\tb\\nc","data":{"type":"inner"}}',
+    '{"data":{"type":"inner","message":"no"},"type":"outer","ts":"1760000003","message":"caf\\u00e9 \\ud83d\\ude00 x|y"}',
+    '{"ts":1760000004.9,"type":7,"message":null,"list":[1,{"a":[]},"s"],"t":true,"e":-1.5e3}',
+    '{"ts":1760000005,"type":"x","message":"y"} trailing',
+    '{"ts":1760000006,"type":"raw\ttab","message":"z"}',
+    "{not json|1760000007|brace",
+    '{"ts":1760000008,"type":"crlf","message":"m"}\r',
+    "pipes||",
+]
+with open(sys.argv[1], "w", newline="") as log:
+    log.write("".join(line + "\n" for line in lines))
+PY
+
+events_py rows --limit 50 > "$TMPDIR/py.rows" || fail "python rows"
+LC_ALL=C awk -v limit=50 -v zone=+0000 -f "$LIB_DIR/relay_events.awk" "$LOG_PATH" > "$TMPDIR/awk.rows" \
+  || fail "awk rows"
+cmp -s "$TMPDIR/py.rows" "$TMPDIR/awk.rows" || fail "rows differ: $(diff "$TMPDIR/py.rows" "$TMPDIR/awk.rows")"
+grep -q "	legacy	2025-10-09 08:53:20	deploy|web|ok	" "$TMPDIR/py.rows" || fail "legacy message lost its pipes"
+"$BIN/relay" events show > "$TMPDIR/py.show"
+LC_ALL=C awk -v mode=legacy -f "$LIB_DIR/relay_events.awk" "$LOG_PATH" > "$TMPDIR/awk.show"
+cmp -s "$TMPDIR/py.show" "$TMPDIR/awk.show" || fail "show differs: $(diff "$TMPDIR/py.show" "$TMPDIR/awk.show")"
+
+# The TUI and `relay events show` fall back to the awk parser without python3.
+(
+  # Like relay-tui itself, the library expects to run without `set -e`.
+  set +e
+  export RELAY_TUI_ROOT_DIR="$REPO_ROOT"
+  . "$LIB_DIR/relay_tui.sh"
+  relay_tui_daemon() { return 111; }
+  relay_tui_events_py() { return 127; }
+  relay_tui_events_rows 3 > "$TMPDIR/tui.rows" || fail "TUI fallback rows failed"
+)
+[ "$(cat "$TMPDIR/tui.rows")" = "$(head -n 3 "$TMPDIR/py.rows")" ] || fail "TUI fallback rows: $(cat "$TMPDIR/tui.rows")"
+# After a rotation the fallback takes the rest from the newest segments.
+mkdir -p "$RELAY_STATE_DIR/events.d"
+printf 'old|1759999990|one\nold|1759999991|two\n' > "$RELAY_STATE_DIR/events.d/seg-000001-1759999990-1759999991.jsonl"
+printf 'old|1759999992|three\nold|1759999993|four\n' > "$RELAY_STATE_DIR/events.d/seg-000002-1759999992-1759999993.jsonl"
+events_py rows --limit 14 > "$TMPDIR/seg.rows" || fail "python rows across segments"
+grep -q '	old	.*	three	' "$TMPDIR/seg.rows" || fail "python rows skipped the segments: $(cat "$TMPDIR/seg.rows")"
+(
+  set +e
+  export RELAY_TUI_ROOT_DIR="$REPO_ROOT"
+  . "$LIB_DIR/relay_tui.sh"
+  relay_tui_daemon() { return 111; }
+  relay_tui_events_py() { return 127; }
+  relay_tui_events_rows 14 > "$TMPDIR/tui.seg.rows" || fail "TUI fallback rows across segments failed"
+)
+cmp -s "$TMPDIR/seg.rows" "$TMPDIR/tui.seg.rows" || fail "TUI fallback across segments: $(diff "$TMPDIR/seg.rows" "$TMPDIR/tui.seg.rows")"
+rm -r "$RELAY_STATE_DIR/events.d"
+
+mkdir -p "$TMPDIR/nopy"
+for tool in sh awk cat dirname mkdir; do
+  ln -s "$(command -v "$tool")" "$TMPDIR/nopy/$tool"
+done
+PATH="$TMPDIR/nopy" "$BIN/relay-events" show > "$TMPDIR/sh.show" || fail "show without python3"
+cmp -s "$TMPDIR/py.show" "$TMPDIR/sh.show" || fail "show fallback differs: $(diff "$TMPDIR/py.show" "$TMPDIR/sh.show")"
+
+# Rows page further back with --skip, numbered from where they start.
+events_py rows --limit 3 --skip 2 > "$TMPDIR/page.rows"
+[ "$(cat "$TMPDIR/page.rows")" = "$(sed -n '3,5p' "$TMPDIR/py.rows")" ] || fail "rows --skip: $(cat "$TMPDIR/page.rows")"
+
+# Reading backwards: every block size gives the lines a forward split does,
+# paging resumes from an offset, a partial last line is skipped, and the
+# newest records of a long log cost a bounded read without touching the index.
+PYTHONPATH="$LIB_DIR" python3 - "$TMPDIR" <<'PY' || fail "backwards reader"
+import builtins
+import os
+import sys
+
+import relay_event_reader
+from relay_event_reader import reverse_lines, reverse_records
+from relay_events import EventStore, row_lines
+
+tmp = sys.argv[1]
+path = os.path.join(tmp, "sample.log")
+lines = [b"", b"a", b"x" * 40, b"", b"bc", b"{\"ts\":1}", b"y" * 9, b"z"]
+with open(path, "wb") as handle:
+    handle.write(b"".join(line + b"\n" for line in lines) + b"partial")
+expected = []
+offset = 0
+for line in lines:
+    expected.append((offset, line))
+    offset += len(line) + 1
+expected.reverse()
+for block in (1, 2, 3, 7, 16, 1 << 16):
+    got = list(reverse_lines(path, block=block))
+    assert got == expected, (block, got)
+assert list(reverse_lines(path, end=expected[2][0])) == expected[3:]
+assert list(reverse_lines(os.path.join(tmp, "missing.log"))) == []
+
+log_path = os.path.join(tmp, "long", "events.log")
+os.makedirs(os.path.dirname(log_path))
+with open(log_path, "w") as handle:
+    for n in range(60000):
+        handle.write('{"ts":%d,"type":"tick","message":"event %d"}\n' % (1760000000 + n, n))
+read = [0]
+real_open = builtins.open
+
+
+class Counted:
+    def __init__(self, handle):
+        self._handle = handle
+
+    def read(self, size=-1):
+        data = self._handle.read(size)
+        read[0] += len(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._handle, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._handle.close()
+
+
+relay_event_reader.open = lambda *args, **kwargs: Counted(real_open(*args, **kwargs))
+store = EventStore(log_path)
+rows = row_lines(store, 5)
+assert [row.split("\t")[3] for row in rows] == ["event %d" % n for n in range(59999, 59994, -1)], rows
+assert read[0] <= relay_event_reader.BLOCK, read[0]
+assert not os.path.exists(os.path.join(store.seg_dir, "active.idx")), "rows built the index"
+page = row_lines(store, 2, skip=30000)
+assert [row.split("\t")[0] for row in page] == ["30001", "30002"], page
+assert page[0].split("\t")[3] == "event 29999", page
+offsets = [offset for offset, _raw, _record in reverse_records(log_path)]
+assert len(offsets) == 60000 and offsets == sorted(offsets, reverse=True)
+PY
+
+echo "OK: event reader"
@@ -0,0 +1,86 @@
+#!/usr/bin/env sh
+# Validate the structured event store: JSONL records, history queries, rotation and the index
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+mkdir -p "$RELAY_STATE_DIR"
+
+LOG_PATH=$("$BIN/relay" events init)
+# An entry from an older release stays readable.
+printf 'legacy|%s|old format\n' "$(date +%s)" > "$LOG_PATH"
+
+"$BIN/relay" events emit -t deploy -p prod -k web --data '{"status":"ok"}' 'release "42"'
+"$BIN/relay" events emit note "$(printf 'two\nlines')"
+tail -n 2 "$LOG_PATH" | python3 -c '
+import json, sys
+deploy, note = [json.loads(line) for line in sys.stdin]
+assert deploy["type"] == "deploy" and deploy["message"] == "release \"42\"", deploy
+assert deploy["persona"] == "prod" and deploy["kit"] == "web" and deploy["data"] == {"status": "ok"}, deploy
+assert note["message"] == "two\nlines", note
+' || { echo "FAIL: emitted records are not the expected JSON" >&2; cat "$LOG_PATH" >&2; exit 1; }
+
+"$BIN/relay" events show | head -n 1 | grep -Eq '^legacy\|[0-9]+\|old format$' || { echo "FAIL: legacy line not rendered" >&2; exit 1; }
+"$BIN/relay" events history --type deploy | grep -q 'deploy  *release "42"  persona=prod kit=web data={"status":"ok"}' || {
+  echo "FAIL: history --type deploy" >&2
+  "$BIN/relay" events history >&2
+  exit 1
+}
+[ "$("$BIN/relay" events history --since 1h | wc -l | tr -d ' ')" -eq 4 ] || { echo "FAIL: history --since 1h" >&2; exit 1; }
+[ -z "$("$BIN/relay" events history --until 1000)" ] || { echo "FAIL: history --until matched new events" >&2; exit 1; }
+if "$BIN/relay" events emit bad --data '[1]' 2>/dev/null; then
+  echo "FAIL: non-object --data accepted" >&2
+  exit 1
+fi
+
+# Small segments: every few events rotate into events.d/.
+"$BIN/relay" events clear
+export RELAY_EVENTS_MAX_BYTES=600 RELAY_EVENTS_KEEP=50
+i=0
+while [ "$i" -lt 60 ]; do
+  i=$((i + 1))
+  case $((i % 3)) in
+    0) type=alpha ;;
+    1) type=beta ;;
+    *) type=gamma ;;
+  esac
+  "$BIN/relay" events emit "$type" "event-$i"
+done
+segments=$(find "$RELAY_STATE_DIR/events.d" -name 'seg-*.jsonl' | wc -l | tr -d ' ')
+[ "$segments" -ge 3 ] || { echo "FAIL: expected rotated segments, found $segments" >&2; exit 1; }
+[ "$("$BIN/relay" events show | wc -l | tr -d ' ')" -eq 60 ] || { echo "FAIL: show lost events across segments" >&2; exit 1; }
+expected=$(printf 'event-54\nevent-57\nevent-60')
+got=$("$BIN/relay" events history --type alpha --limit 3 --json | python3 -c 'import json,sys; print("\n".join(json.loads(l)["message"] for l in sys.stdin))')
+[ "$got" = "$expected" ] || { echo "FAIL: history --type alpha --limit 3 gave '$got'" >&2; exit 1; }
+
+# Once indexed, queries read only matching lines: scribbling over every
+# other event must not disturb a type query.
+for seg in "$RELAY_STATE_DIR"/events.d/seg-*.jsonl "$LOG_PATH"; do
+  sed '/"type":"alpha"/!s/[a-z]/x/g' "$seg" > "$TMPDIR/scribbled"
+  cat "$TMPDIR/scribbled" > "$seg"
+done
+[ "$("$BIN/relay" events history --type alpha | wc -l | tr -d ' ')" -eq 20 ] || { echo "FAIL: type query did not use the index" >&2; exit 1; }
+
+# Emits estimate the log size instead of measuring it every time.
+"$BIN/relay" events clear
+mkdir -p "$TMPDIR/shim"
+real_wc=$(command -v wc)
+printf '#!/bin/sh\necho wc >> "%s"\nexec "%s" "$@"\n' "$TMPDIR/wc.calls" "$real_wc" > "$TMPDIR/shim/wc"
+chmod +x "$TMPDIR/shim/wc"
+: > "$TMPDIR/wc.calls"
+i=0
+while [ "$i" -lt 20 ]; do
+  i=$((i + 1))
+  PATH="$TMPDIR/shim:$PATH" RELAY_EVENTS_MAX_BYTES=100000 "$BIN/relay" events emit tick "event-$i"
+done
+calls=$(wc -l < "$TMPDIR/wc.calls" | tr -d ' ')
+[ "$calls" -le 1 ] || { echo "FAIL: 20 emits measured the log $calls times" >&2; exit 1; }
+
+"$BIN/relay" events clear
+[ ! -d "$RELAY_STATE_DIR/events.d" ] || { echo "FAIL: clear left segments behind" >&2; exit 1; }
+
+echo "OK: structured event store"
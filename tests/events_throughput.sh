@@ -0,0 +1,86 @@
+#!/usr/bin/env sh
+# Concurrent emits never tear records; benchmark single vs batch (--stdin) emit
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+mkdir -p "$RELAY_STATE_DIR"
+
+LOG_PATH=$("$BIN/relay" events init)
+
+now_ms() {
+  python3 -c 'import time; print(int(time.time() * 1000))'
+}
+
+# Messages just under the sh write limit, messages that need python, and a
+# batch writer, all appending at once.
+medium=$(python3 -c 'print("m" * 900)')
+large=$(python3 -c 'print("L" * 9000)')
+python3 -c 'for i in range(2000): print("batch event-%d" % i)' > "$TMPDIR/batch.in"
+
+pids=""
+w=0
+while [ "$w" -lt 16 ]; do
+  w=$((w + 1))
+  (
+    i=0
+    while [ "$i" -lt 10 ]; do
+      i=$((i + 1))
+      "$BIN/relay" events emit medium "$w-$i $medium"
+    done
+  ) &
+  pids="$pids $!"
+done
+w=0
+while [ "$w" -lt 4 ]; do
+  w=$((w + 1))
+  "$BIN/relay" events emit large "$w $large" &
+  pids="$pids $!"
+done
+"$BIN/relay" events emit --stdin < "$TMPDIR/batch.in" &
+pids="$pids $!"
+# shellcheck disable=SC2086
+wait $pids
+
+python3 - "$LOG_PATH" <<'PY' || exit 1
+import collections
+import json
+import sys
+
+counts = collections.Counter()
+with open(sys.argv[1], encoding="utf-8") as handle:
+    for number, line in enumerate(handle, 1):
+        try:
+            counts[json.loads(line)["type"]] += 1
+        except ValueError:
+            print(f"FAIL: torn record on line {number}: {line[:80]!r}", file=sys.stderr)
+            sys.exit(1)
+expected = {"medium": 160, "large": 4, "batch": 2000}
+if dict(counts) != expected:
+    print(f"FAIL: expected {expected}, got {dict(counts)}", file=sys.stderr)
+    sys.exit(1)
+PY
+
+# Throughput: N single emits against one batch of the same size.
+"$BIN/relay" events clear
+N=200
+python3 -c "for i in range($N): print('bench event-%d' % i)" > "$TMPDIR/bench.in"
+start=$(now_ms)
+i=0
+while [ "$i" -lt "$N" ]; do
+  i=$((i + 1))
+  "$BIN/relay" events emit bench "event-$i"
+done
+single_ms=$(( $(now_ms) - start ))
+start=$(now_ms)
+"$BIN/relay" events emit --stdin < "$TMPDIR/bench.in"
+batch_ms=$(( $(now_ms) - start ))
+[ "$(wc -l < "$LOG_PATH" | tr -d ' ')" -eq $((N * 2)) ] || { echo "FAIL: benchmark lost events" >&2; exit 1; }
+[ "$batch_ms" -lt "$single_ms" ] || { echo "FAIL: batch emit (${batch_ms}ms) not faster than $N single emits (${single_ms}ms)" >&2; exit 1; }
+
+printf 'events emit: %d single in %dms, %d batched in %dms\n' "$N" "$single_ms" "$N" "$batch_ms"
+echo "OK: events emit is atomic and batches"
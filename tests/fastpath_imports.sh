@@ -0,0 +1,147 @@
+#!/usr/bin/env sh
+# Verify the relay_fastpath entry module: the shell tools no longer pipe
+# python source to `python3 -`, each command keeps to its import budget
+# (modules it may not pull in, a module count and an import-time ceiling)
+# and its output matches the heredocs it replaced.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+LIB_DIR="$REPO_ROOT/lib"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for fastpath_imports test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_DAEMON_DISABLE=1
+# Measure with bytecode cached, as an installed copy runs, without writing
+# into the source tree.
+unset PYTHONDONTWRITEBYTECODE RELAY_TRACE || true
+export PYTHONPYCACHEPREFIX="$TMPDIR/pycache"
+BUDGET_MS=${RELAY_IMPORT_BUDGET_MS:-100}
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_KITS_DIR/demo" "$RELAY_PERSONAS_DIR/base" "$RELAY_PERSONAS_DIR/extra"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+printf 'version = 1\n\n[[windows]]\nname = "main"\npanes = ["echo one", "echo two"]\n' > "$RELAY_KITS_DIR/demo/kit.toml"
+cat > "$RELAY_PERSONAS_DIR/base/persona.toml" <<'TOML'
+# Base
+[env]
+GREETING = "it's a \"test\""
+PLAIN = "a-b_c.d/e:f"
+EMPTY = ""
+API_TOKEN = "s3cret"
+
+[path]
+prepend = ["/opt/base bin"]
+append = ["/opt/tail"]
+TOML
+printf '[env]\nEXTRA = "$HOME"\n' > "$RELAY_PERSONAS_DIR/extra/persona.toml"
+"$BIN/relay" events emit info "budget check" >/dev/null
+
+if grep -n 'python3 - ' "$BIN"/* "$LIB_DIR"/*.sh; then
+  fail "python source still piped to python3 -"
+fi
+
+# sh_quote is shlex.quote without importing shlex.
+PYTHONPATH="$LIB_DIR" python3 - <<'PY' || fail "sh_quote differs from shlex.quote"
+import shlex
+from relay_fastpath import sh_quote
+
+for value in ["", "plain", "a b", "it's", "$HOME", "a-b_c.d/e:f,g@h%i+j=k", "ünï", "x\ny", "'", "*", "~user"]:
+    assert sh_quote(value) == shlex.quote(value), (value, sh_quote(value), shlex.quote(value))
+PY
+
+fastpath() {
+  PYTHONPATH="$LIB_DIR" python3 -S -m relay_fastpath "$@"
+}
+
+out=$(PATH=/usr/bin:/bin fastpath exports "$RELAY_PERSONAS_DIR/base/persona.toml")
+expected="export GREETING='it'\"'\"'s a \"test\"'
+export PLAIN=a-b_c.d/e:f
+export EMPTY=''
+export API_TOKEN=s3cret
+export PATH='/opt/base bin:/usr/bin:/bin:/opt/tail'"
+[ "$out" = "$expected" ] || fail "exports output: $out"
+out=$(fastpath preview "$RELAY_PERSONAS_DIR/base/persona.toml")
+printf '%s\n' "$out" | grep -q 'API_TOKEN  *\*\*\* hidden \*\*\*' || fail "preview does not hide secrets: $out"
+out=$(fastpath events --log "$RELAY_STATE_DIR/events.log" rows --limit 5)
+printf '%s\n' "$out" | grep -q 'budget check' || fail "events rows: $out"
+fastpath bogus >/dev/null 2>&1 && fail "unknown command accepted"
+
+# import_budget <label> <forbidden modules> <command...>: the modules the
+# command imports (everything after runpy) and the cumulative time of its
+# top-level imports, best of three runs.
+import_budget() {
+  label=$1
+  forbidden=$2
+  shift 2
+  fastpath "$@" >/dev/null 2>&1 || true
+  for run in 1 2 3; do
+    PYTHONPATH="$LIB_DIR" python3 -S -X importtime -m relay_fastpath "$@" 2>"$TMPDIR/imports.$run" >/dev/null || true
+  done
+  python3 - "$label" "$forbidden" "$BUDGET_MS" "$TMPDIR/imports.1" "$TMPDIR/imports.2" "$TMPDIR/imports.3" <<'PY'
+import sys
+
+label, forbidden, budget_ms = sys.argv[1], sys.argv[2].split(), int(sys.argv[3])
+best, modules = None, set()
+for path in sys.argv[4:]:
+    seen, total, started = set(), 0, False
+    for line in open(path, encoding="utf-8"):
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        if name.strip() == "runpy":
+            started = True
+            continue
+        if started:
+            seen.add(name.strip())
+            if len(name) - len(name.lstrip(" ")) == 1:
+                total += int(cumulative)
+    modules |= seen
+    best = total if best is None else min(best, total)
+bad = sorted(modules & set(forbidden))
+if bad:
+    sys.exit(f"{label}: imports {' '.join(bad)}")
+if len(modules) > 40:
+    sys.exit(f"{label}: {len(modules)} modules imported (budget 40): {' '.join(sorted(modules))}")
+if best > budget_ms * 1000:
+    sys.exit(f"{label}: imports took {best / 1000:.1f} ms (budget {budget_ms} ms)")
+print(f"{label}: {len(modules)} modules, {best / 1000:.1f} ms")
+PY
+}
+
+always="argparse shlex subprocess socket socketserver threading base64 tempfile hashlib"
+import_budget plan "$always json" plan "$RELAY_PERSONAS_DIR" "$RELAY_KITS_DIR/demo/kit.toml" demo "$RELAY_KITS_DIR/demo" - \
+  || fail "plan import budget"
+import_budget exports "$always json" exports "$RELAY_PERSONAS_DIR/base/persona.toml" || fail "exports import budget"
+import_budget stack "$always json" stack "$RELAY_PERSONAS_DIR" "$TMPDIR/stack.sh" header "base
+extra" || fail "stack import budget"
+import_budget preview "$always json" preview "$RELAY_PERSONAS_DIR/base/persona.toml" || fail "preview import budget"
+import_budget events "$always" events --log "$RELAY_STATE_DIR/events.log" detail --index 1 || fail "events import budget"
+import_budget overlay "$always" overlay "$RELAY_KITS_DIR/demo" "$RELAY_KITS_DIR/demo/kit.toml" main:2 clear \
+  || fail "overlay import budget"
+
+# The entrypoints behave as before: a persona stack, pane overlays, a plan.
+"$BIN/relay" persona exec base extra -- sh -c 'printf "%s|%s|%s\n" "$GREETING" "$EXTRA" "$PATH"' > "$TMPDIR/exec.out" \
+  || fail "persona exec"
+case "$(cat "$TMPDIR/exec.out")" in
+  "it's a \"test\"|\$HOME|/opt/base bin:"*":/opt/tail") ;;
+  *) fail "persona exec environment: $(cat "$TMPDIR/exec.out")" ;;
+esac
+"$BIN/relay" kit persona assign demo main:2 extra >/dev/null || fail "pane persona overlay"
+grep -q '"0:1"' "$RELAY_KITS_DIR/demo/pane-personas.json" || fail "overlay not saved"
+"$BIN/relay-kit" start --dry-run demo | grep -q 'extra' || fail "plan lacks the overlay persona"
+
+echo "OK: fastpath imports"
@@ -124,9 +124,11 @@ if 'relay/bin/relay-persona' not in content:
     raise SystemExit('relay-persona helper missing for pane overlay')
 if "'exec' 'overlay' --" not in content:
     raise SystemExit('overlay command not layered on pane')
+# Launch commands are chained into one tmux invocation; check each command.
 for line in content.splitlines():
-    if 'pane-two' in line and "'overlay'" in line:
-        raise SystemExit('Overlay should not apply to second pane')
+    for command in line.split(' ; '):
+        if 'pane-two' in command and "'overlay'" in command:
+            raise SystemExit('Overlay should not apply to second pane')
 LOGCHECK
 
 # Clear overlay and ensure wrapper no longer appears.
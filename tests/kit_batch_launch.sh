@@ -0,0 +1,158 @@
+#!/usr/bin/env sh
+# Verify start_kit launches the whole kit through one chained tmux invocation.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+
+TMP_ROOT=$(mktemp -d)
+trap 'rm -rf "$TMP_ROOT"' EXIT
+
+STUB_BIN="$TMP_ROOT/bin"
+LOG="$TMP_ROOT/tmux.log"
+mkdir -p "$TMP_ROOT/kits/batch" "$TMP_ROOT/personas" "$TMP_ROOT/state" "$STUB_BIN"
+
+cat > "$TMP_ROOT/kits/batch/kit.toml" <<'KIT'
+version = 1
+session = "batch"
+attach = false
+
+[[windows]]
+name = "main"
+panes = [
+  "echo one",
+  "echo two",
+  "echo three",
+  "echo four; echo five;",
+]
+KIT
+
+cat > "$STUB_BIN/tmux" <<'TMUXSTUB'
+#!/usr/bin/env sh
+cmd=${1:-}
+{
+  printf '%s' "$cmd"
+  shift
+  for arg in "$@"; do
+    printf ' [%s]' "$arg"
+  done
+  printf '\n'
+} >> "$TMUX_TEST_LOG"
+case "$cmd" in
+  has-session)
+    exit 1
+    ;;
+esac
+exit 0
+TMUXSTUB
+chmod +x "$STUB_BIN/tmux"
+
+export PATH="$STUB_BIN:$PATH"
+export TMUX_TEST_LOG="$LOG"
+export RELAY_KITS_DIR="$TMP_ROOT/kits"
+export RELAY_PERSONAS_DIR="$TMP_ROOT/personas"
+export RELAY_STATE_DIR="$TMP_ROOT/state"
+unset TMUX || true
+
+"$REPO_ROOT/bin/relay-kit" start batch >/dev/null
+
+calls=$(wc -l < "$LOG" | tr -d ' ')
+if [ "$calls" -ne 2 ]; then
+  echo "FAIL: expected 2 tmux invocations, saw $calls" >&2
+  cat "$LOG" >&2
+  exit 1
+fi
+batch=$(sed -n '2p' "$LOG")
+case "$batch" in
+  new-session*) ;;
+  *)
+    echo "FAIL: batch should start with new-session: $batch" >&2
+    exit 1
+    ;;
+esac
+separators=$(printf '%s\n' "$batch" | grep -o ' \[;\]' | wc -l | tr -d ' ')
+# new-session + 4 send-keys + 3 split-window/select-layout pairs
+if [ "$separators" -ne 10 ]; then
+  echo "FAIL: expected 11 chained commands, saw $((separators + 1))" >&2
+  printf '%s\n' "$batch" >&2
+  exit 1
+fi
+# A trailing ';' in a pane command must be escaped so tmux keeps it literal.
+printf '%s\n' "$batch" | grep -Fq 'echo four; echo five\;]' || {
+  echo "FAIL: trailing semicolon was not escaped" >&2
+  printf '%s\n' "$batch" >&2
+  exit 1
+}
+
+"$REPO_ROOT/bin/relay-kit" start batch --dry-run > "$TMP_ROOT/dry.out"
+grep -q '^Launch: 2 tmux invocations (has-session + 1 batch of 11 commands); unbatched: 12$' "$TMP_ROOT/dry.out" || {
+  echo "FAIL: dry-run did not report launch cost" >&2
+  cat "$TMP_ROOT/dry.out" >&2
+  exit 1
+}
+
+# Past tmux's command-size limit the same commands go out in several batches,
+# in order, each still a single chained invocation.
+: > "$LOG"
+RELAY_TMUX_BATCH_LIMIT=200 "$REPO_ROOT/bin/relay-kit" start batch >/dev/null
+calls=$(wc -l < "$LOG" | tr -d ' ')
+if [ "$calls" -lt 3 ]; then
+  echo "FAIL: expected the launch to be split into several batches, saw $calls invocations" >&2
+  cat "$LOG" >&2
+  exit 1
+fi
+# The stub logs each invocation's first word bare; bracket it like the rest.
+split=$(sed -n '2,$p' "$LOG" | sed 's/^\([a-z-]*\)/[\1]/' | awk 'NR > 1 { printf " [;] " } { printf "%s", $0 } END { print "" }')
+[ "$split" = "$(printf '%s\n' "$batch" | sed 's/^\([a-z-]*\)/[\1]/')" ] || {
+  echo "FAIL: split batches do not replay the single batch" >&2
+  cat "$LOG" >&2
+  exit 1
+}
+RELAY_TMUX_BATCH_LIMIT=200 "$REPO_ROOT/bin/relay-kit" start batch --dry-run | grep -q '^Launch: [0-9]* tmux invocations (has-session + [0-9]* batches of 11 commands)' || {
+  echo "FAIL: dry-run did not report the split" >&2
+  exit 1
+}
+
+# The limit is in bytes: bash in a UTF-8 locale splits non-ASCII commands
+# exactly as it does in the C locale.
+if command -v bash >/dev/null 2>&1; then
+  mkdir -p "$TMP_ROOT/kits/wide"
+  cat > "$TMP_ROOT/kits/wide/kit.toml" <<'KIT'
+version = 1
+session = "wide"
+attach = false
+
+[[windows]]
+name = "main"
+panes = [
+  "echo éééééééééééééééééééééééééééééééééééééééé",
+  "echo éééééééééééééééééééééééééééééééééééééééé",
+  "echo éééééééééééééééééééééééééééééééééééééééé",
+]
+KIT
+  wide_c=$(LC_ALL=C RELAY_TMUX_BATCH_LIMIT=200 bash "$REPO_ROOT/bin/relay-kit" start wide --dry-run | grep '^Launch:')
+  wide_utf8=$(LC_ALL=C.UTF-8 RELAY_TMUX_BATCH_LIMIT=200 bash "$REPO_ROOT/bin/relay-kit" start wide --dry-run | grep '^Launch:')
+  [ "$wide_utf8" = "$wide_c" ] || {
+    echo "FAIL: UTF-8 locale batches differ from C: $wide_utf8 / $wide_c" >&2
+    exit 1
+  }
+fi
+
+# A single command over the limit cannot be split: the launch stops with an
+# error before sending anything.
+: > "$LOG"
+if RELAY_TMUX_BATCH_LIMIT=20 "$REPO_ROOT/bin/relay-kit" start batch > "$TMP_ROOT/long.out" 2>&1; then
+  echo "FAIL: a command over the batch limit was launched" >&2
+  exit 1
+fi
+grep -q 'over the 20-byte batch limit' "$TMP_ROOT/long.out" || {
+  echo "FAIL: no error for a command over the batch limit" >&2
+  cat "$TMP_ROOT/long.out" >&2
+  exit 1
+}
+grep -qv '^has-session' "$LOG" && {
+  echo "FAIL: tmux commands sent despite a command over the batch limit" >&2
+  cat "$LOG" >&2
+  exit 1
+}
+
+echo "OK: kit launch batched into one tmux invocation"
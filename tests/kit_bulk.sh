@@ -0,0 +1,84 @@
+#!/usr/bin/env sh
+# Verify bulk kit start/stop with a bounded worker pool and aggregate status.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v tmux >/dev/null 2>&1; then
+  echo "SKIP: tmux is required for kit_bulk test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DATA_DIR="$TMPDIR/data"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_DATA_DIR" "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR"
+
+KITS="bulk1 bulk2 bulk3 bulk4"
+cleanup() {
+  for kit in $KITS; do
+    tmux kill-session -t "relay-$kit" >/dev/null 2>&1 || true
+  done
+  rm -rf "$TMPDIR"
+}
+trap cleanup EXIT INT TERM
+
+for kit in $KITS; do
+  mkdir -p "$RELAY_KITS_DIR/$kit"
+  cat > "$RELAY_KITS_DIR/$kit/kit.toml" <<EOF
+version = 1
+session = "relay-$kit"
+attach = true
+
+[[windows]]
+name = "main"
+panes = ["echo $kit"]
+EOF
+  tmux kill-session -t "relay-$kit" >/dev/null 2>&1 || true
+done
+
+# attach = true in every kit, but bulk mode never attaches without --attach.
+unset TMUX || true
+"$BIN/relay" kit up --all -j 2 > "$TMPDIR/up.out" 2>&1 || {
+  echo "FAIL: bulk start failed" >&2
+  cat "$TMPDIR/up.out" >&2
+  exit 1
+}
+for kit in $KITS; do
+  tmux has-session -t "relay-$kit" 2>/dev/null || { echo "FAIL: relay-$kit not started" >&2; exit 1; }
+  grep -q "^$kit  *ok  " "$TMPDIR/up.out" || { echo "FAIL: summary missing $kit" >&2; cat "$TMPDIR/up.out" >&2; exit 1; }
+done
+grep -q '^4 kit(s): 4 ok, 0 failed' "$TMPDIR/up.out" || { echo "FAIL: bad summary total" >&2; cat "$TMPDIR/up.out" >&2; exit 1; }
+
+# Every plan was compiled up front, so the workers only saw cache hits.
+"$BIN/relay" kit plan --stats > "$TMPDIR/stats.out"
+[ "$(grep -c 'hits=1	misses=1' "$TMPDIR/stats.out")" -eq 4 ] || { echo "FAIL: plans not precompiled" >&2; cat "$TMPDIR/stats.out" >&2; exit 1; }
+
+"$BIN/relay" kit down bulk1 bulk2 -j 2 >/dev/null 2>&1
+if tmux has-session -t relay-bulk1 2>/dev/null || tmux has-session -t relay-bulk2 2>/dev/null; then
+  echo "FAIL: bulk stop left sessions running" >&2
+  exit 1
+fi
+tmux has-session -t relay-bulk3 2>/dev/null || { echo "FAIL: bulk stop touched relay-bulk3" >&2; exit 1; }
+
+# A missing kit fails the run with its own status while the rest still start.
+set +e
+"$BIN/relay" kit up bulk1 missing -j 2 > "$TMPDIR/partial.out" 2>&1
+status=$?
+set -e
+[ "$status" -eq 2 ] || { echo "FAIL: expected exit 2 for missing kit, got $status" >&2; cat "$TMPDIR/partial.out" >&2; exit 1; }
+grep -q '^missing  *failed(2)' "$TMPDIR/partial.out" || { echo "FAIL: missing kit not reported" >&2; cat "$TMPDIR/partial.out" >&2; exit 1; }
+tmux has-session -t relay-bulk1 2>/dev/null || { echo "FAIL: relay-bulk1 not started alongside a failing kit" >&2; exit 1; }
+
+"$BIN/relay" kit down --all >/dev/null 2>&1
+for kit in $KITS; do
+  if tmux has-session -t "relay-$kit" 2>/dev/null; then
+    echo "FAIL: relay-$kit still running after down --all" >&2
+    exit 1
+  fi
+done
+
+echo "OK: bulk kit start/stop"
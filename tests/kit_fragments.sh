@@ -0,0 +1,121 @@
+#!/usr/bin/env sh
+# Verify kit composition from shared fragments: extends, parameterised
+# includes, error reporting, the fragment parse cache and cache invalidation.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+LIB_DIR="$REPO_ROOT/lib"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for kit_fragments test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_KITS_DIR="$TMPDIR/share/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/share/personas"
+export RELAY_DAEMON_DISABLE=1
+FRAGMENTS="$TMPDIR/share/fragments"
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_KITS_DIR/api" "$RELAY_PERSONAS_DIR/base" "$RELAY_PERSONAS_DIR/ops" "$FRAGMENTS/mon"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+printf 'version = 1\n' > "$RELAY_PERSONAS_DIR/base/persona.toml"
+printf 'version = 1\n' > "$RELAY_PERSONAS_DIR/ops/persona.toml"
+cat > "$FRAGMENTS/base.toml" <<'TOML'
+attach = false
+personas = ["base"]
+
+[[windows]]
+name = "shell"
+panes = ["echo base"]
+TOML
+cat > "$FRAGMENTS/mon/logs.toml" <<'TOML'
+[params]
+service = "app"
+level = "info"
+
+[[windows]]
+name = "logs-{{service}}"
+panes = ["journalctl -u {{service}} -p {{ level }} --since {{since}}"]
+TOML
+cat > "$RELAY_KITS_DIR/api/kit.toml" <<'TOML'
+version = 1
+extends = "base"
+session = "api"
+personas = ["ops", "base"]
+
+[params]
+level = "debug"
+
+[[windows]]
+include = "mon/logs"
+with = { service = "api" }
+
+[[windows]]
+name = "edit"
+panes = ["vim"]
+TOML
+
+"$BIN/relay-kit" start --dry-run api > "$TMPDIR/out"
+for expected in "Attach: no" "  [1 (shell)]" "  [2 (logs-api)]" "  [3 (edit)]" \
+  "      Command: journalctl -u api -p debug --since {{since}}"; do
+  grep -qxF -- "$expected" "$TMPDIR/out" || fail "dry run lacks: $expected"
+done
+[ "$(sed -n '/^Kit personas:/,/^$/p' "$TMPDIR/out" | grep -c '^  - ')" = "2" ] || fail "kit personas not merged once each"
+grep -q "^DEP:$FRAGMENTS/mon/logs.toml\$" "$RELAY_STATE_DIR/cache/plans/api.plan" || fail "plan does not depend on its fragments"
+"$BIN/relay-kit" list --long | grep -q '^api  *api  *3  *3  *base,ops ' || fail "index rows ignore fragments"
+
+# Editing a fragment invalidates the plan cache and the metadata index.
+sleep 1
+printf '\n[[windows]]\nname = "extra"\npanes = ["echo extra"]\n' >> "$FRAGMENTS/base.toml"
+"$BIN/relay-kit" start --dry-run api | grep -qxF "  [2 (extra)]" || fail "cached plan survived a fragment edit"
+"$BIN/relay-kit" list --long | grep -q '^api  *api  *4  *4 ' || fail "index survived a fragment edit"
+
+# Bad compositions are reported without a traceback (the kit then falls back
+# to a bare session, like any kit that fails to parse).
+mkdir -p "$RELAY_KITS_DIR/bad" "$RELAY_KITS_DIR/loop"
+printf 'version = 1\n[[windows]]\ninclude = "mon/logs"\nwith = { sevrice = "x" }\n' > "$RELAY_KITS_DIR/bad/kit.toml"
+printf 'extends = "loop"\n' > "$FRAGMENTS/loop.toml"
+printf 'version = 1\nextends = ["loop"]\n' > "$RELAY_KITS_DIR/loop/kit.toml"
+"$BIN/relay-kit" start --dry-run bad > "$TMPDIR/bad.out" 2>&1 || true
+grep -q 'fragment mon/logs has no parameter(s): sevrice' "$TMPDIR/bad.out" || fail "bad param message: $(cat "$TMPDIR/bad.out")"
+"$BIN/relay-kit" start --dry-run loop > "$TMPDIR/loop.out" 2>&1 || true
+grep -q 'fragment cycle: loop.toml -> loop.toml' "$TMPDIR/loop.out" || fail "cycle message: $(cat "$TMPDIR/loop.out")"
+! grep -q Traceback "$TMPDIR/bad.out" "$TMPDIR/loop.out" || fail "composition errors printed a traceback"
+rm -rf "$RELAY_KITS_DIR/bad" "$RELAY_KITS_DIR/loop"
+
+# Forty kits sharing two fragments parse each fragment once, and a later
+# process reuses the parsed fragments from the content-hash cache.
+i=0
+while [ "$i" -lt 40 ]; do
+  mkdir -p "$RELAY_KITS_DIR/k$i"
+  printf 'version = 1\nextends = "base"\n[[windows]]\ninclude = "mon/logs"\nwith = { service = "s%s" }\n' "$i" \
+    > "$RELAY_KITS_DIR/k$i/kit.toml"
+  i=$((i + 1))
+done
+parse_all() {
+  PYTHONPATH="$LIB_DIR" python3 - "$RELAY_KITS_DIR" <<'PY'
+import os, sys
+import relay_kit_config as config
+root = sys.argv[1]
+for name in sorted(os.listdir(root)):
+    if name.startswith("k"):
+        kit = config.load_kit_config(os.path.join(root, name, "kit.toml"), os.path.join(root, name))
+        assert kit["windows"][-1]["name"] == "logs-s" + name[1:], kit["windows"]
+stats = config.fragment_stats
+print(stats["parsed"], stats["cached"], stats["memo"])
+PY
+}
+rm -rf "$RELAY_STATE_DIR/cache/fragments"
+[ "$(parse_all)" = "2 0 78" ] || fail "cold parse counts: $(parse_all)"
+[ "$(parse_all)" = "0 2 78" ] || fail "warm parse counts: $(parse_all)"
+[ "$(RELAY_FRAGMENT_CACHE_DISABLE=1 parse_all)" = "2 0 78" ] || fail "RELAY_FRAGMENT_CACHE_DISABLE ignored"
+
+echo "OK: kit fragments"
@@ -0,0 +1,76 @@
+#!/usr/bin/env sh
+# Verify kit import snapshots sessions with a single tmux call and that
+# `relay kit import --all` captures every non-relay session in one pass.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v tmux >/dev/null 2>&1; then
+  echo "SKIP: tmux is required for kit import --all test" >&2
+  exit 0
+fi
+REAL_TMUX=$(command -v tmux)
+
+TMPDIR=$(mktemp -d)
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DATA_DIR="$TMPDIR/data"
+mkdir -p "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR" "$RELAY_STATE_DIR" "$RELAY_DATA_DIR"
+
+TMUX_SOCKET_NAME="relay-import-all-$$"
+export RELAY_TMUX_SOCKET_NAME="$TMUX_SOCKET_NAME"
+tmux_cmd() {
+  TMUX="" "$REAL_TMUX" -L "$TMUX_SOCKET_NAME" -f /dev/null "$@"
+}
+trap 'tmux_cmd kill-server >/dev/null 2>&1 || true; rm -rf "$TMPDIR"' EXIT INT TERM
+
+new_session_output=$(tmux_cmd new-session -ds Ops-Main -n edit -c "$REPO_ROOT" 2>&1) || {
+  echo "SKIP: unable to start tmux session: $new_session_output" >&2
+  exit 0
+}
+tmux_cmd new-window -d -t Ops-Main -n logs -c "$REPO_ROOT/docs"
+tmux_cmd split-window -d -t Ops-Main:logs -c "$REPO_ROOT/tests"
+tmux_cmd new-window -d -t Ops-Main -n build -c /tmp
+tmux_cmd new-session -ds scratch -c /tmp
+tmux_cmd new-session -ds relay-managed -c /tmp
+
+# Log every tmux invocation the importer makes.
+mkdir -p "$TMPDIR/bin"
+cat > "$TMPDIR/bin/tmux" <<STUB
+#!/bin/sh
+printf '%s\n' "\$*" >> "$TMPDIR/tmux.calls"
+exec "$REAL_TMUX" "\$@"
+STUB
+chmod +x "$TMPDIR/bin/tmux"
+PATH="$TMPDIR/bin:$PATH"
+export PATH
+
+: > "$TMPDIR/tmux.calls"
+"$BIN/relay-kit" import --dry-run Ops-Main > "$TMPDIR/single.toml"
+snapshot_calls=$(grep -vc '^-L [^ ]* has-session' "$TMPDIR/tmux.calls" || true)
+[ "$snapshot_calls" -eq 1 ] || { echo "FAIL: single import made $snapshot_calls snapshot calls" >&2; cat "$TMPDIR/tmux.calls" >&2; exit 1; }
+grep -q 'list-panes -s' "$TMPDIR/tmux.calls" || { echo "FAIL: single import did not use list-panes -s" >&2; exit 1; }
+[ "$(grep -c '^\[\[windows\]\]' "$TMPDIR/single.toml")" -eq 3 ] || { echo "FAIL: expected 3 windows" >&2; cat "$TMPDIR/single.toml" >&2; exit 1; }
+grep -q 'name = "logs"' "$TMPDIR/single.toml" || { echo "FAIL: logs window missing" >&2; exit 1; }
+# The window path comes from its active pane.
+grep -q '/docs' "$TMPDIR/single.toml" || { echo "FAIL: window path not captured" >&2; cat "$TMPDIR/single.toml" >&2; exit 1; }
+
+: > "$TMPDIR/tmux.calls"
+"$BIN/relay-kit" import --all > "$TMPDIR/all.out"
+[ "$(wc -l < "$TMPDIR/tmux.calls" | tr -d ' ')" -eq 1 ] || { echo "FAIL: --all made more than one tmux call" >&2; cat "$TMPDIR/tmux.calls" >&2; exit 1; }
+[ -f "$RELAY_KITS_DIR/ops-main/kit.toml" ] || { echo "FAIL: ops-main kit not written" >&2; cat "$TMPDIR/all.out" >&2; exit 1; }
+[ -f "$RELAY_KITS_DIR/scratch/kit.toml" ] || { echo "FAIL: scratch kit not written" >&2; exit 1; }
+[ ! -e "$RELAY_KITS_DIR/relay-managed" ] || { echo "FAIL: relay-managed session was imported" >&2; exit 1; }
+grep -q "Generated from tmux session 'Ops-Main'" "$RELAY_KITS_DIR/ops-main/kit.toml" || { echo "FAIL: provenance missing" >&2; exit 1; }
+
+# A second run leaves existing kits alone and reports them.
+set +e
+"$BIN/relay-kit" import --all > /dev/null 2> "$TMPDIR/again.err"
+status=$?
+set -e
+[ "$status" -eq 2 ] || { echo "FAIL: expected exit 2 when kits exist, got $status" >&2; exit 1; }
+grep -q 'Kit already exists: scratch' "$TMPDIR/again.err" || { echo "FAIL: existing kit not reported" >&2; cat "$TMPDIR/again.err" >&2; exit 1; }
+
+echo "OK: kit import snapshots sessions in one tmux call"
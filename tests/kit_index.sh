@@ -0,0 +1,125 @@
+#!/usr/bin/env sh
+# Verify the kit/persona metadata index: one build, incremental refresh,
+# python-free reads while nothing changed, and parity with the TUI listing.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+LIB_DIR="$REPO_ROOT/lib"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for kit_index test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_DAEMON_DISABLE=1
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR/base" "$TMPDIR/bin"
+INDEX="$RELAY_STATE_DIR/cache/index.tsv"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+i=0
+while [ "$i" -lt 12 ]; do
+  i=$((i + 1))
+  mkdir -p "$RELAY_KITS_DIR/kit$i"
+  cat > "$RELAY_KITS_DIR/kit$i/kit.toml" <<KIT
+version = 1
+session = "relay-kit$i"
+description = "Kit number $i"
+personas = ["base"]
+
+[[windows]]
+name = "main"
+panes = ["echo a", { run = "echo b", personas = ["extra"] }]
+
+[[windows]]
+name = "logs"
+panes = ["echo c"]
+KIT
+done
+printf '# Base persona\n[env]\nEDITOR = "vi"\n' > "$RELAY_PERSONAS_DIR/base/persona.toml"
+
+# Count python runs behind the shell entrypoints.
+real_python=$(command -v python3)
+cat > "$TMPDIR/bin/python3" <<STUB
+#!/bin/sh
+echo run >> "$TMPDIR/python.calls"
+exec "$real_python" "\$@"
+STUB
+chmod +x "$TMPDIR/bin/python3"
+calls() {
+  if [ -f "$TMPDIR/python.calls" ]; then wc -l < "$TMPDIR/python.calls" | tr -d ' '; else echo 0; fi
+}
+
+tab=$(printf '\t')
+long=$(PATH="$TMPDIR/bin:$PATH" "$BIN/relay" kit list --tsv)
+[ "$(printf '%s\n' "$long" | wc -l | tr -d ' ')" = "12" ] || fail "expected 12 kits: $long"
+row=$(printf '%s\n' "$long" | grep "^kit3$tab")
+[ "$row" = "kit3${tab}relay-kit3${tab}2${tab}3${tab}base,extra${tab}Kit number 3" ] || fail "unexpected row: $row"
+"$BIN/relay" kit list --long | grep -q '^kit3  *relay-kit3  *2  *3  base,extra  *Kit number 3$' || fail "long listing"
+[ "$("$BIN/relay" kit list | wc -l | tr -d ' ')" = "12" ] || fail "plain listing changed"
+
+# Once the index has settled, reads never start python.
+sleep 2
+PATH="$TMPDIR/bin:$PATH" "$BIN/relay" kit list --tsv >/dev/null
+before=$(calls)
+PATH="$TMPDIR/bin:$PATH" "$BIN/relay" kit list --tsv >/dev/null
+PATH="$TMPDIR/bin:$PATH" "$BIN/relay" kit list --long >/dev/null
+[ "$(calls)" = "$before" ] || fail "fresh index still ran python"
+
+# An edit re-reads exactly that kit.
+sed 's/Kit number 5/Renamed five/' "$RELAY_KITS_DIR/kit5/kit.toml" > "$TMPDIR/kit5.toml"
+mv "$TMPDIR/kit5.toml" "$RELAY_KITS_DIR/kit5/kit.toml"
+refresh=$(PYTHONPATH="$LIB_DIR" python3 -m relay_index --index "$INDEX" \
+  --kits-dir "$RELAY_KITS_DIR" --personas-dir "$RELAY_PERSONAS_DIR" refresh)
+[ "$refresh" = "kit_reloads=1${tab}persona_reloads=0" ] || fail "incremental refresh reloaded: $refresh"
+"$BIN/relay" kit list --tsv | grep -q "^kit5$tab.*${tab}Renamed five$" || fail "edited description missing"
+
+rm -rf "$RELAY_KITS_DIR/kit7"
+"$BIN/relay" kit list --tsv | grep -q "^kit7$tab" && fail "deleted kit still listed"
+
+# A relative kits directory reads the same index as its absolute form,
+# without python once it is warm and without listing a kit twice.
+sleep 2
+absolute=$("$BIN/relay" kit list --tsv)
+(cd "$TMPDIR" && RELAY_KITS_DIR=kits PATH="$TMPDIR/bin:$PATH" "$BIN/relay" kit list --tsv) > "$TMPDIR/relative.tsv"
+before=$(calls)
+[ "$(cd "$TMPDIR" && RELAY_KITS_DIR=./kits/ PATH="$TMPDIR/bin:$PATH" "$BIN/relay" kit list --tsv)" = "$absolute" ] \
+  || fail "relative kits directory listing: $(cat "$TMPDIR/relative.tsv")"
+[ "$(calls)" = "$before" ] || fail "relative kits directory ran python on a warm index"
+[ "$(cat "$TMPDIR/relative.tsv")" = "$absolute" ] || fail "relative kits directory: $(cat "$TMPDIR/relative.tsv")"
+[ "$(cd "$TMPDIR" && RELAY_KITS_DIR=kits "$BIN/relay" kit list --long)" = "$("$BIN/relay" kit list --long)" ] \
+  || fail "relative kits directory long listing repeats kits"
+
+# Removing a fragments directory the index counted entries for sends the
+# listing to python, which prints it once.
+mkdir -p "$TMPDIR/fragments"
+printf '[[windows]]\nname = "shared"\npanes = ["echo s"]\n' > "$TMPDIR/fragments/shared.toml"
+"$BIN/relay" kit list --tsv >/dev/null
+rm -rf "$TMPDIR/fragments"
+[ "$("$BIN/relay" kit list --tsv)" = "$absolute" ] || fail "listing after the fragments directory went away"
+
+# The TUI listings read the same index and match the per-kit sed listing.
+# Like relay-tui itself, the library expects to run without `set -e`.
+set +e
+. "$LIB_DIR/relay_tui.sh"
+. "$LIB_DIR/relay_index.sh"
+indexed=$(relay_tui_kits_listing)
+direct=$(RELAY_TUI_CACHE_DISABLE=1 relay_tui_kits_listing)
+[ "$indexed" = "$direct" ] || fail "TUI kit listing differs from direct listing"
+[ "$(relay_tui_personas_listing)" = "$(RELAY_TUI_CACHE_DISABLE=1 relay_tui_personas_listing)" ] \
+  || fail "TUI persona listing differs from direct listing"
+[ "$(relay_tui_personas_listing)" = "base${tab}Base persona" ] || fail "persona listing"
+
+# An index written for other directories is never served.
+RELAY_KITS_DIR="$TMPDIR/empty" relay_index_rows kits | grep -q . && fail "index served for other directories"
+
+echo "OK: kit metadata index"
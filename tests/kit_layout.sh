@@ -0,0 +1,78 @@
+#!/usr/bin/env sh
+# Verify kits build split panes inside declared windows and apply layouts/titles.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v tmux >/dev/null 2>&1; then
+  echo "SKIP: tmux is required for kit_layout test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DATA_DIR="$TMPDIR/data"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_DATA_DIR" "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR"
+
+SESSION="e2e-layout"
+cleanup() {
+  tmux kill-session -t "$SESSION" >/dev/null 2>&1 || true
+  rm -rf "$TMPDIR"
+}
+trap cleanup EXIT INT TERM
+
+mkdir -p "$RELAY_KITS_DIR/layout"
+cat > "$RELAY_KITS_DIR/layout/kit.toml" <<EOF
+version = 1
+session = "$SESSION"
+attach = false
+
+[[windows]]
+name = "grid"
+layout = "tiled"
+panes = [
+  { run = "echo one", name = "first" },
+  "echo two",
+  "",
+  { run = "echo four", name = "last" },
+]
+
+[[windows]]
+name = "side"
+panes = [
+  "echo left",
+  { run = "echo right", split = "h" },
+]
+EOF
+
+tmux kill-session -t "$SESSION" >/dev/null 2>&1 || true
+"$BIN/relay" kit start layout >/dev/null
+
+windows=$(tmux list-windows -t "$SESSION" -F '#{window_name}:#{window_panes}' | tr '\n' ' ')
+if [ "$windows" != "grid:4 side:2 " ]; then
+  echo "FAIL: expected windows 'grid:4 side:2', got '$windows'" >&2
+  exit 1
+fi
+
+titles=$(tmux list-panes -t "$SESSION:grid" -F '#{pane_title}')
+printf '%s\n' "$titles" | grep -qx 'first' || { echo "FAIL: pane title 'first' not set" >&2; exit 1; }
+printf '%s\n' "$titles" | grep -qx 'last' || { echo "FAIL: pane title 'last' not set" >&2; exit 1; }
+
+# tiled with four panes gives a 2x2 grid: two distinct top offsets.
+tops=$(tmux list-panes -t "$SESSION:grid" -F '#{pane_top}' | sort -u | wc -l | tr -d ' ')
+if [ "$tops" -ne 2 ]; then
+  echo "FAIL: grid window not tiled (rows=$tops)" >&2
+  exit 1
+fi
+
+# split = "h" puts the second pane beside the first.
+lefts=$(tmux list-panes -t "$SESSION:side" -F '#{pane_left}' | sort -u | wc -l | tr -d ' ')
+if [ "$lefts" -ne 2 ]; then
+  echo "FAIL: side window not split horizontally" >&2
+  exit 1
+fi
+
+echo "OK: kit windows built with split panes and layouts"
@@ -0,0 +1,100 @@
+#!/usr/bin/env sh
+# Verify the launcher takes in a compiled plan without per-field or per-pane
+# subprocesses, and that awkward fields survive the round trip.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for kit_plan_protocol test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_DAEMON_DISABLE=1
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_KITS_DIR/small" "$RELAY_KITS_DIR/proto" "$RELAY_PERSONAS_DIR/alpha" "$TMPDIR/shims"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+printf 'version = 1\n' > "$RELAY_PERSONAS_DIR/alpha/persona.toml"
+printf 'version = 1\nsession = "small"\n\n[[windows]]\npanes = ["echo one"]\n' > "$RELAY_KITS_DIR/small/kit.toml"
+cat > "$RELAY_KITS_DIR/proto/kit.toml" <<'KIT'
+version = 1
+session = "proto"
+attach = false
+personas = ["alpha"]
+
+[[windows]]
+name = "edit 'n' run"
+layout = "main-vertical"
+panes = [
+  { run = "echo \"it's\" $HOME `date` \\ end", name = "quotes" },
+  { run = """
+printf 'one'
+printf 'two'
+""", dir = "/tmp", split = "h" },
+  "",
+]
+
+[[windows]]
+name = "logs"
+dir = "/tmp"
+panes = ["tail -f /dev/null;", { run = "echo ünïcode ✓", personas = ["alpha"], name = "uni" }]
+
+[[windows]]
+panes = ["echo third"]
+KIT
+
+"$BIN/relay-kit" start --dry-run proto > "$TMPDIR/cold.out"
+"$BIN/relay-kit" start --dry-run proto > "$TMPDIR/warm.out"
+cmp -s "$TMPDIR/cold.out" "$TMPDIR/warm.out" || fail "cached plan changed the dry run"
+for expected in \
+  "  [1 (edit 'n' run)] layout=main-vertical" \
+  '      Command: echo "it'"'"'s" $HOME `date` \ end' \
+  "    Pane 2 split=h" \
+  "printf 'two'" \
+  "      Command: (none)" \
+  "    Pane 2 (uni)" \
+  "      Command: echo ünïcode ✓" \
+  "  [3 (window3)]" \
+  "Launch: 2 tmux invocations (has-session + 1 batch of 17 commands); unbatched: 18"; do
+  grep -qxF -- "$expected" "$TMPDIR/warm.out" || fail "dry run lacks: $expected"
+done
+[ "$(grep -c '^  \[' "$TMPDIR/warm.out")" = "3" ] || fail "expected 3 windows"
+[ "$(grep -c '^    Pane ' "$TMPDIR/warm.out")" = "6" ] || fail "expected 6 panes"
+
+# A plan from a relay daemon that predates the PANES: record still launches.
+plan="$RELAY_STATE_DIR/cache/plans/proto.plan"
+grep -q '^PANES:6$' "$plan" || fail "plan lacks PANES:6"
+grep -v '^PANES:' "$plan" > "$TMPDIR/plan" && cat "$TMPDIR/plan" > "$plan"
+"$BIN/relay-kit" start --dry-run proto > "$TMPDIR/legacy.out"
+cmp -s "$TMPDIR/warm.out" "$TMPDIR/legacy.out" || fail "plan without PANES: changed the dry run"
+
+# With warm plans, a 6-pane kit runs exactly the commands a 1-pane kit does.
+for tool in awk base64 cat cksum cut date dirname grep head mkdir mktemp mv python3 rm sed sort tr wc; do
+  real=$(command -v "$tool" 2>/dev/null) || continue
+  printf '#!/bin/sh\necho %s >> "%s/spawns"\nexec "%s" "$@"\n' "$tool" "$TMPDIR" "$real" > "$TMPDIR/shims/$tool"
+  chmod +x "$TMPDIR/shims/$tool"
+done
+"$BIN/relay-kit" start --dry-run small >/dev/null
+spawns() {
+  rm -f "$TMPDIR/spawns"
+  PATH="$TMPDIR/shims:$PATH" "$BIN/relay-kit" start --dry-run "$1" >/dev/null
+  sort "$TMPDIR/spawns" | tr '\n' ' '
+}
+small=$(spawns small)
+proto=$(spawns proto)
+[ "$small" = "$proto" ] || fail "spawns grow with the plan: small=[$small] proto=[$proto]"
+case " $proto" in
+  *" mktemp "*|*" base64 "*|*" python3 "*) fail "warm launch forked per-plan helpers: $proto" ;;
+esac
+
+echo "OK: kit plan protocol"
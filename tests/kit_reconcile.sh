@@ -0,0 +1,152 @@
+#!/usr/bin/env sh
+# Verify `relay kit reconcile`: running panes whose config did not change are
+# left alone, and only the differences reach tmux, in one batch.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v python3 >/dev/null 2>&1 || ! command -v tmux >/dev/null 2>&1; then
+  echo "SKIP: python3 and tmux are required for kit_reconcile test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export TMUX_TMPDIR="$TMPDIR/tmux"
+trap 'tmux kill-server >/dev/null 2>&1 || true; rm -rf "$TMPDIR"' EXIT INT TERM
+unset TMUX || true
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DAEMON_DISABLE=1
+KIT="$RELAY_KITS_DIR/rc/kit.toml"
+mkdir -p "$TMUX_TMPDIR" "$RELAY_KITS_DIR/rc" "$RELAY_PERSONAS_DIR" "$TMPDIR/work" "$TMPDIR/shim"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+real_tmux=$(command -v tmux)
+printf '#!/bin/sh\necho "$1" >> "%s/tmux.calls"\nexec "%s" "$@"\n' "$TMPDIR" "$real_tmux" > "$TMPDIR/shim/tmux"
+chmod +x "$TMPDIR/shim/tmux"
+reconcile() {
+  rm -f "$TMPDIR/tmux.calls"
+  PATH="$TMPDIR/shim:$PATH" "$BIN/relay" kit reconcile "$@"
+}
+pane_pid() {
+  tmux list-panes -s -t rc -F '#{window_name}.#{pane_index} #{pane_pid}' | awk -v key="$1" '$1 == key { print $2 }'
+}
+
+tmux -f /dev/null new-session -ds keep
+tmux set -g default-shell /bin/sh >/dev/null
+tmux set -g default-command /bin/sh >/dev/null
+
+cat > "$KIT" <<KIT
+version = 1
+session = "rc"
+attach = false
+dir = "$TMPDIR/work"
+
+[[windows]]
+name = "main"
+panes = ["sleep 600", { name = "server", run = "sleep 601" }, "sleep 602"]
+
+[[windows]]
+name = "logs"
+panes = ["sleep 603"]
+
+[[windows]]
+name = "scratch"
+panes = ["sleep 604"]
+KIT
+
+# A stopped kit is simply started.
+reconcile rc | grep -q 'not running; starting it' || fail "stopped kit not started"
+tmux has-session -t rc || fail "reconcile did not start the kit"
+reconcile rc > "$TMPDIR/out"
+grep -q '^Kit rc is up to date (5 panes unchanged)$' "$TMPDIR/out" || fail "unchanged kit: $(cat "$TMPDIR/out")"
+[ "$(tr '\n' ' ' < "$TMPDIR/tmux.calls")" = "has-session list-panes " ] || fail "no-op reconcile ran: $(cat "$TMPDIR/tmux.calls")"
+
+tmux new-window -d -t rc -n mine
+main0=$(pane_pid main.0)
+main1=$(pane_pid main.1)
+main2=$(pane_pid main.2)
+logs0=$(pane_pid logs.0)
+
+cat > "$KIT" <<KIT
+version = 1
+session = "rc"
+attach = false
+dir = "$TMPDIR/work"
+
+[[windows]]
+name = "main"
+panes = ["sleep 600", { name = "api", run = "sleep 601" }, "sleep 612", "sleep 613"]
+
+[[windows]]
+name = "journal"
+panes = ["sleep 603"]
+KIT
+
+reconcile --dry-run rc > "$TMPDIR/dry"
+for expected in "  retitle pane %2 to api" "  restart pane 1.3: sleep 612" "  add pane 1.4: sleep 613" \
+  "  rename window @2 to journal" "  remove window @3" "  keep 3 running pane(s)"; do
+  grep -qxF -- "$expected" "$TMPDIR/dry" || fail "dry run lacks: $expected ($(cat "$TMPDIR/dry"))"
+done
+[ "$(pane_pid main.2)" = "$main2" ] || fail "dry run changed the session"
+
+reconcile rc > "$TMPDIR/out"
+grep -q ': 3 kept, 1 added, 1 restarted, 1 removed, 1 renamed ' "$TMPDIR/out" || fail "summary: $(cat "$TMPDIR/out")"
+[ "$(tr '\n' ' ' < "$TMPDIR/tmux.calls")" = "has-session list-panes select-pane " ] ||
+  fail "expected one batch after the list-panes query: $(cat "$TMPDIR/tmux.calls")"
+[ "$(pane_pid main.0)" = "$main0" ] || fail "unchanged pane was restarted"
+[ "$(pane_pid main.1)" = "$main1" ] || fail "retitled pane was restarted"
+[ "$(pane_pid journal.0)" = "$logs0" ] || fail "renamed window's pane was restarted"
+[ "$(pane_pid main.2)" != "$main2" ] || fail "changed pane kept its old process"
+[ -n "$(pane_pid main.3)" ] || fail "new pane missing"
+tmux list-panes -t rc:main -F '#{pane_title}' | grep -qx api || fail "pane title not updated"
+windows=$(tmux list-windows -t rc -F '#{window_name}' | tr '\n' ' ')
+[ "$windows" = "main journal mine " ] || fail "windows after reconcile: $windows"
+reconcile rc | grep -q 'up to date (5 panes unchanged)' || fail "second reconcile was not a no-op"
+
+# Without a record of the launch nothing is restarted or removed.
+rm -f "$RELAY_STATE_DIR/cache/plans/rc.applied"
+printf '\n[[windows]]\nname = "extra"\npanes = ["sleep 605", "sleep 606"]\n' >> "$KIT"
+reconcile rc > "$TMPDIR/out" 2> "$TMPDIR/err"
+grep -q 'existing panes are kept' "$TMPDIR/err" || fail "missing record not reported"
+grep -q ': 5 kept, 2 added, 0 restarted, 0 removed' "$TMPDIR/out" || fail "no-record summary: $(cat "$TMPDIR/out")"
+[ "$(tmux list-panes -t rc:extra | wc -l)" -eq 2 ] || fail "new window not built"
+
+# A window added as lazy parks its command until it is selected, like a
+# launched one; turning lazy off restarts it and runs the command at once.
+wait_lines() {
+  tries=0
+  while [ "$(cat "$1" 2>/dev/null | wc -l)" -lt "$2" ] && [ "$tries" -lt 100 ]; do
+    sleep 0.1
+    tries=$((tries + 1))
+  done
+  [ "$(wc -l < "$1")" -eq "$2" ]
+}
+cat >> "$KIT" <<KIT
+
+[[windows]]
+name = "later"
+lazy = true
+panes = ["echo ran >> $TMPDIR/later.out; sleep 607"]
+KIT
+reconcile rc >/dev/null
+sleep 0.5
+[ ! -e "$TMPDIR/later.out" ] || fail "reconcile ran a lazy window's command"
+tmux list-panes -t rc:later -F '#{@relay_lazy}' | grep -q '^relay-lazy-' || fail "lazy command not parked"
+tmux select-window -t rc:later
+wait_lines "$TMPDIR/later.out" 1 || fail "lazy window added by reconcile did not run when selected"
+tmux select-window -t rc:main
+sed 's/^lazy = true$/lazy = false/' "$KIT" > "$TMPDIR/kit.toml"
+mv "$TMPDIR/kit.toml" "$KIT"
+reconcile --dry-run rc | grep -q 'restart pane 4.1' || fail "toggling lazy is not a change"
+reconcile rc >/dev/null
+wait_lines "$TMPDIR/later.out" 2 || fail "window no longer lazy did not run its command"
+[ -z "$(tmux list-panes -t rc:later -F '#{@relay_lazy}')" ] || fail "eager pane still has a parked command"
+
+echo "OK: kit reconcile"
@@ -0,0 +1,83 @@
+#!/usr/bin/env sh
+# Verify content-addressed kit snapshots: unchanged sessions write nothing,
+# history diffs cheaply and any snapshot restores as a kit.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v tmux >/dev/null 2>&1; then
+  echo "SKIP: tmux is required for kit snapshot test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DATA_DIR="$TMPDIR/data"
+mkdir -p "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR" "$RELAY_STATE_DIR" "$RELAY_DATA_DIR"
+
+TMUX_SOCKET_NAME="relay-snapshot-$$"
+export RELAY_TMUX_SOCKET_NAME="$TMUX_SOCKET_NAME"
+tmux_cmd() {
+  TMUX="" tmux -L "$TMUX_SOCKET_NAME" -f /dev/null "$@"
+}
+trap 'tmux_cmd kill-server >/dev/null 2>&1 || true; rm -rf "$TMPDIR"' EXIT INT TERM
+
+new_session_output=$(tmux_cmd new-session -ds work -n edit -c /tmp 2>&1) || {
+  echo "SKIP: unable to start tmux session: $new_session_output" >&2
+  exit 0
+}
+tmux_cmd new-session -ds relay-managed -c /tmp
+
+store="$RELAY_STATE_DIR/snapshots"
+"$BIN/relay-kit" snapshot > "$TMPDIR/first.out"
+grep -q '^work	' "$TMPDIR/first.out" || { echo "FAIL: first snapshot did not record work" >&2; cat "$TMPDIR/first.out" >&2; exit 1; }
+[ ! -e "$store/refs/relay-managed.log" ] || { echo "FAIL: relay-managed session was snapshotted" >&2; exit 1; }
+
+# Nothing changed: the second capture must not write a single file.
+find "$store" -type f -exec ls -l --time-style=+%s.%N {} + > "$TMPDIR/before.ls"
+sleep 1
+"$BIN/relay-kit" snapshot > "$TMPDIR/second.out"
+find "$store" -type f -exec ls -l --time-style=+%s.%N {} + > "$TMPDIR/after.ls"
+cmp -s "$TMPDIR/before.ls" "$TMPDIR/after.ls" || { echo "FAIL: unchanged snapshot touched the store" >&2; diff "$TMPDIR/before.ls" "$TMPDIR/after.ls" >&2; exit 1; }
+grep -q 'No session changed' "$TMPDIR/second.out" || { echo "FAIL: expected no-change notice" >&2; exit 1; }
+
+tmux_cmd new-window -d -t work -n logs -c /tmp
+"$BIN/relay-kit" snapshot > /dev/null
+[ "$(wc -l < "$store/refs/work.log" | tr -d ' ')" -eq 2 ] || { echo "FAIL: expected two snapshots of work" >&2; exit 1; }
+[ "$(find "$store/objects" -type f | wc -l | tr -d ' ')" -eq 2 ] || { echo "FAIL: expected two stored objects" >&2; exit 1; }
+
+"$BIN/relay-kit" snapshot list work > "$TMPDIR/list.out"
+grep -q '^~0	.*2 window(s)' "$TMPDIR/list.out" || { echo "FAIL: latest snapshot not listed" >&2; cat "$TMPDIR/list.out" >&2; exit 1; }
+grep -q '^~1	.*1 window(s)' "$TMPDIR/list.out" || { echo "FAIL: earlier snapshot not listed" >&2; cat "$TMPDIR/list.out" >&2; exit 1; }
+
+set +e
+"$BIN/relay-kit" snapshot diff work > "$TMPDIR/diff.out"
+status=$?
+set -e
+[ "$status" -eq 1 ] || { echo "FAIL: diff of differing snapshots exited $status" >&2; exit 1; }
+grep -q '^+name = "logs"' "$TMPDIR/diff.out" || { echo "FAIL: diff missing the new window" >&2; cat "$TMPDIR/diff.out" >&2; exit 1; }
+"$BIN/relay-kit" snapshot diff work '~0' '~0' > "$TMPDIR/same.out"
+[ ! -s "$TMPDIR/same.out" ] || { echo "FAIL: identical snapshots produced a diff" >&2; exit 1; }
+
+# Restore the earlier snapshot under a new name and the latest in place.
+"$BIN/relay-kit" snapshot restore work '~1' --as work-old > /dev/null
+[ "$(grep -c '^\[\[windows\]\]' "$RELAY_KITS_DIR/work-old/kit.toml")" -eq 1 ] || { echo "FAIL: restored ~1 has wrong windows" >&2; exit 1; }
+grep -q '^session = "work-old"' "$RELAY_KITS_DIR/work-old/kit.toml" || { echo "FAIL: restored kit not renamed" >&2; exit 1; }
+"$BIN/relay-kit" snapshot restore work > /dev/null
+grep -q 'name = "logs"' "$RELAY_KITS_DIR/work/kit.toml" || { echo "FAIL: latest snapshot not restored" >&2; exit 1; }
+if "$BIN/relay-kit" snapshot restore work > /dev/null 2>&1; then
+  echo "FAIL: restore overwrote an existing kit without --force" >&2
+  exit 1
+fi
+"$BIN/relay-kit" plan work > /dev/null 2>&1 || { echo "FAIL: restored kit does not compile" >&2; exit 1; }
+
+# --keep trims history and drops objects nothing references any more.
+tmux_cmd new-window -d -t work -n extra -c /tmp
+"$BIN/relay-kit" snapshot --keep 1 > /dev/null
+[ "$(wc -l < "$store/refs/work.log" | tr -d ' ')" -eq 1 ] || { echo "FAIL: --keep did not trim history" >&2; exit 1; }
+[ "$(find "$store/objects" -type f | wc -l | tr -d ' ')" -eq 1 ] || { echo "FAIL: orphaned objects kept" >&2; exit 1; }
+
+echo "OK: kit snapshots are content-addressed"
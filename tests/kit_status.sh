@@ -0,0 +1,79 @@
+#!/usr/bin/env sh
+# Verify `relay kit status` text, --tsv and --json output from one tmux query,
+# for kits running in the session their kit.toml names.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v tmux >/dev/null 2>&1; then
+  echo "SKIP: tmux is required for kit_status test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DATA_DIR="$TMPDIR/data"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_DATA_DIR" "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR"
+
+cleanup() {
+  tmux kill-session -t desk-stat-up >/dev/null 2>&1 || true
+  rm -rf "$TMPDIR"
+}
+trap cleanup EXIT INT TERM
+
+for kit in stat-up stat-down; do
+  mkdir -p "$RELAY_KITS_DIR/$kit"
+  cat > "$RELAY_KITS_DIR/$kit/kit.toml" <<KIT
+version = 1
+session = "desk-$kit"
+attach = false
+
+[[windows]]
+name = "main"
+panes = ["echo one", "echo two"]
+
+[[windows]]
+name = "logs"
+panes = ["echo three"]
+KIT
+  tmux kill-session -t "desk-$kit" >/dev/null 2>&1 || true
+done
+
+unset TMUX || true
+"$BIN/relay" kit start stat-up >/dev/null
+
+text=$("$BIN/relay" kit status)
+printf '%s\n' "$text" | grep -qx 'stat-up: running' || { echo "FAIL: text status missing running kit" >&2; printf '%s\n' "$text" >&2; exit 1; }
+printf '%s\n' "$text" | grep -qx 'stat-down: stopped' || { echo "FAIL: text status missing stopped kit" >&2; printf '%s\n' "$text" >&2; exit 1; }
+
+tab=$(printf '\t')
+tsv=$("$BIN/relay" kit status --tsv)
+up=$(printf '%s\n' "$tsv" | grep "^stat-up$tab")
+case "$up" in
+  "stat-up${tab}running${tab}desk-stat-up${tab}0${tab}2${tab}3${tab}"[0-9]*"$tab"[0-9]*) ;;
+  *) echo "FAIL: unexpected running row: $up" >&2; exit 1 ;;
+esac
+down=$(printf '%s\n' "$tsv" | grep "^stat-down$tab")
+[ "$down" = "stat-down${tab}stopped${tab}desk-stat-down${tab}0${tab}0${tab}0${tab}${tab}" ] || {
+  echo "FAIL: unexpected stopped row: $down" >&2
+  exit 1
+}
+
+json=$("$BIN/relay" kit status --json stat-up stat-down)
+printf '%s' "$json" | python3 -c '
+import json, sys
+rows = {row["kit"]: row for row in json.load(sys.stdin)}
+up, down = rows["stat-up"], rows["stat-down"]
+assert up["state"] == "running" and up["windows"] == 2 and up["panes"] == 3, up
+assert isinstance(up["created"], int), up
+assert down["state"] == "stopped" and down["created"] is None, down
+' || { echo "FAIL: unexpected JSON status: $json" >&2; exit 1; }
+
+"$BIN/relay" kit stop stat-up >/dev/null
+tmux has-session -t desk-stat-up 2>/dev/null && { echo "FAIL: kit stop left the kit's session running" >&2; exit 1; }
+"$BIN/relay" kit status stat-up | grep -qx 'stat-up: stopped' || { echo "FAIL: stopped kit still running" >&2; exit 1; }
+
+echo "OK: kit status"
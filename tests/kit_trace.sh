@@ -0,0 +1,111 @@
+#!/usr/bin/env sh
+# Verify RELAY_TRACE launch tracing: Chrome trace events from the shell and
+# python sides, per-pane cd spans and the `relay kit trace` summary.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+LIB_DIR="$REPO_ROOT/lib"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for kit_trace test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export TMUX_TMPDIR="$TMPDIR/tmux"
+trap 'tmux kill-server >/dev/null 2>&1 || true; rm -rf "$TMPDIR"' EXIT INT TERM
+unset TMUX RELAY_TRACE || true
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DAEMON_DISABLE=1
+mkdir -p "$TMUX_TMPDIR" "$RELAY_KITS_DIR/demo" "$RELAY_PERSONAS_DIR/base" "$TMPDIR/work dir"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+printf '# Base persona\n[env]\nTRACE_DEMO = "yes"\n' > "$RELAY_PERSONAS_DIR/base/persona.toml"
+cat > "$RELAY_KITS_DIR/demo/kit.toml" <<KIT
+version = 1
+session = "relay-trace-demo"
+attach = false
+
+[[windows]]
+name = "main"
+dir = "$TMPDIR/work dir"
+panes = ["echo a", { run = "echo b", personas = ["base"], name = "with-persona" }]
+
+[[windows]]
+name = "logs"
+panes = ["echo c"]
+KIT
+
+# Every event line is one JSON object; the array is never closed.
+check_events() {
+  python3 - "$1" <<'PY'
+import json, sys
+lines = open(sys.argv[1]).read().splitlines()
+assert lines[0] == "[", lines[0]
+for line in lines[1:]:
+    assert line.endswith(","), line
+    json.loads(line[:-1])
+PY
+}
+
+# Tracing is off by default and leaves nothing behind.
+RELAY_PLAN_CACHE_DISABLE=1 "$BIN/relay" kit up --dry-run demo >/dev/null
+[ ! -e "$RELAY_STATE_DIR/traces" ] || fail "trace directory created without RELAY_TRACE"
+
+# A dry run traces the plan phases, from the shell and from python.
+(cd "$TMPDIR" && RELAY_TRACE=rel.json "$BIN/relay" kit up --dry-run demo >/dev/null)
+[ -s "$TMPDIR/rel.json" ] || fail "relative RELAY_TRACE path not honoured"
+check_events "$TMPDIR/rel.json" || fail "dry-run trace is not valid"
+for span in '"name":"kit.launch"' '"name":"kit.compile"' '"name":"kit.parse","cat":"relay","ph":"X"' \
+  '"name":"process_name","ph":"M"'; do
+  grep -q "$span" "$TMPDIR/rel.json" || fail "dry-run trace lacks $span"
+done
+
+summary=$("$BIN/relay" kit trace --dry-run demo)
+printf '%s\n' "$summary" | grep -q '^kit.plan  *1 ' || fail "summary lacks kit.plan: $summary"
+printf '%s\n' "$summary" | grep -q 'cache=hit' || fail "warm plan not reported as a cache hit: $summary"
+"$BIN/relay" kit trace --summary "$TMPDIR/rel.json" | grep -q '^kit.compile  *1 ' || fail "--summary"
+
+# String arguments are escaped.
+(
+  export RELAY_TRACE="$TMPDIR/quote.json"
+  . "$LIB_DIR/relay_trace.sh"
+  relay_trace_instant check value 'say "hi" \o/' count 3
+)
+check_events "$TMPDIR/quote.json" || fail "escaped arguments are not valid JSON"
+grep -q '"value":"say \\"hi\\" \\\\o/","count":3' "$TMPDIR/quote.json" || fail "argument escaping"
+
+if ! command -v tmux >/dev/null 2>&1; then
+  echo "OK: kit trace (tmux not installed; launch checks skipped)"
+  exit 0
+fi
+tmux -f /dev/null new-session -ds keep
+tmux set -g default-shell /bin/sh >/dev/null
+tmux set -g default-command /bin/sh >/dev/null
+
+# A real launch: each pane reports its cd, the persona pane its wrapper.
+report=$("$BIN/relay" kit trace demo) || fail "kit trace failed: $report"
+trace="$RELAY_STATE_DIR/traces/demo.json"
+check_events "$trace" || fail "launch trace is not valid"
+printf '%s\n' "$report" | grep -q '^pane.cd  *3 ' || fail "expected 3 pane.cd spans: $report"
+for phase in tmux.batch tmux.has-session persona.resolve persona.parse kit.walk; do
+  printf '%s\n' "$report" | grep -q "^$phase " || fail "summary lacks $phase: $report"
+done
+grep -q '"name":"persona.exec"' "$trace" || fail "persona exec instant missing"
+grep -q '"name":"thread_name".*"pane 1.2 (with-persona)"' "$trace" || fail "pane rows are not named"
+tmux has-session -t relay-trace-demo || fail "traced kit is not running"
+
+# Tracing a running kit would only add windows to it.
+if "$BIN/relay" kit trace demo >/dev/null 2>"$TMPDIR/err"; then
+  fail "trace of a running kit succeeded"
+fi
+grep -q 'already running' "$TMPDIR/err" || fail "running kit message: $(cat "$TMPDIR/err")"
+
+echo "OK: kit trace"
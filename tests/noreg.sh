@@ -57,19 +57,23 @@ test_events_filesystem() {
   marker=$(mktemp)
   : > "$marker"
   relay events init >/dev/null 2>&1 || true
-  log_backup=""
-  log_path="$RELAY_STATE_DIR/events.log"
-  if [ -f "$log_path" ]; then
-    log_backup=$(mktemp)
-    cp -p "$log_path" "$log_backup"
-  fi
+  # The emit appends to the log and updates the size estimate beside it;
+  # both are put back afterwards.
+  for state_file in "$RELAY_STATE_DIR/events.log" "$RELAY_STATE_DIR/events.d/.emit-size"; do
+    if [ -f "$state_file" ]; then
+      cp -p "$state_file" "$SNAPDIR/backup.$(basename "$state_file")"
+    fi
+  done
   relay events emit noreg filesystem >/dev/null 2>&1 || true
   rm -f "$marker"
-  if [ -n "$log_backup" ]; then
-    mv "$log_backup" "$log_path"
-  else
-    rm -f "$log_path"
-  fi
+  for state_file in "$RELAY_STATE_DIR/events.log" "$RELAY_STATE_DIR/events.d/.emit-size"; do
+    backup="$SNAPDIR/backup.$(basename "$state_file")"
+    if [ -f "$backup" ]; then
+      mv "$backup" "$state_file"
+    else
+      rm -f "$state_file"
+    fi
+  done
 }
 
 test_events_filesystem
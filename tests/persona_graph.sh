@@ -0,0 +1,121 @@
+#!/usr/bin/env sh
+# Validate persona `extends`, the resolved effective environment (conflicts,
+# PATH dedupe) and its reuse by `relay persona exec` and kit dry-runs.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_DAEMON_DISABLE=1
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_KITS_DIR/graph"
+for persona in base work ssh loop-a loop-b; do
+  mkdir -p "$RELAY_PERSONAS_DIR/$persona"
+done
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+cat > "$RELAY_PERSONAS_DIR/base/persona.toml" <<'EOF'
+[env]
+EMAIL = "me@home"
+EDITOR = "vi"
+
+[path]
+prepend = ["/opt/base/bin"]
+append = ["/opt/tail"]
+EOF
+cat > "$RELAY_PERSONAS_DIR/work/persona.toml" <<'EOF'
+extends = "base"
+[env]
+EMAIL = "me@work"
+
+[path]
+prepend = ["/opt/work/bin", "/opt/base/bin"]
+EOF
+cat > "$RELAY_PERSONAS_DIR/ssh/persona.toml" <<'EOF'
+extends = ["base"]
+[env]
+SSH_AUTH_SOCK = "/tmp/agent"
+EDITOR = "vi"
+
+[path]
+prepend = ["/usr/bin"]
+EOF
+printf 'extends = "loop-b"\n' > "$RELAY_PERSONAS_DIR/loop-a/persona.toml"
+printf 'extends = ["loop-a"]\n' > "$RELAY_PERSONAS_DIR/loop-b/persona.toml"
+touch -t 202001010000 "$RELAY_PERSONAS_DIR"/*/persona.toml
+
+# base is applied once, underneath both personas that extend it; only
+# variables set to different values are conflicts.
+report=$("$BIN/relay" persona resolve work ssh) || fail "resolve work ssh"
+expected="Stack: base -> work -> ssh
+Conflicts:
+  EMAIL: base, work (work wins)"
+[ "$report" = "$expected" ] || fail "resolve report: $report"
+
+probe='printf "%s|%s|%s|%s\n" "$EMAIL" "$EDITOR" "$SSH_AUTH_SOCK" "$PATH"'
+out=$(PATH=/usr/bin:/opt/tail:/bin "$BIN/relay-persona" exec work ssh -- /bin/sh -c "$probe") || fail "exec work ssh"
+[ "$out" = "me@work|vi|/tmp/agent|/usr/bin:/opt/work/bin:/opt/base/bin:/opt/tail:/bin" ] \
+  || fail "effective environment: $out"
+
+# `use` prints one persona together with what it extends.
+out=$(PATH=/bin "$BIN/relay" persona use work)
+expected="export EMAIL=me@work
+export EDITOR=vi
+export PATH=/opt/work/bin:/opt/base/bin:/bin:/opt/tail"
+[ "$out" = "$expected" ] || fail "use work: $out"
+
+if "$BIN/relay" persona resolve loop-a > "$TMPDIR/loop.out" 2>&1; then
+  fail "extends cycle accepted"
+fi
+grep -q 'cycle: loop-a -> loop-b -> loop-a' "$TMPDIR/loop.out" || fail "cycle message: $(cat "$TMPDIR/loop.out")"
+
+# Warm runs reuse the cached stack without python, even when a persona was
+# written in the same second as the stack (the checksums decide then).
+mkdir -p "$TMPDIR/nopy"
+printf '#!/bin/sh\necho "python3 invoked" >&2\nexit 97\n' > "$TMPDIR/nopy/python3"
+chmod +x "$TMPDIR/nopy/python3"
+printf '[env]\nEMAIL = "me@home"\nEDITOR = "nano"\n' > "$RELAY_PERSONAS_DIR/base/persona.toml"
+"$BIN/relay" persona resolve work >/dev/null || fail "resolve after edit"
+out=$(PATH="$TMPDIR/nopy:/usr/bin:/bin" "$BIN/relay-persona" exec work -- /bin/sh -c 'printf "%s\n" "$EDITOR"' 2>&1) \
+  || fail "warm exec: $out"
+[ "$out" = "nano" ] || fail "warm exec after same-second write: $out"
+
+# Editing an extended persona invalidates every stack built on it.
+printf '[env]\nEMAIL = "me@home"\nEDITOR = "emacs"\n' > "$RELAY_PERSONAS_DIR/base/persona.toml"
+out=$("$BIN/relay-persona" exec work -- /bin/sh -c 'printf "%s\n" "$EDITOR"')
+[ "$out" = "emacs" ] || fail "stale stack after editing an extended persona: $out"
+rm "$RELAY_PERSONAS_DIR/base/persona.toml"
+if "$BIN/relay-persona" exec work -- /bin/true 2> "$TMPDIR/missing.err"; then
+  fail "exec succeeded without the extended persona"
+fi
+grep -q 'Persona not found: base (extended by work)' "$TMPDIR/missing.err" || fail "missing message: $(cat "$TMPDIR/missing.err")"
+printf '[env]\nEMAIL = "me@home"\n' > "$RELAY_PERSONAS_DIR/base/persona.toml"
+
+# Dry-runs show the stack each pane resolves to, from the same cache.
+cat > "$RELAY_KITS_DIR/graph/kit.toml" <<'EOF'
+version = 1
+personas = ["work"]
+
+[[windows]]
+name = "main"
+panes = ["echo one", { run = "echo two", personas = ["ssh"] }]
+EOF
+"$BIN/relay-kit" start --dry-run graph > "$TMPDIR/dry.out" || fail "dry-run"
+grep -q '^      Stack: base -> work$' "$TMPDIR/dry.out" || fail "pane 1 stack: $(cat "$TMPDIR/dry.out")"
+grep -q '^      Stack: base -> work -> ssh$' "$TMPDIR/dry.out" || fail "pane 2 stack: $(cat "$TMPDIR/dry.out")"
+grep -q '^        EMAIL: base, work (work wins)$' "$TMPDIR/dry.out" || fail "dry-run conflicts: $(cat "$TMPDIR/dry.out")"
+PATH="$TMPDIR/nopy:$PATH" "$BIN/relay-kit" start --dry-run graph > "$TMPDIR/warm.out" 2> "$TMPDIR/warm.err" || fail "warm dry-run"
+if grep -q 'python3 invoked' "$TMPDIR/warm.err"; then
+  fail "warm dry-run started python3"
+fi
+cmp -s "$TMPDIR/dry.out" "$TMPDIR/warm.out" || fail "warm dry-run output changed"
+
+echo "OK: persona graph"
@@ -0,0 +1,105 @@
+#!/usr/bin/env sh
+# Validate the resolved persona stack cache used by `relay persona exec`
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_PERSONAS_DIR/alpha" "$RELAY_PERSONAS_DIR/beta"
+
+cat > "$RELAY_PERSONAS_DIR/alpha/persona.toml" <<'EOF'
+version = 1
+[env]
+STACK_FLAG = "alpha"
+ALPHA_ONLY = "it's $literal"
+
+[path]
+prepend = ["/opt/alpha/bin"]
+append = ["/opt/alpha/tail"]
+EOF
+cat > "$RELAY_PERSONAS_DIR/beta/persona.toml" <<'EOF'
+version = 1
+[env]
+STACK_FLAG = "beta"
+
+[path]
+prepend = ["/opt/beta/bin"]
+EOF
+# Persona files written in the same second as the cache are never trusted, so
+# age them before the first exec.
+touch -t 202001010000 "$RELAY_PERSONAS_DIR/alpha/persona.toml" "$RELAY_PERSONAS_DIR/beta/persona.toml"
+
+probe='printf "%s|%s|%s\n" "$STACK_FLAG" "$ALPHA_ONLY" "$PATH"'
+expected="beta|it's \$literal|/opt/beta/bin:/opt/alpha/bin:/usr/bin:/bin:/opt/alpha/tail"
+
+out=$(PATH=/usr/bin:/bin "$BIN/relay-persona" exec alpha beta -- /bin/sh -c "$probe")
+[ "$out" = "$expected" ] || { echo "FAIL: cold stack resolved to '$out'" >&2; exit 1; }
+[ -f "$RELAY_STATE_DIR/cache/personas/alpha/beta/.stack.sh" ] || { echo "FAIL: stack script not cached" >&2; exit 1; }
+
+# A warm exec must not start python3 (or any helper) at all.
+mkdir -p "$TMPDIR/nopy"
+for tool in python3 dirname mktemp; do
+  cat > "$TMPDIR/nopy/$tool" <<EOF
+#!/bin/sh
+echo "$tool invoked" >&2
+exit 97
+EOF
+  chmod +x "$TMPDIR/nopy/$tool"
+done
+out=$(PATH="$TMPDIR/nopy:/usr/bin:/bin" "$BIN/relay-persona" exec alpha beta -- /bin/sh -c "$probe" 2> "$TMPDIR/warm.err")
+if [ -s "$TMPDIR/warm.err" ]; then
+  echo "FAIL: warm exec forked helpers:" >&2
+  cat "$TMPDIR/warm.err" >&2
+  exit 1
+fi
+[ "$out" = "beta|it's \$literal|/opt/beta/bin:/opt/alpha/bin:$TMPDIR/nopy:/usr/bin:/bin:/opt/alpha/tail" ] || {
+  echo "FAIL: warm stack resolved to '$out'" >&2
+  exit 1
+}
+
+# Order matters: alpha on top of beta is a different stack.
+out=$(PATH=/usr/bin:/bin "$BIN/relay-persona" exec beta alpha -- /bin/sh -c 'printf "%s\n" "$STACK_FLAG"')
+[ "$out" = "alpha" ] || { echo "FAIL: reversed stack resolved to '$out'" >&2; exit 1; }
+
+# Editing a persona invalidates every cached stack that includes it.
+printf 'version = 1\n[env]\nSTACK_FLAG = "beta-edited"\n' > "$RELAY_PERSONAS_DIR/beta/persona.toml"
+out=$(PATH=/usr/bin:/bin "$BIN/relay-persona" exec alpha beta -- /bin/sh -c 'printf "%s\n" "$STACK_FLAG"')
+[ "$out" = "beta-edited" ] || { echo "FAIL: stale stack reused after edit ('$out')" >&2; exit 1; }
+
+# The render just now was stamped as untrusted. Once the checksums vouch for
+# it, the script is re-stamped and warm execs fork nothing again.
+sleep 1
+PATH=/usr/bin:/bin "$BIN/relay-persona" exec alpha beta -- /bin/true
+for tool in cksum touch rm; do
+  cat > "$TMPDIR/nopy/$tool" <<EOF
+#!/bin/sh
+echo "$tool invoked" >&2
+exit 97
+EOF
+  chmod +x "$TMPDIR/nopy/$tool"
+done
+out=$(PATH="$TMPDIR/nopy:/usr/bin:/bin" "$BIN/relay-persona" exec alpha beta -- /bin/sh -c 'printf "%s\n" "$STACK_FLAG"' 2> "$TMPDIR/restamp.err")
+if [ -s "$TMPDIR/restamp.err" ] || [ "$out" != "beta-edited" ]; then
+  echo "FAIL: exec after a passing checksum still forked ('$out'):" >&2
+  cat "$TMPDIR/restamp.err" >&2
+  exit 1
+fi
+[ ! -e "$RELAY_STATE_DIR/cache/personas/alpha/beta/.stack.sh.stamp" ] || {
+  echo "FAIL: stamp marker left behind" >&2
+  exit 1
+}
+
+# A missing persona still fails the exec.
+if "$BIN/relay-persona" exec alpha missing -- /bin/true 2>/dev/null; then
+  echo "FAIL: exec succeeded with a missing persona" >&2
+  exit 1
+fi
+
+out=$(RELAY_PERSONA_CACHE_DISABLE=1 PATH=/usr/bin:/bin "$BIN/relay-persona" exec alpha -- /bin/sh -c 'printf "%s\n" "$STACK_FLAG"')
+[ "$out" = "alpha" ] || { echo "FAIL: uncached exec resolved to '$out'" >&2; exit 1; }
+
+echo "OK: persona stack cache"
@@ -0,0 +1,80 @@
+#!/usr/bin/env sh
+# Validate the compiled kit plan cache: miss, hit, invalidation and python-free hits
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+TMPDIR=$(mktemp -d)
+trap 'rm -rf "$TMPDIR"' EXIT INT TERM
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DATA_DIR="$TMPDIR/data"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_DATA_DIR" "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR"
+
+mkdir -p "$RELAY_PERSONAS_DIR/alpha"
+cat > "$RELAY_PERSONAS_DIR/alpha/persona.toml" <<'EOF'
+version = 1
+[env]
+P_ALPHA = "1"
+EOF
+
+mkdir -p "$RELAY_KITS_DIR/cached"
+cat > "$RELAY_KITS_DIR/cached/kit.toml" <<'EOF'
+version = 1
+session = "cached"
+attach = false
+
+[[windows]]
+name = "dev"
+panes = [
+  "echo first",
+  { run = "echo second", personas = ["alpha"] },
+]
+EOF
+
+stats() {
+  "$BIN/relay" kit plan --stats cached
+}
+
+"$BIN/relay" kit start cached --dry-run > "$TMPDIR/first.out"
+stats | grep -q 'hits=0	misses=1	fresh' || { echo "FAIL: expected a miss on first start" >&2; stats >&2; exit 1; }
+
+"$BIN/relay" kit start cached --dry-run > "$TMPDIR/second.out"
+stats | grep -q 'hits=1	misses=1	fresh' || { echo "FAIL: expected a hit on second start" >&2; stats >&2; exit 1; }
+cmp -s "$TMPDIR/first.out" "$TMPDIR/second.out" || { echo "FAIL: cached plan changed dry-run output" >&2; exit 1; }
+
+# A cache hit must not start python3.
+mkdir -p "$TMPDIR/nopy"
+cat > "$TMPDIR/nopy/python3" <<'EOF'
+#!/bin/sh
+echo "python3 invoked" >&2
+exit 97
+EOF
+chmod +x "$TMPDIR/nopy/python3"
+PATH="$TMPDIR/nopy:$PATH" "$BIN/relay-kit" start cached --dry-run > "$TMPDIR/nopy.out" 2> "$TMPDIR/nopy.err"
+if grep -q 'python3 invoked' "$TMPDIR/nopy.err"; then
+  echo "FAIL: cache hit started python3" >&2
+  exit 1
+fi
+cmp -s "$TMPDIR/first.out" "$TMPDIR/nopy.out" || { echo "FAIL: python-free hit changed dry-run output" >&2; exit 1; }
+
+# Editing a dependency (the persona file) invalidates the plan.
+printf 'P_EXTRA = "2"\n' >> "$RELAY_PERSONAS_DIR/alpha/persona.toml"
+stats | grep -q 'stale' || { echo "FAIL: persona edit did not invalidate plan" >&2; stats >&2; exit 1; }
+
+# Editing kit.toml invalidates too, and the new command shows up.
+sed 's/echo first/echo changed/' "$RELAY_KITS_DIR/cached/kit.toml" > "$TMPDIR/kit.toml"
+mv "$TMPDIR/kit.toml" "$RELAY_KITS_DIR/cached/kit.toml"
+"$BIN/relay" kit start cached --dry-run > "$TMPDIR/third.out"
+grep -q 'echo changed' "$TMPDIR/third.out" || { echo "FAIL: stale plan reused after kit.toml edit" >&2; exit 1; }
+
+# Pane overlays are a dependency as well.
+"$BIN/relay" kit persona assign cached dev:1 alpha >/dev/null
+stats | grep -q 'stale' || { echo "FAIL: overlay edit did not invalidate plan" >&2; stats >&2; exit 1; }
+
+"$BIN/relay" kit plan --rebuild cached | grep -q '^rebuilt cached$' || { echo "FAIL: rebuild did not report" >&2; exit 1; }
+stats | grep -q 'fresh' || { echo "FAIL: rebuild left plan stale" >&2; stats >&2; exit 1; }
+
+echo "OK: kit plan cache"
@@ -0,0 +1,171 @@
+#!/usr/bin/env sh
+# Verify `relay daemon` answers match the direct code paths and track edits.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+
+if ! command -v tmux >/dev/null 2>&1 || ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: tmux and python3 are required for relay_daemon test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_DATA_DIR="$TMPDIR/data"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_DAEMON_SOCKET="$TMPDIR/d.sock"
+mkdir -p "$RELAY_STATE_DIR" "$RELAY_DATA_DIR" "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR"
+
+cleanup() {
+  "$BIN/relay" daemon stop >/dev/null 2>&1 || true
+  tmux kill-session -t desk-dmn-up >/dev/null 2>&1 || true
+  rm -rf "$TMPDIR"
+}
+trap cleanup EXIT INT TERM
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+write_kit() {
+  mkdir -p "$RELAY_KITS_DIR/$1"
+  cat > "$RELAY_KITS_DIR/$1/kit.toml" <<KIT
+version = 1
+session = "desk-$1"
+description = "$2"
+attach = false
+personas = ["base"]
+
+[[windows]]
+name = "main"
+panes = ["echo one", "echo two"]
+KIT
+}
+
+write_kit dmn-up "Up kit"
+write_kit dmn-down "Down kit"
+mkdir -p "$RELAY_PERSONAS_DIR/base"
+cat > "$RELAY_PERSONAS_DIR/base/persona.toml" <<'P'
+description = "Base persona"
+[env]
+API_TOKEN = "hunter2"
+EDITOR = "vi"
+P
+
+unset TMUX || true
+tmux kill-session -t desk-dmn-up >/dev/null 2>&1 || true
+"$BIN/relay" kit start dmn-up >/dev/null
+
+# Answers computed without the daemon.
+direct_tsv=$(RELAY_DAEMON_DISABLE=1 "$BIN/relay" kit status --tsv)
+direct_json=$(RELAY_DAEMON_DISABLE=1 "$BIN/relay" kit status --json dmn-up dmn-down)
+direct_plan=$(PYTHONPATH="$REPO_ROOT/lib" python3 -m relay_kit_plan "$RELAY_PERSONAS_DIR" \
+  "$RELAY_KITS_DIR/dmn-up/kit.toml" dmn-up "$RELAY_KITS_DIR/dmn-up" -)
+
+"$BIN/relay" daemon status >/dev/null 2>&1 && fail "daemon reported running before start"
+"$BIN/relay" daemon start >/dev/null || fail "daemon did not start"
+[ -S "$RELAY_DAEMON_SOCKET" ] || fail "socket missing after start"
+"$BIN/relay" daemon status | grep -q '^relay daemon running on ' || fail "status does not report running"
+
+"$BIN/relay" daemon query ping | grep -q "^relay-daemon [0-9]" || fail "ping"
+
+[ "$("$BIN/relay" kit status --tsv)" = "$direct_tsv" ] || fail "daemon TSV status differs from direct"
+[ "$("$BIN/relay" kit status --json dmn-up dmn-down)" = "$direct_json" ] || fail "daemon JSON status differs from direct"
+[ "$("$BIN/relay" kit status nosuch)" = "$(RELAY_DAEMON_DISABLE=1 "$BIN/relay" kit status nosuch)" ] \
+  || fail "daemon status for an unknown kit differs from direct"
+"$BIN/relay" kit status '../bad' >/dev/null 2>&1 && fail "invalid kit name accepted through daemon"
+"$BIN/relay" daemon query kits.rows | grep -q '^\*	dmn-up ' || fail "kits.rows does not mark the running kit"
+
+[ "$("$BIN/relay" daemon query plan "$RELAY_KITS_DIR/dmn-up/kit.toml" "$RELAY_KITS_DIR/dmn-up")" = "$direct_plan" ] \
+  || fail "daemon plan differs from relay_kit_plan"
+"$BIN/relay" daemon query plan "$RELAY_KITS_DIR/dmn-up/kit.toml" "$RELAY_KITS_DIR/dmn-up" >/dev/null
+"$BIN/relay" daemon status | grep -qx 'plan_hits	1' || fail "second plan request was not served from memory"
+
+preview=$("$BIN/relay" daemon query persona.preview base)
+printf '%s\n' "$preview" | grep -q 'hidden' || fail "preview shows secrets"
+printf '%s\n' "$preview" | grep -q 'hunter2' && fail "preview leaked secret"
+fallback=$(PYTHONPATH="$REPO_ROOT/lib" python3 -m relay_daemon persona-preview "$RELAY_PERSONAS_DIR/base/persona.toml")
+[ "$preview" = "$fallback" ] || fail "daemon preview differs from direct preview"
+
+# Edits show up on the next request.
+[ "$("$BIN/relay" daemon query kits | cut -f1)" = "$(printf 'dmn-down\ndmn-up')" ] || fail "kit listing"
+write_kit dmn-new "New kit"
+[ "$("$BIN/relay" daemon query kits | cut -f1)" = "$(printf 'dmn-down\ndmn-new\ndmn-up')" ] || fail "new kit not listed"
+"$BIN/relay" daemon query kits.rows | grep -q 'dmn-new.*New kit' || fail "new kit description missing"
+sleep 1
+write_kit dmn-new "Renamed kit"
+"$BIN/relay" daemon query kits.rows | grep -q 'dmn-new.*Renamed kit' || fail "edited kit description is stale"
+
+# Other directories never get this daemon's answers.
+other=$(RELAY_KITS_DIR="$TMPDIR/other" "$BIN/relay" daemon query kits 2>&1) && fail "mismatched directories answered: $other"
+RELAY_KITS_DIR="$TMPDIR/other" "$BIN/relay" kit status >/dev/null 2>&1 || true
+
+# The shell client gives the CLI's answers, through socat (a stand-in that
+# relays stdin to the socket when socat is not installed) or python3, with a
+# relative kits directory and arguments JSON has to escape.
+shell_query() {
+  sh -c '. "$0/lib/relay_daemon.sh"; relay_daemon_query "$@"' "$REPO_ROOT" "$@"
+}
+mkdir -p "$TMPDIR/socat"
+cat > "$TMPDIR/socat/socat" <<SOCAT
+#!/bin/sh
+: > "$TMPDIR/socat.used"
+exec python3 -c '
+import socket, sys
+conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+conn.connect(sys.argv[1])
+conn.sendall(sys.stdin.buffer.read())
+conn.shutdown(socket.SHUT_WR)
+while True:
+    chunk = conn.recv(65536)
+    if not chunk:
+        break
+    sys.stdout.buffer.write(chunk)
+' "\${4#UNIX-CONNECT:}"
+SOCAT
+chmod +x "$TMPDIR/socat/socat"
+cli_kits=$("$BIN/relay" daemon query kits)
+[ "$(shell_query kits)" = "$cli_kits" ] || fail "python3 client kits differ"
+[ "$(PATH="$TMPDIR/socat:$PATH" shell_query kits)" = "$cli_kits" ] || fail "socat client kits differ"
+[ -e "$TMPDIR/socat.used" ] || fail "socat client not used"
+[ "$(PATH="$TMPDIR/socat:$PATH" "$BIN/relay" kit status --tsv)" = "$(RELAY_DAEMON_DISABLE=1 "$BIN/relay" kit status --tsv)" ] \
+  || fail "daemon TSV status through socat differs from direct"
+[ "$(cd "$TMPDIR" && RELAY_KITS_DIR=kits PATH="$TMPDIR/socat:$PATH" shell_query kits)" = "$cli_kits" ] \
+  || fail "socat client with a relative kits directory"
+for client in "" "$TMPDIR/socat:"; do
+  [ "$(PATH="$client$PATH" shell_query persona.preview 'no "such" \persona' 2>&1)" \
+    = "$("$BIN/relay" daemon query persona.preview 'no "such" \persona' 2>&1)" ] \
+    || fail "escaped arguments differ (${client:-python3})"
+done
+
+# A daemon of another plan format or protocol answers 111 and leaves the
+# caller to compile the plan itself.
+[ "$(sed -n 's/^PLAN_FORMAT=//p' "$BIN/relay-kit")" \
+  = "$(PYTHONPATH="$REPO_ROOT/lib" python3 -c 'from relay_kit_plan import PLAN_FORMAT; print(PLAN_FORMAT)')" ] \
+  || fail "PLAN_FORMAT differs between relay-kit and relay_kit_plan"
+for client in "" "$TMPDIR/socat:"; do
+  status=0
+  stale=$(PATH="$client$PATH" PLAN_FORMAT=1 shell_query plan \
+    "$RELAY_KITS_DIR/dmn-up/kit.toml" "$RELAY_KITS_DIR/dmn-up" 2>&1) || status=$?
+  [ "$status" -eq 111 ] && [ -z "$stale" ] \
+    || fail "plan for another format answered (${client:-python3}): $status $stale"
+done
+"$BIN/relay" daemon status | grep -qx 'plan_hits	1' || fail "plan for another format was served"
+old_reply=$(python3 - "$RELAY_DAEMON_SOCKET" "$RELAY_KITS_DIR" "$RELAY_PERSONAS_DIR" <<'PY'
+import json, socket, sys
+conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+conn.connect(sys.argv[1])
+conn.sendall((json.dumps([sys.argv[2], sys.argv[3], "kits"]) + "\n").encode())
+print(conn.recv(65536).decode().split("\n")[0])
+PY
+)
+[ "$old_reply" = 111 ] || fail "request of an older protocol answered: $old_reply"
+
+"$BIN/relay" daemon stop >/dev/null
+[ ! -e "$RELAY_DAEMON_SOCKET" ] || fail "socket left behind after stop"
+"$BIN/relay" kit status --tsv | grep -q "^dmn-new	stopped	" || fail "fallback status after stop"
+
+echo "OK: relay daemon"
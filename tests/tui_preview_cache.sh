@@ -0,0 +1,134 @@
+#!/usr/bin/env sh
+# Verify the pre-rendered TUI previews: they match what the preview commands
+# print, only changed entries are re-rendered, and the fzf preview command
+# serves the cache with a fallback to rendering.
+set -eu
+
+REPO_ROOT=$(CDPATH='' cd -- "$(dirname -- "$0")/.." && pwd -P)
+BIN="$REPO_ROOT/bin"
+LIB_DIR="$REPO_ROOT/lib"
+
+if ! command -v python3 >/dev/null 2>&1; then
+  echo "SKIP: python3 is required for tui_preview_cache test" >&2
+  exit 0
+fi
+
+TMPDIR=$(mktemp -d)
+export TMUX_TMPDIR="$TMPDIR/tmux"
+trap 'tmux kill-server >/dev/null 2>&1 || true; rm -rf "$TMPDIR"' EXIT INT TERM
+unset TMUX RELAY_TUI_SHOW_SECRETS RELAY_ACTIVE_PERSONAS RELAY_ACTIVE_PERSONA RELAY_PERSONA || true
+export RELAY_STATE_DIR="$TMPDIR/state"
+export RELAY_KITS_DIR="$TMPDIR/kits"
+export RELAY_PERSONAS_DIR="$TMPDIR/personas"
+export RELAY_DAEMON_DISABLE=1
+export RELAY_TUI_BIN_DIR="$BIN" RELAY_TUI_RELAY_BIN="$BIN/relay" RELAY_TUI_FEATURES=""
+mkdir -p "$TMUX_TMPDIR" "$RELAY_STATE_DIR" "$RELAY_KITS_DIR/web" "$RELAY_KITS_DIR/docs" "$RELAY_KITS_DIR/empty" \
+  "$RELAY_PERSONAS_DIR/base" "$RELAY_PERSONAS_DIR/cloud"
+CACHE="$RELAY_STATE_DIR/cache/previews"
+
+fail() {
+  echo "FAIL: $*" >&2
+  exit 1
+}
+
+printf 'version = 1\nsession = "web-dev"\n\n[[windows]]\nname = "edit"\npanes = ["echo web"]\n' > "$RELAY_KITS_DIR/web/kit.toml"
+printf 'version = 1\ndescription = "Docs"\n\n[[windows]]\npanes = ["echo docs"]' > "$RELAY_KITS_DIR/docs/kit.toml"
+printf '# Base\n[env]\nEDITOR = "vi"\n\n[path]\nprepend = ["~/bin"]\n' > "$RELAY_PERSONAS_DIR/base/persona.toml"
+printf '[env]\nAPI_TOKEN = "s3cret"\nREGION = "eu"\n' > "$RELAY_PERSONAS_DIR/cloud/persona.toml"
+"$BIN/relay" events emit info "first event" >/dev/null
+"$BIN/relay" events emit warn "second event" >/dev/null
+
+warm() {
+  PYTHONPATH="$LIB_DIR" python3 -m relay_preview "$@"
+}
+
+# Kit sessions come from the metadata index, as when relay-tui warms kits.
+warm_kits() {
+  warm kits --kits-dir "$RELAY_KITS_DIR" --personas-dir "$RELAY_PERSONAS_DIR"
+}
+
+# Like relay-tui itself, the library expects to run without `set -e`.
+set +e
+. "$LIB_DIR/relay_tui.sh"
+
+check_kits() {
+  for kit in web docs empty; do
+    [ "$(cat "$CACHE/kits/$kit")" = "$(relay_tui_kits_preview "$kit")" ] || fail "kit preview of $kit differs"
+  done
+}
+
+out=$(warm_kits) || fail "warm kits"
+[ "$out" = "kits: 3 rendered, 0 unchanged, 0 removed" ] || fail "cold kit warm: $out"
+check_kits
+[ "$(warm_kits)" = "kits: 0 rendered, 3 unchanged, 0 removed" ] || fail "warm kits rendered again"
+
+# Only the edited kit and the removed one change.
+printf '\n# edited\n' >> "$RELAY_KITS_DIR/web/kit.toml"
+rm -rf "$RELAY_KITS_DIR/empty"
+out=$(warm_kits)
+[ "$out" = "kits: 1 rendered, 1 unchanged, 1 removed" ] || fail "edit: $out"
+[ ! -e "$CACHE/kits/empty" ] || fail "removed kit still cached"
+grep -q '# edited' "$CACHE/kits/web" || fail "edited kit not re-rendered"
+
+# Personas: secrets stay hidden unless shown, and the active flag is keyed.
+warm personas --personas-dir "$RELAY_PERSONAS_DIR" >/dev/null || fail "warm personas"
+for persona in base cloud; do
+  [ "$(cat "$CACHE/personas/$persona")" = "$(relay_tui_personas_preview "$persona")" ] || fail "persona preview of $persona differs"
+done
+grep -q 'hidden' "$CACHE/personas/cloud" || fail "secret shown by default"
+out=$(warm personas --personas-dir "$RELAY_PERSONAS_DIR" --active "cloud" --show-secrets)
+[ "$out" = "personas: 2 rendered, 0 unchanged, 0 removed" ] || fail "secrets/active change: $out"
+[ "$(cat "$CACHE/personas/cloud")" = "$(RELAY_TUI_SHOW_SECRETS=1 RELAY_ACTIVE_PERSONAS=cloud relay_tui_personas_preview cloud)" ] \
+  || fail "persona preview with secrets differs"
+
+# Events: every page matches the detail view and moves when an event arrives.
+log="$RELAY_STATE_DIR/events.log"
+[ "$(warm events --log "$log" --limit 5)" = "events: 2 rendered, 0 unchanged, 0 removed" ] || fail "warm events"
+for n in 1 2; do
+  [ "$(cat "$CACHE/events/$n")" = "$(relay_tui_events_detail "$n")" ] || fail "event $n differs"
+done
+"$BIN/relay" events emit info "third event" >/dev/null
+[ "$(warm events --log "$log" --limit 5)" = "events: 3 rendered, 0 unchanged, 0 removed" ] || fail "events after emit"
+grep -q 'third event' "$CACHE/events/1" || fail "newest event page"
+
+# The fzf command: cached render first, rendering when the entry is missing.
+run_preview() {
+  sh -c "$(printf '%s\n' "$1" | sed "s/{2}/'$2'/g")"
+}
+command=$(RELAY_TUI_CACHE_DISABLE=1 relay_tui_preview_command kits kits-preview '{2}' --kits-dir "$RELAY_KITS_DIR")
+[ "$command" = "$BIN/relay-tui kits-preview {2}" ] || fail "uncached preview command: $command"
+printf 'stale\n' > "$CACHE/kits/docs"
+relay_tui_preview_forget kits web
+command=$(relay_tui_preview_command kits kits-preview '{2}' --kits-dir "$RELAY_KITS_DIR")
+[ "$(run_preview "$command" web)" = "$(relay_tui_kits_preview web)" ] || fail "fallback render"
+i=0
+until grep -q '"web"' "$CACHE/kits/.keys" 2>/dev/null && [ -e "$CACHE/kits/web" ]; do
+  i=$((i + 1))
+  [ "$i" -lt 100 ] || fail "background refresh did not restore the entry"
+  sleep 0.1
+done
+[ "$(run_preview "$command" docs)" = "stale" ] || fail "preview command does not serve the cache"
+
+if ! command -v tmux >/dev/null 2>&1; then
+  echo "OK: tui preview cache (tmux not installed; session checks skipped)"
+  exit 0
+fi
+tmux -f /dev/null new-session -ds keep
+tmux set -g default-shell /bin/sh >/dev/null
+tmux set -g default-command /bin/sh >/dev/null
+
+# A kit starting (or gaining a window) is a change too; web runs in the
+# session its kit.toml names.
+tmux new-session -ds web-dev -n "edit it"
+tmux new-window -t web-dev -n logs
+tmux split-window -t web-dev:logs
+out=$(warm_kits)
+[ "$out" = "kits: 1 rendered, 1 unchanged, 0 removed" ] || fail "session start: $out"
+relay_tui_kits_status_reset
+check_web=$(relay_tui_kits_preview web)
+[ "$(cat "$CACHE/kits/web")" = "$check_web" ] || fail "running kit preview differs"
+grep -q '^  logs (2 panes)$' "$CACHE/kits/web" || fail "running kit windows: $(cat "$CACHE/kits/web")"
+tmux new-window -t web-dev -n extra
+[ "$(warm_kits)" = "kits: 1 rendered, 1 unchanged, 0 removed" ] || fail "new window"
+
+echo "OK: tui preview cache"